@@ -0,0 +1,176 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Микробенчмарк слоя БД на временной копии схемы (рабочая БД не затрагивается)
+
+Запуск: python bench_db.py
+"""
+import os
+import random
+import sqlite3
+import tempfile
+import threading
+import time
+
+from tgbot.database.db_helper import DB_POOL, close_dbx, dict_factory
+from tgbot.database.db_migrations import create_dbx
+from tgbot.database.db_category import Categoryx
+from tgbot.database.db_item import Itemx
+from tgbot.database.db_position import Positionx
+from tgbot.database.db_purchases import Purchasesx
+from tgbot.database.db_users import Userx, UserModel
+from tgbot.utils.const_functions import clear_html, gen_id, get_unix
+
+USERS_COUNT = 10_000  # Количество пользователей во временной БД
+CALLS_COUNT = 5_000  # Количество вызовов на каждый замер
+ITEMS_COUNT = 20_000  # Количество товаров для замера загрузки
+BUYERS_COUNT = 8  # Количество одновременных покупателей
+BUYS_COUNT = 250  # Количество покупок на одного покупателя
+
+
+# Старый вариант Userx.get - новое подключение на каждый вызов
+def userx_get_per_call(path: str, **kwargs) -> UserModel:
+    with sqlite3.connect(path) as con:
+        con.row_factory = dict_factory
+        sql = "SELECT * FROM storage_users WHERE " + " AND ".join([f"{item} = ?" for item in kwargs])
+
+        response = con.execute(sql, list(kwargs.values())).fetchone()
+
+        if response is not None:
+            response = UserModel(**response)
+
+        return response
+
+
+# Заполнение временной БД пользователями
+def fill_users(path: str):
+    with sqlite3.connect(path) as con:
+        con.executemany(
+            "INSERT INTO storage_users (user_id, user_login, user_name, user_balance, user_refill, user_give, user_unix) "
+            "VALUES (?, ?, ?, 0, 0, 0, 0)",
+            [(user_id, f"login{user_id}", f"name{user_id}") for user_id in range(1, USERS_COUNT + 1)],
+        )
+        con.execute("UPDATE storage_users SET user_balance = 1000000 WHERE user_id <= ?", [BUYERS_COUNT])
+
+
+# Замер среднего времени одного вызова в микросекундах
+def measure(func) -> float:
+    user_ids = [random.randint(1, USERS_COUNT) for _ in range(CALLS_COUNT)]
+
+    time_start = time.perf_counter()
+
+    for user_id in user_ids:
+        func(user_id)
+
+    return (time.perf_counter() - time_start) / CALLS_COUNT * 1_000_000
+
+
+def bench_userx_get(path: str):
+    time_old = measure(lambda user_id: userx_get_per_call(path, user_id=user_id))
+    time_new = measure(lambda user_id: Userx.get(user_id=user_id))
+
+    print(f"Userx.get | подключение на вызов: {time_old:.1f} мкс/вызов")
+    print(f"Userx.get | постоянное подключение: {time_new:.1f} мкс/вызов")
+    print(f"Userx.get | ускорение: x{time_old / time_new:.2f}")
+
+
+# Старый вариант Itemx.add - отдельный INSERT на каждый товар
+def itemx_add_per_item(path: str, item_datas: list[str]):
+    with sqlite3.connect(path) as con:
+        for item_data in item_datas:
+            con.execute(
+                "INSERT INTO storage_item (user_id, category_id, position_id, item_id, item_unix, item_data) "
+                "VALUES (?, ?, ?, ?, ?, ?)",
+                [1, 1, 1, gen_id(), get_unix(), clear_html(item_data.strip())],
+            )
+
+
+def bench_itemx_add(path: str):
+    item_datas = [f"login{x}:password{x}" for x in range(ITEMS_COUNT)]
+
+    time_start = time.perf_counter()
+    itemx_add_per_item(path, item_datas)
+    speed_old = ITEMS_COUNT / (time.perf_counter() - time_start)
+
+    _, speed_new = Itemx.add_bulk(1, 1, 2, item_datas)
+
+    print(f"Itemx.add | INSERT на товар: {speed_old:.0f} шт/сек")
+    print(f"Itemx.add_bulk | executemany пачками: {speed_new:.0f} шт/сек")
+    print(f"Itemx.add | ускорение: x{speed_new / speed_old:.2f}")
+
+
+# Старый вариант покупки - выборка всех товаров позиции и удаление по одному на разных подключениях
+def buy_per_call(path: str, user_id: int, position_id: int, count: int) -> list[str]:
+    with sqlite3.connect(path, timeout=30) as con:
+        get_items = con.execute(
+            "SELECT item_id, item_data FROM storage_item WHERE position_id = ?", [position_id],
+        ).fetchall()
+
+    if len(get_items) < count:
+        return []
+
+    with sqlite3.connect(path, timeout=30) as con:
+        for item_id, _ in get_items[:count]:
+            con.execute("DELETE FROM storage_item WHERE item_id = ?", [item_id])
+
+    with sqlite3.connect(path, timeout=30) as con:
+        con.execute("UPDATE storage_users SET user_balance = user_balance - 1 WHERE user_id = ?", [user_id])
+
+    return [item_data for _, item_data in get_items[:count]]
+
+
+# Одновременные покупки BUYERS_COUNT покупателями (время, выданные товары)
+def run_buyers(buy_func) -> tuple[float, list[str]]:
+    save_items, save_lock = [], threading.Lock()
+
+    def buyer(user_id: int):
+        for _ in range(BUYS_COUNT):
+            get_items = buy_func(user_id)
+
+            with save_lock:
+                save_items.extend(get_items)
+
+    threads = [threading.Thread(target=buyer, args=(user_id,)) for user_id in range(1, BUYERS_COUNT + 1)]
+    time_start = time.perf_counter()
+
+    for thread in threads: thread.start()
+    for thread in threads: thread.join()
+
+    return time.perf_counter() - time_start, save_items
+
+
+def bench_purchases(path: str):
+    Categoryx.add(1, "bench")
+    buys_total = BUYERS_COUNT * BUYS_COUNT
+
+    for position_id in (10, 11):
+        Positionx.add(1, position_id, f"bench{position_id}", 1, "", "")
+        Itemx.add_bulk(1, 1, position_id, [f"key{position_id}-{x}" for x in range(buys_total)])
+
+    time_old, items_old = run_buyers(lambda user_id: buy_per_call(path, user_id, 10, 1))
+    time_new, items_new = run_buyers(
+        lambda user_id: [item_data for item_data in Purchasesx.buy(user_id, 11, 1)[2]],
+    )
+
+    print(f"Покупки | старый вариант: {buys_total / time_old:.0f} покупок/сек, "
+          f"выдано повторно: {len(items_old) - len(set(items_old))}")
+    print(f"Покупки | Purchasesx.buy: {buys_total / time_new:.0f} покупок/сек, "
+          f"выдано повторно: {len(items_new) - len(set(items_new))}")
+
+
+if __name__ == "__main__":
+    with tempfile.TemporaryDirectory() as temp_dir:
+        DB_POOL.path = os.path.join(temp_dir, "bench.db")
+
+        create_dbx()
+        fill_users(DB_POOL.path)
+
+        print("=" * 50)
+        bench_userx_get(DB_POOL.path)
+        print("=" * 50)
+        bench_itemx_add(DB_POOL.path)
+        print("=" * 50)
+        bench_purchases(DB_POOL.path)
+        print("=" * 50)
+
+        close_dbx()
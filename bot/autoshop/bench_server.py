@@ -0,0 +1,85 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Бенчмарк отправки событий на сервер Mini App через локальную заглушку (настоящий сервер не затрагивается)
+
+Запуск: python bench_server.py
+"""
+import asyncio
+import time
+
+from aiohttp import web
+
+from tgbot.services.api_server import ServerAPI
+
+STUB_HOST = "127.0.0.1"  # Адрес заглушки сервера
+STUB_PORT = 18780  # Порт заглушки сервера
+STUB_LATENCY = 0.02  # Задержка ответа заглушки в секундах (имитация сети и обработки)
+EVENTS_COUNT = 2_000  # Количество событий на каждый замер
+CONCURRENCY = [1, 10, 50, 100]  # Количество одновременно отправляемых событий для замера
+
+
+# Заглушка сервера: маршрут на одно событие
+def create_stub() -> web.Application:
+    received = {'requests': 0}
+
+    async def event_handler(request: web.Request) -> web.Response:
+        await request.json()
+        await asyncio.sleep(STUB_LATENCY)
+
+        received['requests'] += 1
+
+        return web.json_response({'success': True})
+
+    app = web.Application()
+    app['received'] = received
+    app.router.add_post("/api/transactions/{user_id}", event_handler)
+
+    return app
+
+
+# Отправка EVENTS_COUNT событий, не больше concurrency одновременно (событий в секунду, запросов к заглушке)
+async def measure(concurrency: int) -> tuple[float, int]:
+    app = create_stub()
+    runner = web.AppRunner(app)
+    await runner.setup()
+    await web.TCPSite(runner, STUB_HOST, STUB_PORT).start()
+
+    api = ServerAPI(f"http://{STUB_HOST}:{STUB_PORT}", "bench")
+    semaphore = asyncio.Semaphore(concurrency)
+
+    async def send_event(x: int) -> tuple[int, dict]:
+        async with semaphore:
+            return await api.send(
+                "transactions",
+                f"/api/transactions/{x}",
+                {"type": "deposit", "amount": 100.0, "source": "bench", "description": "bench"},
+                f"transaction:bench:{x}",
+            )
+
+    try:
+        time_start = time.perf_counter()
+
+        get_responses = await asyncio.gather(*[send_event(x) for x in range(EVENTS_COUNT)])
+
+        time_total = time.perf_counter() - time_start
+    finally:
+        await api.close()
+        await runner.cleanup()
+
+    assert all(status == 200 for status, _ in get_responses)
+    assert app['received']['requests'] == EVENTS_COUNT
+
+    return EVENTS_COUNT / time_total, app['received']['requests']
+
+
+async def main():
+    for concurrency in CONCURRENCY:
+        speed, requests = await measure(concurrency)
+        print(f"Одновременно {concurrency}: {speed:.0f} событий/сек, запросов: {requests}")
+
+
+if __name__ == "__main__":
+    print("=" * 50)
+    asyncio.run(main())
+    print("=" * 50)
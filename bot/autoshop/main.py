@@ -1,17 +1,25 @@
 # - *- coding: utf-8 - *-
 import asyncio
 import os
+import signal
 import sys
 
 import colorama
 from aiogram import Dispatcher, Bot
 from aiogram.client.default import DefaultBotProperties
 
-from tgbot.data.config import get_admins, BOT_TOKEN, BOT_SCHEDULER
-from tgbot.database.db_helper import create_dbx
+from tgbot.data.config import get_admins, BOT_TOKEN, BOT_SCHEDULER, BOT_ADMINS, BILL_POLL_INTERVAL
+from tgbot.database.db_helper import close_dbx
+from tgbot.database.db_migrations import create_dbx
 from tgbot.middlewares import register_all_middlwares
 from tgbot.routers import register_all_routers
+from tgbot.services.api_payments import PAYMENT_CLIENTS
+from tgbot.services.api_server import SERVER_API
 from tgbot.services.api_session import AsyncRequestSession
+from tgbot.services.mail_jobs import mail_resume_all, mail_stop_all, mail_prune
+from tgbot.services.outbox import OUTBOX
+from tgbot.services.refill_service import check_bills
+from tgbot.services.web_server import WEB_SERVER
 from tgbot.utils.misc.bot_commands import set_commands
 from tgbot.utils.misc.bot_logging import bot_logger
 from tgbot.utils.misc.bot_models import ARS
@@ -28,6 +36,8 @@ async def scheduler_start(bot: Bot, arSession: ARS):
     BOT_SCHEDULER.add_job(update_profit_week, trigger="cron", day_of_week="mon", hour=0, minute=0, second=10)
     BOT_SCHEDULER.add_job(update_profit_day, trigger="cron", hour=0, minute=0, second=15, args=(bot,))
     BOT_SCHEDULER.add_job(autobackup_admin, trigger="cron", hour=0, args=(bot,))
+    BOT_SCHEDULER.add_job(check_bills, trigger="interval", seconds=BILL_POLL_INTERVAL, args=(bot, arSession,))
+    BOT_SCHEDULER.add_job(mail_prune, trigger="cron", hour=0, minute=30)
     # ОТКЛЮЧЕНО: Реклама от автора бота (TON play spam)
     # BOT_SCHEDULER.add_job(check_update, trigger="cron", hour=0, args=(bot, arSession,))
     # BOT_SCHEDULER.add_job(check_mail, trigger="cron", hour=12, args=(bot, arSession,))
@@ -45,6 +55,10 @@ async def main():
         default=DefaultBotProperties(parse_mode="HTML")
     )
 
+    # Перечитывание администраторов из settings.ini по SIGHUP
+    if hasattr(signal, "SIGHUP"):
+        asyncio.get_running_loop().add_signal_handler(signal.SIGHUP, BOT_ADMINS.reload)
+
     register_all_middlwares(dp)  # Регистрация всех мидлварей
     register_all_routers(dp)  # Регистрация всех роутеров
 
@@ -57,6 +71,9 @@ async def main():
         # await check_mail(bot, arSession)  # Оповещение обновлений
         await startup_notify(bot, arSession)  # Рассылка при запуске бота
         await scheduler_start(bot, arSession)  # Подключение шедулеров
+        await mail_resume_all(bot)  # Продолжение незавершённых рассылок
+        OUTBOX.start(bot)  # Отправка событий для сервера Mini App
+        await WEB_SERVER.start(bot, arSession)  # Уведомления от сервера Mini App и платёжек
 
         bot_logger.warning("BOT WAS STARTED")
         print(colorama.Fore.LIGHTYELLOW_EX + f"~~~~~ Bot was started - @{(await bot.get_me()).username} ~~~~~")
@@ -75,9 +92,16 @@ async def main():
             arSession=arSession,
         )
     finally:
+        await mail_stop_all()
+        await OUTBOX.stop()
+        await WEB_SERVER.stop()
         await arSession.close()
+        await SERVER_API.close()
+        await PAYMENT_CLIENTS.close()
         await bot.session.close()
 
+        close_dbx()
+
 
 if __name__ == "__main__":
     create_dbx()  # Генерация БД и таблиц
@@ -0,0 +1,43 @@
+# - *- coding: utf- 8 - *-
+import os
+import sys
+
+import pytest
+
+# Тесты запускаются из папки бота (config читает settings.ini по относительному пути)
+BOT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+os.chdir(BOT_DIR)
+sys.path.insert(0, BOT_DIR)
+
+from tgbot.data import config  # noqa: E402
+
+# Логи тестов не перезаписывают tgbot/data/logs.log (bot_logging открывает файл на запись при импорте)
+config.PATH_LOGS = os.path.join(os.environ.get("TMPDIR", "/tmp"), "autoshop_tests.log")
+
+from tgbot.database.db_helper import DB_POOL, DB_SNAPSHOTS  # noqa: E402
+from tgbot.database.db_migrations import create_dbx  # noqa: E402
+
+
+# Пустая временная БД вместо tgbot/data/database.db
+@pytest.fixture
+def empty_db(tmp_path):
+    path_before = DB_POOL.path
+
+    DB_POOL.close()
+    DB_SNAPSHOTS.invalidate()
+    DB_POOL.path = str(tmp_path / "database.db")
+
+    yield DB_POOL.path
+
+    DB_POOL.close()
+    DB_SNAPSHOTS.invalidate()
+    DB_POOL.path = path_before
+
+
+# Временная БД со всеми миграциями
+@pytest.fixture
+def temp_db(empty_db):
+    create_dbx()
+
+    return empty_db
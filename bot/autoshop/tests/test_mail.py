@@ -0,0 +1,59 @@
+# - *- coding: utf- 8 - *-
+import pytest
+
+from tgbot.database.db_helper import connect_dbx
+from tgbot.database.db_mail import Mailx
+from tgbot.utils.const_functions import ded
+
+
+# Временная БД с пятью активными юзерами
+@pytest.fixture
+def mail_db(temp_db):
+    with connect_dbx() as con:
+        con.executemany(
+            ded(f"""
+                INSERT INTO storage_users (user_id, user_login, user_name, user_balance, user_refill, user_give, user_unix)
+                VALUES (?, '', '', 0, 0, 0, 0)
+            """),
+            [(user_id,) for user_id in range(1, 6)],
+        )
+
+    return temp_db
+
+
+# Повторно сохранённая пачка (перезапуск до сдвига курсора) не увеличивает счётчики
+def test_mail_results_counted_once(mail_db):
+    mail_id = Mailx.add(admin_id=1, mail_text="text")
+
+    Mailx.add_results(mail_id, [(1, "sent"), (2, "blocked")], 2)
+    Mailx.add_results(mail_id, [(1, "sent"), (2, "blocked"), (3, "sent")], 3)
+
+    get_mail = Mailx.get(mail_id=mail_id)
+
+    assert (get_mail.mail_sent, get_mail.mail_failed, get_mail.mail_cursor) == (2, 1, 3)
+    assert Mailx.get_statuses(mail_id) == {'sent': 2, 'blocked': 1}
+
+
+# Удаляются только получатели старых завершённых и отменённых рассылок
+def test_mail_prune(mail_db):
+    get_mails = {}
+
+    for mail_status in ["done", "cancelled", "paused", "active"]:
+        mail_id = Mailx.add(admin_id=1, mail_text=mail_status)
+        Mailx.add_results(mail_id, [(1, "sent"), (2, "sent")], 2)
+        Mailx.update(mail_id, mail_status=mail_status, mail_unix=100)
+
+        get_mails[mail_status] = mail_id
+
+    fresh_id = Mailx.add(admin_id=1, mail_text="fresh")
+    Mailx.add_results(fresh_id, [(1, "sent")], 1)
+    Mailx.update(fresh_id, mail_status="done", mail_unix=300)
+
+    assert Mailx.prune(200) == 4
+
+    assert Mailx.get_statuses(get_mails['done']) == {}
+    assert Mailx.get_statuses(get_mails['cancelled']) == {}
+    assert Mailx.get_statuses(get_mails['paused']) == {'sent': 2}
+    assert Mailx.get_statuses(get_mails['active']) == {'sent': 2}
+    assert Mailx.get_statuses(fresh_id) == {'sent': 1}
+    assert Mailx.get(mail_id=get_mails['done']).mail_sent == 2
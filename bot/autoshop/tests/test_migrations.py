@@ -0,0 +1,92 @@
+# - *- coding: utf- 8 - *-
+import pytest
+
+from tgbot.database import db_migrations
+from tgbot.database.db_helper import connect_dbx
+from tgbot.database.db_migrations import MIGRATIONS, create_dbx, migrate_dbx, migrate_stats, get_version
+from tgbot.database.db_stats import Statsx
+from tgbot.utils.const_functions import ded
+
+
+# Статистика по часам целиком
+def get_stats() -> dict:
+    with connect_dbx() as con:
+        response = con.execute(
+            "SELECT stat_metric, stat_hour, stat_count, stat_amount FROM storage_stats WHERE stat_count != 0"
+        ).fetchall()
+
+        return {(row['stat_metric'], row['stat_hour']): (row['stat_count'], round(row['stat_amount'], 2)) for row in response}
+
+
+# Прерванная пересборка статистики продолжается с последней пачки и не считает строки дважды
+def test_stats_batches_resume(temp_db, monkeypatch):
+    with connect_dbx() as con:
+        con.executemany(
+            ded(f"""
+                INSERT INTO storage_refill (user_id, refill_comment, refill_amount, refill_receipt, refill_method, refill_unix)
+                VALUES (1, '', ?, ?, 'QIWI', ?)
+            """),
+            [(100 + number, f"r{number}", number * 1800) for number in range(11)],
+        )
+
+    get_expected = get_stats()
+
+    fill_stats_rows = db_migrations.fill_stats_rows
+    fill_calls = []
+
+    # Третья пачка падает, как при остановке бота посреди миграции
+    def fill_stats_broken(con, stat_metric, rowid_from, rowid_to):
+        fill_calls.append((stat_metric, rowid_from, rowid_to))
+
+        if len(fill_calls) == 3:
+            raise RuntimeError("interrupted")
+
+        fill_stats_rows(con, stat_metric, rowid_from, rowid_to)
+
+    monkeypatch.setattr(db_migrations, "DB_MIGRATION_BATCH", 4)
+    monkeypatch.setattr(db_migrations, "fill_stats_rows", fill_stats_broken)
+
+    with connect_dbx() as con:
+        with pytest.raises(RuntimeError):
+            migrate_stats(con, "test_stats")
+
+        migrate_stats(con, "test_stats")
+
+    assert [call[1:] for call in fill_calls if call[0] == "refill"] == [(0, 4), (4, 8), (8, 11), (8, 11)]
+    assert get_stats() == get_expected
+
+    Statsx.rebuild()
+
+    assert get_stats() == get_expected
+
+
+# Дубли юзеров из старой БД сливаются в одну запись перед созданием уникального индекса
+def test_duplicate_users_merged(empty_db, monkeypatch):
+    monkeypatch.setattr(db_migrations, "MIGRATIONS", [item for item in MIGRATIONS if item[0] <= 3])
+
+    with connect_dbx() as con:
+        migrate_dbx(con)
+
+        con.executemany(
+            ded(f"""
+                INSERT INTO storage_users (user_id, user_login, user_name, user_balance, user_refill, user_give, user_unix, user_referrer)
+                VALUES (?, '', '', ?, ?, 0, 0, ?)
+            """),
+            [(1, 10, 100, None), (2, 5, 0, None), (1, 15.5, 50, "code"), (1, 0, 0, "other")],
+        )
+
+    monkeypatch.setattr(db_migrations, "MIGRATIONS", MIGRATIONS)
+    create_dbx()
+
+    with connect_dbx() as con:
+        get_users = con.execute("SELECT * FROM storage_users ORDER BY user_id").fetchall()
+        get_indexes = [row['name'] for row in con.execute("PRAGMA index_list(storage_users)").fetchall()]
+
+        assert get_version(con) == max(version for version, *_ in MIGRATIONS)
+
+    assert [(user['user_id'], user['user_balance'], user['user_refill'], user['user_referrer']) for user in get_users] == [
+        (1, 25.5, 150, "code"),
+        (2, 5, 0, None),
+    ]
+    assert "idx_users_user_id" in get_indexes
+    assert "idx_users_user_id_merge" not in get_indexes
@@ -0,0 +1,28 @@
+# - *- coding: utf- 8 - *-
+from tgbot.database.db_helper import explain_dbx, connect_dbx, trace_dbx
+from tgbot.database.db_migrations import DB_LOOKUPS, MIGRATIONS, get_version
+from tgbot.database.db_users import Userx
+
+
+# После всех миграций ни один запрос аксессоров из DB_LOOKUPS не сканирует таблицу целиком
+def test_lookup_queries_use_indexes(temp_db):
+    assert explain_dbx(DB_LOOKUPS) == []
+
+
+# Проверяется SQL, который отправил аксессор, а не написанный вручную запрос
+def test_explain_uses_traced_sql(temp_db):
+    assert trace_dbx(Userx.get, user_id=7) == ["SELECT * FROM storage_users WHERE user_id = 7"]
+
+
+# Полное сканирование в запросе аксессора находится
+def test_explain_finds_table_scan(temp_db):
+    get_scans = explain_dbx([(Userx.get, {'user_balance': 0})])
+
+    assert len(get_scans) == 1
+    assert get_scans[0].startswith("SELECT * FROM storage_users WHERE user_balance = 0 -> SCAN")
+
+
+# Миграции доводят схему до последней версии
+def test_migrations_reach_latest_version(temp_db):
+    with connect_dbx() as con:
+        assert get_version(con) == max(version for version, *_ in MIGRATIONS)
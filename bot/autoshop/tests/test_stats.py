@@ -0,0 +1,48 @@
+# - *- coding: utf- 8 - *-
+from tgbot.database.db_helper import connect_dbx
+from tgbot.database.db_stats import Statsx
+from tgbot.utils.const_functions import ded
+
+
+# Статистика по часам целиком
+def get_stats() -> dict:
+    with connect_dbx() as con:
+        response = con.execute(
+            "SELECT stat_metric, stat_hour, stat_count, stat_amount FROM storage_stats WHERE stat_count != 0"
+        ).fetchall()
+
+        return {(row['stat_metric'], row['stat_hour']): (row['stat_count'], round(row['stat_amount'], 2)) for row in response}
+
+
+# Изменение и удаление покупок и пополнений не расходится с пересборкой статистики из истории
+def test_stats_follow_updates(temp_db):
+    with connect_dbx() as con:
+        con.executemany(
+            ded(f"""
+                INSERT INTO storage_purchases (
+                    user_id, user_balance_before, user_balance_after, purchase_receipt, purchase_data,
+                    purchase_count, purchase_price, purchase_price_one, purchase_position_id,
+                    purchase_position_name, purchase_category_id, purchase_category_name, purchase_unix
+                ) VALUES (1, 0, 0, ?, '', ?, ?, 0, 1, '', 1, '', ?)
+            """),
+            [(1, 2, 100, 3600), (2, 1, 50, 7200)],
+        )
+        con.executemany(
+            ded(f"""
+                INSERT INTO storage_refill (user_id, refill_comment, refill_amount, refill_receipt, refill_method, refill_unix)
+                VALUES (1, '', ?, ?, 'QIWI', ?)
+            """),
+            [(300, "r1", 3600), (400, "r2", 10800)],
+        )
+
+        con.execute("UPDATE storage_purchases SET purchase_price = 80, purchase_count = 3 WHERE purchase_receipt = '1'")
+        con.execute("UPDATE storage_purchases SET purchase_unix = 14400 WHERE purchase_receipt = '2'")
+        con.execute("UPDATE storage_refill SET refill_amount = 350, refill_unix = 18000 WHERE refill_receipt = 'r1'")
+        con.execute("DELETE FROM storage_refill WHERE refill_receipt = 'r2'")
+
+    get_live = get_stats()
+    Statsx.rebuild()
+
+    assert get_live == get_stats()
+    assert Statsx.get_total("purchase") == (4, 130.0)
+    assert Statsx.get_total("refill") == (1, 350.0)
@@ -0,0 +1,220 @@
+# - *- coding: utf- 8 - *-
+import asyncio
+
+import pytest
+from aiohttp import web
+from aiohttp.test_utils import TestClient, TestServer
+
+from tgbot.database.db_bills import Billx
+from tgbot.database.db_helper import connect_dbx
+from tgbot.database.db_refill import Refillx
+from tgbot.database.db_users import Userx
+from tgbot.services import web_server
+from tgbot.services.api_cactuspay import CactusPayAPI
+from tgbot.services.api_payments import PAYMENT_CLIENTS
+from tgbot.services.web_server import BotWebServer, BOT_KEY, SESSION_KEY, get_yoomoney_hash
+from tgbot.utils.const_functions import ded
+
+USER_ID = 1001
+YOOMONEY_SECRET = "test-secret"
+
+STATUS_KEY = web.AppKey("status", str)  # Статус счёта, который отдаёт заглушка CactusPay
+REQUESTS_KEY = web.AppKey("requests", list)  # Методы API, запрошенные у заглушки CactusPay
+
+
+# Бот без запросов к телеграму (запоминает отправленные сообщения)
+class FakeBot:
+    def __init__(self):
+        self.messages = []
+
+    async def send_message(self, chat_id, text, *args, **kwargs):
+        self.messages.append((chat_id, text))
+
+    async def edit_message_text(self, text, *args, **kwargs):
+        self.messages.append((kwargs.get('chat_id'), text))
+
+
+# Юзер с нулевым балансом во временной БД
+@pytest.fixture
+def user_db(temp_db):
+    with connect_dbx() as con:
+        con.execute(
+            ded(f"""
+                INSERT INTO storage_users (user_id, user_login, user_name, user_balance, user_refill, user_give, user_unix)
+                VALUES (?, 'user', 'User', 0, 0, 0, 0)
+            """),
+            [USER_ID],
+        )
+
+    return temp_db
+
+
+# Запуск сценария с HTTP сервером бота (и заглушкой платёжки, если передана)
+def run_with_client(scenario, provider: web.Application = None):
+    async def runner():
+        bot = FakeBot()
+
+        bot_server = BotWebServer()
+        bot_server.app[BOT_KEY] = bot
+        bot_server.app[SESSION_KEY] = None
+
+        provider_server = TestServer(provider) if provider is not None else None
+
+        if provider_server is not None:
+            await provider_server.start_server()
+
+        try:
+            async with TestClient(TestServer(bot_server.app)) as client:
+                return await scenario(client, bot, provider_server)
+        finally:
+            await PAYMENT_CLIENTS.close()
+
+            if provider_server is not None:
+                await provider_server.close()
+
+    return asyncio.run(runner())
+
+
+# Поля уведомления ЮMoney с подписью
+def get_yoomoney_notify(label: str, amount: str = "100.00", secret: str = YOOMONEY_SECRET) -> dict:
+    data = {
+        'notification_type': "p2p-incoming",
+        'operation_id': "op-1",
+        'amount': amount,
+        'currency': "643",
+        'datetime': "2026-01-01T00:00:00Z",
+        'sender': "41001000000000",
+        'codepro': "false",
+        'label': label,
+    }
+    data['sha1_hash'] = get_yoomoney_hash(data, secret)
+
+    return data
+
+
+# Уведомление ЮMoney с неверной подписью отклоняется и не зачисляется
+def test_yoomoney_bad_signature_rejected(user_db, monkeypatch):
+    monkeypatch.setattr(web_server, "YOOMONEY_NOTIFY_SECRET", YOOMONEY_SECRET)
+    Billx.add("ym-1", USER_ID, "Yoomoney", 100)
+
+    async def scenario(client, bot, provider_server):
+        response = await client.post("/webhook/yoomoney", data=get_yoomoney_notify("ym-1", secret="wrong"))
+        return response.status
+
+    assert run_with_client(scenario) == 403
+    assert Refillx.get(refill_receipt="ym-1") is None
+    assert Userx.get(user_id=USER_ID).user_balance == 0
+
+
+# Верное уведомление ЮMoney зачисляется один раз, повтор того же уведомления не зачисляется
+def test_yoomoney_notify_credits_once(user_db, monkeypatch):
+    monkeypatch.setattr(web_server, "YOOMONEY_NOTIFY_SECRET", YOOMONEY_SECRET)
+    Billx.add("ym-2", USER_ID, "Yoomoney", 100)
+
+    async def scenario(client, bot, provider_server):
+        get_statuses = []
+
+        for _ in range(3):
+            response = await client.post("/webhook/yoomoney", data=get_yoomoney_notify("ym-2"))
+            get_statuses.append(response.status)
+
+        return get_statuses, bot.messages
+
+    get_statuses, get_messages = run_with_client(scenario)
+
+    assert get_statuses == [200, 200, 200]
+    assert len(Refillx.gets(refill_receipt="ym-2")) == 1
+    assert Userx.get(user_id=USER_ID).user_balance == 100
+    assert Billx.get(bill_receipt="ym-2").bill_status == "paid"
+    assert len([text for chat_id, text in get_messages if chat_id == USER_ID]) == 1
+
+
+# Заглушка API CactusPay
+def get_cactuspay_provider(pay_status: str) -> web.Application:
+    async def api_handler(request: web.Request) -> web.Response:
+        request.app[REQUESTS_KEY].append(request.query.get('method'))
+        data = await request.json()
+
+        return web.json_response({
+            'response': {'order_id': data['order_id'], 'status': request.app[STATUS_KEY], 'amount': "250", 'bank': "sbp"},
+        })
+
+    app = web.Application()
+    app[STATUS_KEY] = pay_status
+    app[REQUESTS_KEY] = []
+    app.router.add_post("/api/", api_handler)
+
+    return app
+
+
+# Уведомление CactusPay зачисляется только после подтверждения оплаты через API, повтор не зачисляется
+def test_cactuspay_notify_credits_once(user_db, monkeypatch):
+    Billx.add("cp-1", USER_ID, "CactusPay", 250)
+    provider = get_cactuspay_provider("ACCEPT")
+
+    async def scenario(client, bot, provider_server):
+        monkeypatch.setattr(CactusPayAPI, "api_url", str(provider_server.make_url("/api/")))
+
+        get_statuses = await asyncio.gather(*[
+            client.post("/webhook/cactuspay", json={'order_id': "cp-1"}) for _ in range(3)
+        ])
+
+        return [response.status for response in get_statuses]
+
+    assert run_with_client(scenario, provider) == [200, 200, 200]
+    assert len(Refillx.gets(refill_receipt="cp-1")) == 1
+    assert Userx.get(user_id=USER_ID).user_balance == 250
+    assert Billx.get(bill_receipt="cp-1").bill_status == "paid"
+    assert set(provider[REQUESTS_KEY]) == {"get"}
+
+
+# Поддельное уведомление CactusPay по неоплаченному счёту не зачисляется
+def test_cactuspay_unpaid_bill_not_credited(user_db, monkeypatch):
+    Billx.add("cp-2", USER_ID, "CactusPay", 250)
+    provider = get_cactuspay_provider("WAIT")
+
+    async def scenario(client, bot, provider_server):
+        monkeypatch.setattr(CactusPayAPI, "api_url", str(provider_server.make_url("/api/")))
+
+        response = await client.post("/webhook/cactuspay", json={'order_id': "cp-2", 'status': "ACCEPT"})
+        return response.status
+
+    assert run_with_client(scenario, provider) == 200
+    assert Refillx.get(refill_receipt="cp-2") is None
+    assert Userx.get(user_id=USER_ID).user_balance == 0
+    assert Billx.get(bill_receipt="cp-2").bill_status == "pending"
+
+
+# Оплата по истёкшему счёту всё равно проверяется через API и зачисляется
+def test_cactuspay_expired_bill_credited(user_db, monkeypatch):
+    Billx.add("cp-3", USER_ID, "CactusPay", 250)
+    Billx.update("cp-3", bill_status="expired")
+    provider = get_cactuspay_provider("ACCEPT")
+
+    async def scenario(client, bot, provider_server):
+        monkeypatch.setattr(CactusPayAPI, "api_url", str(provider_server.make_url("/api/")))
+
+        response = await client.post("/webhook/cactuspay", json={'order_id': "cp-3"})
+        return response.status
+
+    assert run_with_client(scenario, provider) == 200
+    assert len(Refillx.gets(refill_receipt="cp-3")) == 1
+    assert Userx.get(user_id=USER_ID).user_balance == 250
+    assert Billx.get(bill_receipt="cp-3").bill_status == "paid"
+
+
+# Уведомление CactusPay с битым телом или без order_id отклоняется
+def test_cactuspay_bad_body_rejected(user_db):
+    async def scenario(client, bot, provider_server):
+        get_statuses = []
+
+        for body in ["{not json", "[1, 2]", "null", "{}"]:
+            response = await client.post("/webhook/cactuspay", data=body, headers={'Content-Type': "application/json"})
+            get_statuses.append(response.status)
+
+        response = await client.post("/webhook/cactuspay", data={'status': "ACCEPT"})
+        get_statuses.append(response.status)
+
+        return get_statuses
+
+    assert run_with_client(scenario) == [400, 400, 400, 400, 400]
@@ -1,5 +1,8 @@
 # - *- coding: utf- 8 - *-
 import configparser
+import os
+import threading
+import time
 
 from apscheduler.schedulers.asyncio import AsyncIOScheduler
 
@@ -16,38 +19,116 @@ BOT_VERSION = 4.0  # Версия бота
 PATH_DATABASE = "tgbot/data/database.db"  # Путь к БД
 PATH_LOGS = "tgbot/data/logs.log"  # Путь к Логам
 
+# Миграции БД
+DB_MIGRATION_BATCH = 5_000  # Количество строк в одной транзакции пачечной миграции
+
+# Загрузка товаров файлом
+ITEMS_FILE_TYPES = ("txt", "csv")  # Поддерживаемые расширения файлов
+ITEMS_FILE_CHUNK = 5_000  # Количество товаров в одной пачке записи в БД
+ITEMS_FILE_PROGRESS = 10_000  # Обновление сообщения с прогрессом каждые N товаров
+
+# Рассылка (лимит Bot API - около 30 сообщений в секунду в разные чаты)
+MAIL_RATE = 25  # Количество отправок в секунду
+MAIL_WORKERS = 20  # Количество одновременных отправителей
+MAIL_RETRIES = 5  # Количество повторов при TelegramRetryAfter и ошибках сервера
+MAIL_PROGRESS = 5  # Обновление сообщения с прогрессом каждые N секунд
+MAIL_PAGE = 1_000  # Количество получателей, выбираемых из БД за один запрос
+MAIL_FLUSH = 100  # Сохранение статусов получателей в БД каждые N отправок
+MAIL_KEEP = 604_800  # Сколько секунд хранить статусы получателей завершённой или отменённой рассылки
+
 # API сервера - NEW UNIFIED SERVER
 # По умолчанию используем локальный сервер на продакшен хосте
-import os
 SERVER_API_URL = os.getenv('SERVER_URL', 'http://77.239.125.70:3000')  # URL нового унифицированного сервера
 PARTNER_API_SECRET = os.getenv('PARTNER_API_SECRET', 'da856eb8e85ad0e4df2e0aa22906f45ebb8cecf60638b76074fa968b2649b5f3')  # Секретный ключ для webhook
+SERVER_API_LIMIT = 50  # Максимум одновременных подключений к серверу
+SERVER_API_TIMEOUTS = {  # Таймауты запросов к серверу по эндпоинтам (в секундах)
+    'balance': 3,
+    'transactions': 5,
+    'referral': 10,
+}
+SERVER_API_TIMEOUT = 5  # Таймаут эндпоинтов, которых нет в SERVER_API_TIMEOUTS
+SERVER_BREAKER_FAILURES = 5  # После N ошибок подряд запросы к серверу не отправляются (сразу используются локальные данные)
+SERVER_BREAKER_TIMEOUT = 30  # Через сколько секунд отправить пробный запрос после отключения
+BALANCE_CACHE_TTL = 30  # Сколько секунд хранить баланс с сервера Mini App в памяти
+BALANCE_CACHE_SIZE = 50_000  # Максимум балансов в кэше
+BOT_WEB_HOST = os.getenv('BOT_WEB_HOST', '0.0.0.0')  # Адрес HTTP сервера бота
+BOT_WEB_PORT = int(os.getenv('BOT_WEB_PORT', 0))  # Порт HTTP сервера бота для уведомлений от сервера Mini App и платёжек (0 - выключен)
+YOOMONEY_NOTIFY_SECRET = os.getenv('YOOMONEY_NOTIFY_SECRET', '')  # Секрет HTTP-уведомлений ЮMoney (пустой - уведомления не принимаются)
+PAYMENT_TIMEOUTS = {  # Таймауты запросов к платёжкам (в секундах)
+    'QIWI': 10,
+    'Yoomoney': 10,
+    'CactusPay': 15,
+}
+PAYMENT_RETRIES = 2  # Повторы запросов к платёжкам при сетевых ошибках, таймаутах и ответах 5xx
+BILL_POLL_INTERVAL = 15  # Проверка неоплаченных счетов у платёжек каждые N секунд
+BILL_POLL_BATCH = 20  # Количество счетов, проверяемых за один проход
+BILL_POLL_MAX = 600  # Максимальная пауза между проверками одного счёта в секундах
+BILL_EXPIRE = 10_800  # Через сколько секунд неоплаченный счёт перестаёт проверяться в фоне
+OUTBOX_INTERVAL = 2  # Проверка очереди событий для сервера каждые N секунд
+OUTBOX_BATCH = 50  # Количество событий, отправляемых за один проход
+OUTBOX_ATTEMPTS = 12  # После N неудачных попыток событие уходит в dead (отложенные)
+OUTBOX_BACKOFF_MAX = 3600  # Максимальная пауза между попытками в секундах
 print(f"📡 Используется SERVER_URL: {SERVER_API_URL}")
 print(f"🔑 PARTNER_API_SECRET установлен: {'✅' if PARTNER_API_SECRET else '❌'}")
 
 
-# Получение администраторов бота
-def get_admins() -> list[int]:
-    read_admins = configparser.ConfigParser()
-    read_admins.read("settings.ini")
+# Администраторы бота из settings.ini (перечитываются при изменении файла или по SIGHUP)
+class AdminsConfig:
+    def __init__(self, path: str, check_interval: float = 1.0):
+        self.path = path
+        self.check_interval = check_interval  # Как часто (в секундах) проверять mtime файла
+
+        self.admins: frozenset[int] = frozenset()
+
+        self._lock = threading.Lock()
+        self._mtime = None
+        self._checked = 0.0
+
+        self.reload()
 
-    admins = read_admins['settings']['admin_id'].strip().replace(" ", "")
+    # Перечитывание администраторов из файла
+    def reload(self):
+        with self._lock:
+            try:
+                file_mtime = os.stat(self.path).st_mtime_ns
+            except OSError:
+                file_mtime = None
 
-    if "," in admins:
-        admins = admins.split(",")
-    else:
-        if len(admins) >= 1:
-            admins = [admins]
-        else:
-            admins = []
+            read_admins = configparser.ConfigParser()
+            read_admins.read(self.path)
 
-    while "" in admins: admins.remove("")
-    while " " in admins: admins.remove(" ")
-    while "\r" in admins: admins.remove("\r")
-    while "\n" in admins: admins.remove("\n")
+            admins = read_admins['settings']['admin_id'].strip().replace(" ", "").split(",")
+            admins = [admin.strip() for admin in admins]
 
-    admins = list(map(int, admins))
+            self.admins = frozenset(int(admin) for admin in admins if admin != "")
+            self._mtime = file_mtime
+            self._checked = time.monotonic()
 
-    return admins
+    # Получение администраторов с проверкой изменения файла
+    def get(self) -> frozenset[int]:
+        if time.monotonic() - self._checked >= self.check_interval:
+            self._checked = time.monotonic()
+
+            try:
+                file_mtime = os.stat(self.path).st_mtime_ns
+            except OSError:
+                file_mtime = None
+
+            if file_mtime != self._mtime:
+                try:
+                    self.reload()
+                except (KeyError, ValueError, configparser.Error) as ex:
+                    print(f"myError reload admins: {ex}")
+
+        return self.admins
+
+
+BOT_ADMINS = AdminsConfig("settings.ini")
+
+
+# Получение администраторов бота
+def get_admins() -> frozenset[int]:
+    return BOT_ADMINS.get()
 
 
 # Получение описания
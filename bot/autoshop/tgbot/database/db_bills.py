@@ -0,0 +1,114 @@
+# - *- coding: utf- 8 - *-
+from typing import Optional
+
+from pydantic import BaseModel
+
+from tgbot.database.db_helper import AsyncDbx, connect_dbx, update_format_where, update_format
+from tgbot.utils.const_functions import get_unix, ded
+
+
+# Модель таблицы
+class BillModel(BaseModel):
+    bill_receipt: str
+    user_id: int
+    bill_way: str  # QIWI, Yoomoney или CactusPay
+    bill_amount: float
+    bill_status: str  # pending - ожидает оплаты, paid - зачислен, cancelled - отменён, expired - истёк
+    bill_message_id: Optional[int] = None
+    bill_unix: int
+    bill_checks: int = 0  # Сколько раз счёт проверялся в фоне
+    bill_next_unix: int = 0  # Время следующей фоновой проверки
+
+
+# Работа с выставленными счетами
+class Billx(AsyncDbx):
+    storage_name = "storage_bills"
+
+    # Добавление записи
+    @staticmethod
+    def add(bill_receipt: str, user_id: int, bill_way: str, bill_amount: float, bill_message_id: int = None):
+        with connect_dbx() as con:
+            con.execute(
+                ded(f"""
+                    INSERT OR IGNORE INTO {Billx.storage_name} (
+                        bill_receipt,
+                        user_id,
+                        bill_way,
+                        bill_amount,
+                        bill_message_id,
+                        bill_unix
+                    ) VALUES (?, ?, ?, ?, ?, ?)
+                """),
+                [
+                    str(bill_receipt),
+                    user_id,
+                    bill_way,
+                    bill_amount,
+                    bill_message_id,
+                    get_unix(),
+                ],
+            )
+
+    # Получение записи
+    @staticmethod
+    def get(**kwargs) -> BillModel:
+        with connect_dbx() as con:
+            sql = f"SELECT * FROM {Billx.storage_name}"
+            sql, parameters = update_format_where(sql, kwargs)
+
+            response = con.execute(sql, parameters).fetchone()
+
+            if response is not None:
+                response = BillModel(**response)
+
+            return response
+
+    # Редактирование записи
+    @staticmethod
+    def update(bill_receipt, **kwargs):
+        with connect_dbx() as con:
+            sql = f"UPDATE {Billx.storage_name} SET"
+            sql, parameters = update_format(sql, kwargs)
+            parameters.append(str(bill_receipt))
+
+            con.execute(sql + "WHERE bill_receipt = ?", parameters)
+
+    # Неоплаченные счета, которые пора проверить
+    @staticmethod
+    def gets_due(limit: int) -> list[BillModel]:
+        with connect_dbx() as con:
+            response = con.execute(
+                ded(f"""
+                    SELECT * FROM {Billx.storage_name}
+                    WHERE bill_status = 'pending' AND bill_next_unix <= ?
+                    ORDER BY bill_next_unix
+                    LIMIT ?
+                """),
+                [get_unix(), limit],
+            ).fetchall()
+
+            return [BillModel(**cache_object) for cache_object in response]
+
+    # Перенос следующей проверки счёта
+    @staticmethod
+    def postpone(bill_receipt, bill_delay: int):
+        with connect_dbx() as con:
+            con.execute(
+                ded(f"""
+                    UPDATE {Billx.storage_name}
+                    SET bill_checks = bill_checks + 1, bill_next_unix = ?
+                    WHERE bill_receipt = ?
+                """),
+                [get_unix() + bill_delay, str(bill_receipt)],
+            )
+
+    # Истечение неоплаченных счетов, созданных раньше указанного времени
+    @staticmethod
+    def expire(before_unix: int) -> int:
+        with connect_dbx() as con:
+            response = con.execute(
+                f"UPDATE {Billx.storage_name} SET bill_status = 'expired' WHERE bill_status = 'pending' AND bill_unix < ?",
+                [before_unix],
+            )
+
+            return response.rowcount
@@ -1,10 +1,7 @@
 # - *- coding: utf- 8 - *-
-import sqlite3
-
 from pydantic import BaseModel
 
-from tgbot.data.config import PATH_DATABASE
-from tgbot.database.db_helper import dict_factory, update_format_where, update_format
+from tgbot.database.db_helper import AsyncDbx, connect_dbx, update_format_where, update_format
 from tgbot.utils.const_functions import ded, get_unix
 
 
@@ -17,7 +14,7 @@ class CategoryModel(BaseModel):
 
 
 # Работа с категориями
-class Categoryx:
+class Categoryx(AsyncDbx):
     storage_name = "storage_category"
 
     # Добавление записи
@@ -28,9 +25,7 @@ class Categoryx:
     ):
         category_unix = get_unix()
 
-        with sqlite3.connect(PATH_DATABASE) as con:
-            con.row_factory = dict_factory
-
+        with connect_dbx() as con:
             con.execute(
                 ded(f"""
                     INSERT INTO {Categoryx.storage_name} (
@@ -49,8 +44,7 @@ class Categoryx:
     # Получение записи
     @staticmethod
     def get(**kwargs) -> CategoryModel:
-        with sqlite3.connect(PATH_DATABASE) as con:
-            con.row_factory = dict_factory
+        with connect_dbx() as con:
             sql = f"SELECT * FROM {Categoryx.storage_name}"
             sql, parameters = update_format_where(sql, kwargs)
 
@@ -64,8 +58,7 @@ class Categoryx:
     # Получение записей
     @staticmethod
     def gets(**kwargs) -> list[CategoryModel]:
-        with sqlite3.connect(PATH_DATABASE) as con:
-            con.row_factory = dict_factory
+        with connect_dbx() as con:
             sql = f"SELECT * FROM {Categoryx.storage_name}"
             sql, parameters = update_format_where(sql, kwargs)
 
@@ -79,8 +72,7 @@ class Categoryx:
     # Получение всех записей
     @staticmethod
     def get_all() -> list[CategoryModel]:
-        with sqlite3.connect(PATH_DATABASE) as con:
-            con.row_factory = dict_factory
+        with connect_dbx() as con:
             sql = f"SELECT * FROM {Categoryx.storage_name}"
 
             response = con.execute(sql).fetchall()
@@ -90,11 +82,22 @@ class Categoryx:
 
             return response
 
+    # Количество записей
+    @staticmethod
+    def count(**kwargs) -> int:
+        with connect_dbx() as con:
+            sql = f"SELECT COUNT(*) AS category_count FROM {Categoryx.storage_name}"
+            parameters = []
+
+            if len(kwargs) >= 1:
+                sql, parameters = update_format_where(sql, kwargs)
+
+            return con.execute(sql, parameters).fetchone()['category_count']
+
     # Редактирование записи
     @staticmethod
     def update(category_id, **kwargs):
-        with sqlite3.connect(PATH_DATABASE) as con:
-            con.row_factory = dict_factory
+        with connect_dbx() as con:
             sql = f"UPDATE {Categoryx.storage_name} SET"
             sql, parameters = update_format(sql, kwargs)
             parameters.append(category_id)
@@ -104,8 +107,7 @@ class Categoryx:
     # Удаление записи
     @staticmethod
     def delete(**kwargs):
-        with sqlite3.connect(PATH_DATABASE) as con:
-            con.row_factory = dict_factory
+        with connect_dbx() as con:
             sql = f"DELETE FROM {Categoryx.storage_name}"
             sql, parameters = update_format_where(sql, kwargs)
 
@@ -114,8 +116,7 @@ class Categoryx:
     # Очистка всех записей
     @staticmethod
     def clear():
-        with sqlite3.connect(PATH_DATABASE) as con:
-            con.row_factory = dict_factory
+        with connect_dbx() as con:
             sql = f"DELETE FROM {Categoryx.storage_name}"
 
             con.execute(sql)
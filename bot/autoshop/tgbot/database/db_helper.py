@@ -1,8 +1,27 @@
 # - *- coding: utf- 8 - *-
+import asyncio
+import functools
 import sqlite3
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable
 
 from tgbot.data.config import PATH_DATABASE
-from tgbot.utils.const_functions import get_unix, ded
+
+# Настройки каждого подключения к БД
+DB_PRAGMAS = {
+    'journal_mode': "WAL",  # Читатели не блокируют запись и наоборот
+    'synchronous': "NORMAL",  # В режиме WAL безопасно и без fsync на каждый коммит
+    'cache_size': -16_000,  # Кэш страниц ~16МБ (отрицательное значение - в КБ)
+    'mmap_size': 134_217_728,  # Чтение файла БД через mmap (128МБ)
+    'busy_timeout': 5_000,  # Ожидание блокировки в мс вместо ошибки "database is locked"
+    'temp_store': "MEMORY",  # Временные таблицы и сортировки в памяти
+}
+
+DB_EXECUTOR = ThreadPoolExecutor(max_workers=1, thread_name_prefix="dbx")  # Отдельный поток для запросов к БД
+DB_QUEUE = asyncio.Semaphore(200)  # Ограничение очереди асинхронных запросов к БД
+DB_SNAPSHOT_CHECK = 1.0  # Как часто (в секундах) проверять изменение БД другими подключениями
 
 
 # Преобразование полученного списка в словарь
@@ -15,6 +34,140 @@ def dict_factory(cursor, row) -> dict:
     return save_dict
 
 
+# Пул постоянных подключений к БД (одно подключение на поток)
+class DatabasePool:
+    def __init__(self, path: str):
+        self.path = path
+
+        self._local = threading.local()
+        self._lock = threading.Lock()
+        self._connections: list[sqlite3.Connection] = []
+
+    # Получение подключения текущего потока
+    def connect(self) -> sqlite3.Connection:
+        con = getattr(self._local, "con", None)
+
+        if con is None:
+            con = sqlite3.connect(self.path, check_same_thread=False)
+            con.row_factory = dict_factory
+
+            for pragma, value in DB_PRAGMAS.items():
+                con.execute(f"PRAGMA {pragma} = {value}")
+
+            self._local.con = con
+
+            with self._lock:
+                self._connections.append(con)
+
+        return con
+
+    # Перенос данных из WAL журнала в основной файл БД
+    def checkpoint(self):
+        self.connect().execute("PRAGMA wal_checkpoint(TRUNCATE)")
+
+    # Закрытие всех подключений
+    def close(self):
+        with self._lock:
+            for con in self._connections:
+                con.close()
+
+            self._connections.clear()
+            self._local = threading.local()
+
+
+# Кэш снимков небольших таблиц (настройки, платежные системы)
+# Сбрасывается при записи через аксессор, а изменения другими подключениями и процессами
+# определяются по PRAGMA data_version не чаще раза в DB_SNAPSHOT_CHECK секунд
+class SnapshotCache:
+    def __init__(self, check_interval: float):
+        self.check_interval = check_interval
+
+        self._lock = threading.Lock()
+        self._snapshots: dict[str, dict] = {}
+
+    # Получение снимка таблицы (loader загружает данные через переданное подключение)
+    def get(self, name: str, loader: Callable[[sqlite3.Connection], Any]) -> Any:
+        time_now = time.monotonic()
+
+        with self._lock:
+            snapshot = self._snapshots.get(name)
+
+            if snapshot is not None and time_now - snapshot['checked'] < self.check_interval:
+                return snapshot['value']
+
+        con = connect_dbx()
+        snapshot_key = (id(con), con.execute("PRAGMA data_version").fetchone()['data_version'])
+
+        with self._lock:
+            if snapshot is not None and snapshot['key'] == snapshot_key and self._snapshots.get(name) is snapshot:
+                snapshot['checked'] = time_now
+                return snapshot['value']
+
+        snapshot_value = loader(con)
+
+        with self._lock:
+            self._snapshots[name] = {'key': snapshot_key, 'value': snapshot_value, 'checked': time_now}
+
+        return snapshot_value
+
+    # Сброс снимка таблицы или всех снимков
+    def invalidate(self, name: str = None):
+        with self._lock:
+            if name is None:
+                self._snapshots.clear()
+            else:
+                self._snapshots.pop(name, None)
+
+
+DB_POOL = DatabasePool(PATH_DATABASE)
+DB_SNAPSHOTS = SnapshotCache(DB_SNAPSHOT_CHECK)
+
+
+# Получение постоянного подключения к БД
+def connect_dbx() -> sqlite3.Connection:
+    return DB_POOL.connect()
+
+
+# Сброс WAL журнала в файл БД (перед отправкой бэкапа)
+def checkpoint_dbx():
+    DB_POOL.checkpoint()
+
+
+# Закрытие всех подключений к БД
+def close_dbx():
+    DB_EXECUTOR.shutdown(wait=True)
+    DB_POOL.close()
+    DB_SNAPSHOTS.invalidate()
+
+
+# Выполнение синхронной функции БД в отдельном потоке, не блокируя event loop
+async def run_dbx(func, *args, **kwargs):
+    async with DB_QUEUE:
+        return await asyncio.get_running_loop().run_in_executor(
+            DB_EXECUTOR,
+            functools.partial(func, *args, **kwargs),
+        )
+
+
+# Асинхронная обёртка над синхронным методом
+def async_dbx(func):
+    @functools.wraps(func)
+    async def wrapper(*args, **kwargs):
+        return await run_dbx(func, *args, **kwargs)
+
+    return wrapper
+
+
+# Базовый класс таблиц - для каждого метода создаётся асинхронная копия (Userx.get -> await Userx.aget)
+class AsyncDbx:
+    def __init_subclass__(cls, **kwargs):
+        super().__init_subclass__(**kwargs)
+
+        for name, method in list(vars(cls).items()):
+            if isinstance(method, staticmethod) and not name.startswith("_"):
+                setattr(cls, f"a{name}", staticmethod(async_dbx(method.__func__)))
+
+
 # Форматирование запроса без аргументов
 def update_format(sql, parameters: dict) -> tuple[str, list]:
     values = ", ".join([
@@ -36,231 +189,34 @@ def update_format_where(sql, parameters: dict) -> tuple[str, list]:
     return sql, list(parameters.values())
 
 
-################################################################################
-# Создание всех таблиц для БД
-def create_dbx():
-    with sqlite3.connect(PATH_DATABASE) as con:
-        con.row_factory = dict_factory
-
-        ############################################################
-        # Создание таблицы с хранением - пользователей
-        # Было 8 колонок, после добавления user_referrer стало 9
-        if len(con.execute("PRAGMA table_info(storage_users)").fetchall()) >= 8:
-            print("DB was found(1/8)")
-        else:
-            con.execute(
-                ded(f"""
-                    CREATE TABLE storage_users(
-                        increment INTEGER PRIMARY KEY AUTOINCREMENT,
-                        user_id INTEGER,
-                        user_login TEXT,
-                        user_name TEXT,
-                        user_balance REAL,
-                        user_refill REAL,
-                        user_give REAL,
-                        user_unix INTEGER
-                    )
-                """)
-            )
-            print("DB was not found(1/8) | Creating...")
-
-        # Создание таблицы с хранением - настроек
-        if len(con.execute("PRAGMA table_info(storage_settings)").fetchall()) == 10:
-            print("DB was found(2/8)")
-        else:
-            con.execute(
-                ded(f"""
-                    CREATE TABLE storage_settings(
-                        status_work TEXT,
-                        status_refill TEXT,
-                        status_buy TEXT,
-                        misc_faq TEXT,
-                        misc_support TEXT,
-                        misc_bot TEXT,
-                        misc_item_hide TEXT,
-                        misc_profit_day INTEGER,
-                        misc_profit_week INTEGER,
-                        misc_profit_month INTEGER
-                    )
-                """)
-            )
-
-            con.execute(
-                ded(f"""
-                    INSERT INTO storage_settings(
-                        status_work,
-                        status_refill,
-                        status_buy,
-                        misc_faq,
-                        misc_support,
-                        misc_bot,
-                        misc_item_hide,
-                        misc_profit_day,
-                        misc_profit_week,
-                        misc_profit_month
-                    )
-                    VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
-                """),
-                [
-                    'True',
-                    'False',
-                    'False',
-                    'None',
-                    'None',
-                    'None',
-                    'False',
-                    get_unix(),
-                    get_unix(),
-                    get_unix(),
-                ]
-            )
-            print("DB was not found(2/8) | Creating...")
-
-        ############################################################
-        # Создание таблицы с хранением - данных платежных систем
-        if len(con.execute("PRAGMA table_info(storage_payment)").fetchall()) == 7:
-            print("DB was found(3/8)")
-        else:
-            con.execute(
-                ded(f"""
-                    CREATE TABLE storage_payment(
-                        qiwi_login TEXT,
-                        qiwi_token TEXT,
-                        yoomoney_token TEXT,
-                        way_qiwi TEXT,
-                        way_yoomoney TEXT,
-                        cactuspay_token TEXT,
-                        way_cactuspay TEXT
-                    )
-                """)
-            )
-
-            con.execute(
-                ded(f"""
-                    INSERT INTO storage_payment(
-                        qiwi_login,
-                        qiwi_token,
-                        yoomoney_token,
-                        way_qiwi,
-                        way_yoomoney,
-                        cactuspay_token,
-                        way_cactuspay
-                    ) 
-                    VALUES (?, ?, ?, ?, ?, ?, ?)
-                """),
-                [
-                    'None',
-                    'None',
-                    'None',
-                    'False',
-                    'False',
-                    'None',
-                    'False',
-                ]
-            )
-            print("DB was not found(3/8) | Creating...")
-
-        ############################################################
-        # Создание таблицы с хранением - пополнений пользователей
-        if len(con.execute("PRAGMA table_info(storage_refill)").fetchall()) == 7:
-            print("DB was found(4/8)")
-        else:
-            con.execute(
-                ded(f"""
-                    CREATE TABLE storage_refill(
-                        increment INTEGER PRIMARY KEY AUTOINCREMENT,
-                        user_id INTEGER,
-                        refill_comment TEXT,
-                        refill_amount REAL,
-                        refill_receipt TEXT,
-                        refill_method TEXT,
-                        refill_unix INTEGER
-                    )
-                """)
-            )
-            print("DB was not found(4/8) | Creating...")
-
-        ############################################################
-        # Создание таблицы с хранением - категорий
-        if len(con.execute("PRAGMA table_info(storage_category)").fetchall()) == 4:
-            print("DB was found(5/8)")
-        else:
-            con.execute(
-                ded(f"""
-                    CREATE TABLE storage_category(
-                        increment INTEGER PRIMARY KEY AUTOINCREMENT,
-                        category_id INTEGER,
-                        category_name TEXT,
-                        category_unix INTEGER
-                    )
-                """)
-            )
-            print("DB was not found(5/8) | Creating...")
-
-        ############################################################
-        # Создание таблицы с хранением - позиций
-        if len(con.execute("PRAGMA table_info(storage_position)").fetchall()) == 8:
-            print("DB was found(6/8)")
-        else:
-            con.execute(
-                ded(f"""
-                    CREATE TABLE storage_position(
-                        increment INTEGER PRIMARY KEY AUTOINCREMENT,
-                        category_id INTEGER,
-                        position_id INTEGER,
-                        position_name TEXT,
-                        position_price REAL,
-                        position_desc TEXT,
-                        position_photo TEXT,
-                        position_unix INTEGER
-                    )
-                """)
-            )
-            print("DB was not found(6/8) | Creating...")
-
-        ############################################################
-        # Создание таблицы с хранением - товаров
-        if len(con.execute("PRAGMA table_info(storage_item)").fetchall()) == 7:
-            print("DB was found(7/8)")
-        else:
-            con.execute(
-                ded(f"""
-                    CREATE TABLE storage_item(
-                        increment INTEGER PRIMARY KEY AUTOINCREMENT,
-                        user_id INTEGER,
-                        category_id INTEGER,
-                        position_id INTEGER,
-                        item_id INTEGER,
-                        item_unix INTEGER,
-                        item_data TEXT
-                    )
-                """)
-            )
-            print("DB was not found(7/8) | Creating...")
-
-        ############################################################
-        # Создание таблицы с хранением - покупок
-        if len(con.execute("PRAGMA table_info(storage_purchases)").fetchall()) == 14:
-            print("DB was found(8/8)")
-        else:
-            con.execute(
-                ded(f"""
-                    CREATE TABLE storage_purchases(
-                        increment INTEGER PRIMARY KEY AUTOINCREMENT,
-                        user_id INTEGER,
-                        user_balance_before REAL,
-                        user_balance_after REAL,
-                        purchase_receipt TEXT,
-                        purchase_data TEXT,
-                        purchase_count INTEGER,
-                        purchase_price REAL,
-                        purchase_price_one REAL,
-                        purchase_position_id INTEGER,
-                        purchase_position_name TEXT,
-                        purchase_category_id INTEGER,
-                        purchase_category_name TEXT,
-                        purchase_unix INTEGER
-                    )
-                """)
-            )
-            print("DB was not found(8/8) | Creating...")
+# Запросы, которые выполнила функция на подключении текущего потока (с подставленными параметрами)
+def trace_dbx(func: Callable, *args, **kwargs) -> list[str]:
+    con = connect_dbx()
+    save_statements = []
+
+    con.set_trace_callback(save_statements.append)
+
+    try:
+        func(*args, **kwargs)
+    finally:
+        con.set_trace_callback(None)
+
+    return save_statements
+
+
+# Запросы аксессоров, план которых содержит полное сканирование таблицы
+# Аксессоры выполняются, и через EXPLAIN QUERY PLAN проверяются именно те запросы, которые они отправили
+def explain_dbx(lookups: list[tuple[Callable, dict]]) -> list[str]:
+    con = connect_dbx()
+    save_scans = []
+
+    for func, kwargs in lookups:
+        for sql in trace_dbx(func, **kwargs):
+            if not sql.lstrip().upper().startswith(("SELECT", "UPDATE", "DELETE", "WITH")):
+                continue
+
+            for row in con.execute(f"EXPLAIN QUERY PLAN {sql}").fetchall():
+                if row['detail'].startswith("SCAN"):
+                    save_scans.append(f"{sql} -> {row['detail']}")
+
+    return save_scans
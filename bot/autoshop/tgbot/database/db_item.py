@@ -1,12 +1,11 @@
 # - *- coding: utf- 8 - *-
-import math
-import sqlite3
+import time
+from typing import Iterable
 
 from pydantic import BaseModel
 
-from tgbot.data.config import PATH_DATABASE
-from tgbot.database.db_helper import dict_factory, update_format_where, update_format
-from tgbot.utils.const_functions import ded, clear_list, gen_id, get_unix, clear_html
+from tgbot.database.db_helper import AsyncDbx, connect_dbx, update_format_where, update_format
+from tgbot.utils.const_functions import ded, gen_id, get_unix, clear_html
 
 
 # Модель таблицы
@@ -20,7 +19,7 @@ class ItemModel(BaseModel):
 
 
 # Работа с категориями
-class Itemx:
+class Itemx(AsyncDbx):
     storage_name = "storage_item"
 
     # Добавление записей
@@ -30,44 +29,68 @@ class Itemx:
             category_id: int,
             position_id: int,
             item_datas: list[str],
-    ):
+    ) -> int:
+        return Itemx.add_bulk(user_id, category_id, position_id, item_datas)[0]
+
+    # Массовое добавление записей пачками в одной транзакции (количество, скорость шт/сек)
+    @staticmethod
+    def add_bulk(
+            user_id: int,
+            category_id: int,
+            position_id: int,
+            item_datas: Iterable[str],
+            batch_size: int = 5_000,
+    ) -> tuple[int, float]:
+        time_start = time.perf_counter()
         item_unix = get_unix()
+        item_count = 0
+
+        sql = ded(f"""
+            INSERT INTO {Itemx.storage_name} (
+                user_id,
+                category_id,
+                position_id,
+                item_id,
+                item_unix,
+                item_data
+            ) VALUES (?, ?, ?, ?, ?, ?)
+        """)
 
-        with sqlite3.connect(PATH_DATABASE) as con:
-            con.row_factory = dict_factory
+        with connect_dbx() as con:
+            con.execute("BEGIN IMMEDIATE")
 
-            item_datas = clear_list(item_datas)
+            # Айди товаров идут подряд от последнего в таблице, чтобы не пересекаться с прошлыми загрузками
+            item_id = con.execute(f"SELECT MAX(item_id) AS item_id FROM {Itemx.storage_name}").fetchone()['item_id']
+            item_id = max(gen_id(), (item_id or 0) + 1)
+
+            save_items = []
 
             for item_data in item_datas:
-                item_id = gen_id()
-                item_data = clear_html(item_data.strip())
-
-                con.execute(
-                    ded(f"""
-                        INSERT INTO {Itemx.storage_name} (
-                            user_id,
-                            category_id,
-                            position_id,
-                            item_id,
-                            item_unix,
-                            item_data
-                        ) VALUES (?, ?, ?, ?, ?, ?)
-                    """),
-                    [
-                        user_id,
-                        category_id,
-                        position_id,
-                        item_id,
-                        item_unix,
-                        item_data,
-                    ],
-                )
+                item_data = item_data.strip()
+
+                if item_data in ("", ".", ","):
+                    continue
+
+                save_items.append([user_id, category_id, position_id, item_id, item_unix, clear_html(item_data)])
+                item_id += 1
+
+                if len(save_items) >= batch_size:
+                    con.executemany(sql, save_items)
+                    item_count += len(save_items)
+                    save_items = []
+
+            if len(save_items) >= 1:
+                con.executemany(sql, save_items)
+                item_count += len(save_items)
+
+        time_spent = time.perf_counter() - time_start
+
+        return item_count, item_count / time_spent if time_spent > 0 else float(item_count)
 
     # Получение записи
     @staticmethod
     def get(**kwargs) -> ItemModel:
-        with sqlite3.connect(PATH_DATABASE) as con:
-            con.row_factory = dict_factory
+        with connect_dbx() as con:
             sql = f"SELECT * FROM {Itemx.storage_name}"
             sql, parameters = update_format_where(sql, kwargs)
 
@@ -81,8 +104,7 @@ class Itemx:
     # Получение записей
     @staticmethod
     def gets(**kwargs) -> list[ItemModel]:
-        with sqlite3.connect(PATH_DATABASE) as con:
-            con.row_factory = dict_factory
+        with connect_dbx() as con:
             sql = f"SELECT * FROM {Itemx.storage_name}"
             sql, parameters = update_format_where(sql, kwargs)
 
@@ -96,8 +118,7 @@ class Itemx:
     # Получение всех записей
     @staticmethod
     def get_all() -> list[ItemModel]:
-        with sqlite3.connect(PATH_DATABASE) as con:
-            con.row_factory = dict_factory
+        with connect_dbx() as con:
             sql = f"SELECT * FROM {Itemx.storage_name}"
 
             response = con.execute(sql).fetchall()
@@ -107,11 +128,32 @@ class Itemx:
 
             return response
 
+    # Количество записей
+    @staticmethod
+    def count(**kwargs) -> int:
+        with connect_dbx() as con:
+            sql = f"SELECT COUNT(*) AS item_count FROM {Itemx.storage_name}"
+            parameters = []
+
+            if len(kwargs) >= 1:
+                sql, parameters = update_format_where(sql, kwargs)
+
+            return con.execute(sql, parameters).fetchone()['item_count']
+
+    # Количество записей по каждой позиции
+    @staticmethod
+    def counts_by_position() -> dict[int, int]:
+        with connect_dbx() as con:
+            sql = f"SELECT position_id, COUNT(*) AS item_count FROM {Itemx.storage_name} GROUP BY position_id"
+
+            response = con.execute(sql).fetchall()
+
+            return {cache_object['position_id']: cache_object['item_count'] for cache_object in response}
+
     # Редактирование записи
     @staticmethod
     def update(item_id, **kwargs):
-        with sqlite3.connect(PATH_DATABASE) as con:
-            con.row_factory = dict_factory
+        with connect_dbx() as con:
             sql = f"UPDATE {Itemx.storage_name} SET"
             sql, parameters = update_format(sql, kwargs)
             parameters.append(item_id)
@@ -121,8 +163,7 @@ class Itemx:
     # Удаление записи
     @staticmethod
     def delete(**kwargs):
-        with sqlite3.connect(PATH_DATABASE) as con:
-            con.row_factory = dict_factory
+        with connect_dbx() as con:
             sql = f"DELETE FROM {Itemx.storage_name}"
             sql, parameters = update_format_where(sql, kwargs)
 
@@ -131,39 +172,7 @@ class Itemx:
     # Очистка всех записей
     @staticmethod
     def clear():
-        with sqlite3.connect(PATH_DATABASE) as con:
-            con.row_factory = dict_factory
+        with connect_dbx() as con:
             sql = f"DELETE FROM {Itemx.storage_name}"
 
             con.execute(sql)
-
-    # Покупка товара
-    @staticmethod
-    def buy(get_items: list[ItemModel], count: int) -> tuple[list[str], int]:
-        with sqlite3.connect(PATH_DATABASE) as con:
-            con.row_factory = dict_factory
-
-            save_items, save_len = [], 0
-
-            for x, select_item in enumerate(get_items):
-                if x != count:
-                    if count > 1:
-                        select_data = f"{x + 1}. {select_item.item_data}"
-                    else:
-                        select_data = select_item.item_data
-
-                    save_items.append(select_data)
-                    sql, parameters = update_format_where(
-                        f"DELETE FROM {Itemx.storage_name}",
-                        {"item_id": select_item.item_id},
-                    )
-                    con.execute(sql, parameters)
-
-                    if len(select_data) >= save_len:
-                        save_len = len(select_data)
-                else:
-                    break
-
-            save_len = math.ceil(3500 / (save_len + 1))
-
-        return save_items, save_len
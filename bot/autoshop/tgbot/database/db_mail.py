@@ -0,0 +1,220 @@
+# - *- coding: utf- 8 - *-
+from typing import Optional
+
+from pydantic import BaseModel
+
+from tgbot.database.db_helper import AsyncDbx, connect_dbx, update_format_where, update_format
+from tgbot.utils.const_functions import get_unix, ded, gen_id
+
+# Статусы отправки, после которых юзер исключается из следующих рассылок
+MAIL_INACTIVE = ("blocked", "not_found")
+
+
+# Модель таблицы
+class MailModel(BaseModel):
+    increment: int
+    mail_id: int
+    admin_id: int
+    mail_text: Optional[str] = None
+    mail_target: str
+    mail_status: str  # active - отправляется, paused - на паузе, cancelled - отменена, done - завершена
+    mail_cursor: int  # Айди пользователя, до которого включительно рассылка подтверждена
+    mail_total: int
+    mail_sent: int
+    mail_failed: int
+    progress_chat_id: Optional[int] = None
+    progress_message_id: Optional[int] = None
+    mail_unix: int
+    mail_type: str = "text"  # text, медиа (photo, video, ...) или copy - копирование сообщения админа
+    mail_file_id: Optional[str] = None
+    mail_source_chat_id: Optional[int] = None
+    mail_source_message_id: Optional[int] = None
+
+
+# Работа с рассылками
+class Mailx(AsyncDbx):
+    storage_name = "storage_mail"
+    recipients_name = "storage_mail_recipients"
+
+    # Добавление записи
+    @staticmethod
+    def add(
+            admin_id: int,
+            mail_text: str,
+            mail_target: str = "all",
+            progress_chat_id: int = None,
+            progress_message_id: int = None,
+            mail_type: str = "text",
+            mail_file_id: str = None,
+            mail_source_chat_id: int = None,
+            mail_source_message_id: int = None,
+    ) -> int:
+        mail_id = gen_id()
+        mail_unix = get_unix()
+
+        with connect_dbx() as con:
+            mail_total = con.execute(
+                "SELECT COUNT(*) AS users_count FROM storage_users WHERE user_active = 1",
+            ).fetchone()['users_count']
+
+            con.execute(
+                ded(f"""
+                    INSERT INTO {Mailx.storage_name} (
+                        mail_id,
+                        admin_id,
+                        mail_text,
+                        mail_target,
+                        mail_status,
+                        mail_total,
+                        progress_chat_id,
+                        progress_message_id,
+                        mail_unix,
+                        mail_type,
+                        mail_file_id,
+                        mail_source_chat_id,
+                        mail_source_message_id
+                    ) VALUES (?, ?, ?, ?, 'active', ?, ?, ?, ?, ?, ?, ?, ?)
+                """),
+                [
+                    mail_id,
+                    admin_id,
+                    mail_text,
+                    mail_target,
+                    mail_total,
+                    progress_chat_id,
+                    progress_message_id,
+                    mail_unix,
+                    mail_type,
+                    mail_file_id,
+                    mail_source_chat_id,
+                    mail_source_message_id,
+                ],
+            )
+
+        return mail_id
+
+    # Получение записи
+    @staticmethod
+    def get(**kwargs) -> MailModel:
+        with connect_dbx() as con:
+            sql = f"SELECT * FROM {Mailx.storage_name}"
+            sql, parameters = update_format_where(sql, kwargs)
+
+            response = con.execute(sql, parameters).fetchone()
+
+            if response is not None:
+                response = MailModel(**response)
+
+            return response
+
+    # Получение записей
+    @staticmethod
+    def gets(**kwargs) -> list[MailModel]:
+        with connect_dbx() as con:
+            sql = f"SELECT * FROM {Mailx.storage_name}"
+            sql, parameters = update_format_where(sql, kwargs)
+
+            response = con.execute(sql, parameters).fetchall()
+
+            if len(response) >= 1:
+                response = [MailModel(**cache_object) for cache_object in response]
+
+            return response
+
+    # Редактирование записи
+    @staticmethod
+    def update(mail_id, **kwargs):
+        with connect_dbx() as con:
+            sql = f"UPDATE {Mailx.storage_name} SET"
+            sql, parameters = update_format(sql, kwargs)
+            parameters.append(mail_id)
+
+            con.execute(sql + "WHERE mail_id = ?", parameters)
+
+    # Следующая страница получателей после курсора (по возрастанию айди, без неактивных и уже обработанных)
+    @staticmethod
+    def get_recipients(mail_id: int, after_user_id: int, limit: int) -> list[int]:
+        with connect_dbx() as con:
+            response = con.execute(
+                ded(f"""
+                    SELECT user_id FROM storage_users AS users
+                    WHERE users.user_id > ? AND users.user_active = 1
+                    AND NOT EXISTS (
+                        SELECT 1 FROM {Mailx.recipients_name} AS recipients
+                        WHERE recipients.mail_id = ? AND recipients.user_id = users.user_id
+                    )
+                    ORDER BY users.user_id
+                    LIMIT ?
+                """),
+                [after_user_id, mail_id, limit],
+            ).fetchall()
+
+            return [user['user_id'] for user in response]
+
+    # Сохранение результатов отправки, сдвиг курсора и пометка недоступных юзеров неактивными одной транзакцией
+    # Счётчики увеличиваются только на реально добавленных получателей (повтор пачки после перезапуска не учитывается)
+    @staticmethod
+    def add_results(mail_id: int, results: list[tuple[int, str]], mail_cursor: int):
+        recipient_unix = get_unix()
+        users_inactive = [(user_id,) for user_id, recipient_status in results if recipient_status in MAIL_INACTIVE]
+
+        sql = ded(f"""
+            INSERT OR IGNORE INTO {Mailx.recipients_name} (mail_id, user_id, recipient_status, recipient_unix)
+            VALUES (?, ?, ?, ?)
+        """)
+
+        with connect_dbx() as con:
+            mail_sent = con.executemany(
+                sql,
+                [(mail_id, user_id, status, recipient_unix) for user_id, status in results if status == "sent"],
+            ).rowcount
+
+            mail_failed = con.executemany(
+                sql,
+                [(mail_id, user_id, status, recipient_unix) for user_id, status in results if status != "sent"],
+            ).rowcount
+
+            con.execute(
+                ded(f"""
+                    UPDATE {Mailx.storage_name}
+                    SET mail_sent = mail_sent + ?, mail_failed = mail_failed + ?, mail_cursor = MAX(mail_cursor, ?)
+                    WHERE mail_id = ?
+                """),
+                [mail_sent, mail_failed, mail_cursor, mail_id],
+            )
+
+            con.executemany("UPDATE storage_users SET user_active = 0 WHERE user_id = ?", users_inactive)
+
+    # Количество получателей по статусам отправки
+    @staticmethod
+    def get_statuses(mail_id: int) -> dict[str, int]:
+        with connect_dbx() as con:
+            response = con.execute(
+                ded(f"""
+                    SELECT recipient_status, COUNT(*) AS recipients_count
+                    FROM {Mailx.recipients_name}
+                    WHERE mail_id = ?
+                    GROUP BY recipient_status
+                """),
+                [mail_id],
+            ).fetchall()
+
+            return {status['recipient_status']: status['recipients_count'] for status in response}
+
+    # Удаление статусов получателей завершённых и отменённых рассылок, созданных раньше before_unix
+    # Счётчики отправленных и неотправленных остаются в самой рассылке
+    @staticmethod
+    def prune(before_unix: int) -> int:
+        with connect_dbx() as con:
+            response = con.execute(
+                ded(f"""
+                    DELETE FROM {Mailx.recipients_name}
+                    WHERE mail_id IN (
+                        SELECT mail_id FROM {Mailx.storage_name}
+                        WHERE mail_status IN ('done', 'cancelled') AND mail_unix < ?
+                    )
+                """),
+                [before_unix],
+            )
+
+            return response.rowcount
@@ -0,0 +1,698 @@
+# - *- coding: utf- 8 - *-
+import json
+import sqlite3
+from contextlib import contextmanager
+from typing import Callable, Optional
+
+from tgbot.data.config import DB_MIGRATION_BATCH
+from tgbot.database.db_bills import Billx
+from tgbot.database.db_category import Categoryx
+from tgbot.database.db_helper import connect_dbx, explain_dbx
+from tgbot.database.db_item import Itemx
+from tgbot.database.db_position import Positionx
+from tgbot.database.db_purchases import Purchasesx
+from tgbot.database.db_refill import Refillx
+from tgbot.database.db_stats import fill_stats_rows, STATS_METRICS
+from tgbot.database.db_users import Userx
+from tgbot.utils.const_functions import get_unix, ded
+
+# Список миграций (версия, описание, функция, выполняется ли своими транзакциями)
+MIGRATIONS: list[tuple[int, str, Callable, bool]] = []
+
+# Индексы на колонки, по которым ищутся записи (имя индекса: таблица, колонки, уникальный)
+DB_INDEXES = {
+    'idx_users_user_id': ("storage_users", "user_id", True),
+    'idx_users_user_login': ("storage_users", "lower(user_login)", False),
+    'idx_item_position_id': ("storage_item", "position_id", False),
+    'idx_item_category_id': ("storage_item", "category_id", False),
+    'idx_item_item_id': ("storage_item", "item_id", False),
+    'idx_purchases_receipt': ("storage_purchases", "purchase_receipt", False),
+    'idx_purchases_user_id': ("storage_purchases", "user_id", False),
+    'idx_purchases_position_id': ("storage_purchases", "purchase_position_id", False),
+    'idx_refill_receipt': ("storage_refill", "refill_receipt", False),
+    'idx_refill_user_id': ("storage_refill", "user_id", False),
+    'idx_position_position_id': ("storage_position", "position_id", False),
+    'idx_position_category_id': ("storage_position", "category_id", False),
+    'idx_category_category_id': ("storage_category", "category_id", False),
+}
+
+# Поиски аксессоров, которые не должны сканировать таблицу целиком (аксессор, аргументы)
+DB_LOOKUPS = [
+    (Userx.get, {'user_id': 0}),
+    (Userx.get_by_login, {'user_login': "user"}),
+    (Itemx.get, {'item_id': 0}),
+    (Itemx.gets, {'position_id': 0}),
+    (Itemx.gets, {'category_id': 0}),
+    (Purchasesx.get, {'purchase_receipt': "0"}),
+    (Purchasesx.gets, {'user_id': 0}),
+    (Purchasesx.gets, {'purchase_position_id': 0}),
+    (Refillx.get, {'refill_receipt': "0"}),
+    (Refillx.gets, {'user_id': 0}),
+    (Positionx.get, {'position_id': 0}),
+    (Positionx.gets, {'category_id': 0}),
+    (Categoryx.get, {'category_id': 0}),
+    (Billx.get, {'bill_receipt': "0"}),
+    (Billx.gets_due, {'limit': 1}),
+]
+
+
+# Регистрация миграции
+# online - миграция сама делит работу на короткие транзакции и продолжается после прерывания,
+# версия схемы записывается после её завершения
+def migration(version: int, desc: str, online: bool = False):
+    def decorator(func: Callable[[sqlite3.Connection], None]):
+        MIGRATIONS.append((version, desc, func, online))
+        return func
+
+    return decorator
+
+
+# Короткая транзакция записи
+@contextmanager
+def transaction(con: sqlite3.Connection):
+    con.execute("BEGIN IMMEDIATE")
+
+    try:
+        yield con
+        con.execute("COMMIT")
+    except:
+        con.execute("ROLLBACK")
+        raise
+
+
+# Текущая версия схемы БД
+def get_version(con: sqlite3.Connection) -> int:
+    return con.execute("PRAGMA user_version").fetchone()['user_version']
+
+
+# Список колонок таблицы
+def get_columns(con: sqlite3.Connection, table: str) -> list[str]:
+    return [column['name'] for column in con.execute(f"PRAGMA table_info({table})").fetchall()]
+
+
+# Добавление колонки, если её ещё нет
+def add_column(con: sqlite3.Connection, table: str, column: str, column_type: str):
+    if column not in get_columns(con, table):
+        con.execute(f"ALTER TABLE {table} ADD COLUMN {column} {column_type}")
+
+
+# Создание индекса, если его ещё нет
+def add_index(con: sqlite3.Connection, index_name: str, table: str, columns: str, unique: bool = False):
+    con.execute(f"CREATE {'UNIQUE ' if unique else ''}INDEX IF NOT EXISTS {index_name} ON {table} ({columns})")
+
+
+# Пачечная обработка строк таблицы по rowid, каждая пачка - отдельная транзакция вместе с курсором
+# Курсор хранится в storage_migrations, прерванная миграция продолжается со следующей пачки.
+# Обрабатываются строки, которые были в таблице при первом запуске (граница запоминается вместе с курсором),
+# start_func выполняется один раз в той же транзакции, где создаётся курсор
+def migrate_batches(
+        con: sqlite3.Connection,
+        migration_key: str,
+        table: str,
+        func: Callable[[sqlite3.Connection, int, int], None],
+        start_func: Optional[Callable[[sqlite3.Connection], None]] = None,
+):
+    with transaction(con):
+        con.execute(
+            ded(f"""
+                CREATE TABLE IF NOT EXISTS storage_migrations(
+                    migration_key TEXT PRIMARY KEY,
+                    migration_cursor INTEGER NOT NULL DEFAULT 0,
+                    migration_end INTEGER NOT NULL DEFAULT 0,
+                    migration_unix INTEGER
+                ) WITHOUT ROWID
+            """)
+        )
+
+        is_started = con.execute(
+            ded(f"""
+                INSERT OR IGNORE INTO storage_migrations (migration_key, migration_cursor, migration_end, migration_unix)
+                SELECT ?, 0, COALESCE(MAX(rowid), 0), ? FROM {table}
+            """),
+            [migration_key, get_unix()],
+        ).rowcount == 1
+
+        if is_started and start_func is not None:
+            start_func(con)
+
+    while True:
+        with transaction(con):
+            get_cursor = con.execute(
+                "SELECT migration_cursor, migration_end FROM storage_migrations WHERE migration_key = ?",
+                [migration_key],
+            ).fetchone()
+
+            rowid_from, rowid_end = get_cursor['migration_cursor'], get_cursor['migration_end']
+
+            if rowid_from >= rowid_end:
+                break
+
+            rowid_to = con.execute(
+                ded(f"""
+                    SELECT MAX(batch_rowid) AS batch_rowid FROM (
+                        SELECT rowid AS batch_rowid FROM {table}
+                        WHERE rowid > ? AND rowid <= ?
+                        ORDER BY rowid
+                        LIMIT ?
+                    )
+                """),
+                [rowid_from, rowid_end, DB_MIGRATION_BATCH],
+            ).fetchone()['batch_rowid'] or rowid_end
+
+            func(con, rowid_from, rowid_to)
+
+            con.execute(
+                "UPDATE storage_migrations SET migration_cursor = ? WHERE migration_key = ?",
+                [rowid_to, migration_key],
+            )
+
+
+# Пересборка статистики пачками (метрика обнуляется при создании курсора, строки истории прибавляются пачками)
+# Триггеры уже созданы, поэтому строки, добавленные после запоминания границы, учитываются ими
+def migrate_stats(con: sqlite3.Connection, migration_name: str):
+    for stat_metric, (table, column_unix, column_count, column_amount) in STATS_METRICS.items():
+        migrate_batches(
+            con,
+            f"{migration_name}:{stat_metric}",
+            table,
+            lambda con_batch, rowid_from, rowid_to: fill_stats_rows(con_batch, stat_metric, rowid_from, rowid_to),
+            start_func=lambda con_start: con_start.execute(
+                "DELETE FROM storage_stats WHERE stat_metric = ?", [stat_metric],
+            ),
+        )
+
+
+# Запись строки в статистику из триггера (row - NEW или OLD, sign - "" прибавить, "-" вычесть)
+def get_stats_upsert(stat_metric: str, row: str, sign: str) -> str:
+    table, column_unix, column_count, column_amount = STATS_METRICS[stat_metric]
+
+    value_count = column_count if column_count.isdigit() else f"COALESCE({row}.{column_count}, 0)"
+    value_amount = column_amount if column_amount.isdigit() else f"COALESCE({row}.{column_amount}, 0)"
+
+    return ded(f"""
+        INSERT INTO storage_stats (stat_metric, stat_hour, stat_count, stat_amount)
+        VALUES ('{stat_metric}', COALESCE({row}.{column_unix}, 0) / 3600, {sign}{value_count}, {sign}{value_amount})
+        ON CONFLICT (stat_metric, stat_hour) DO UPDATE SET
+            stat_count = stat_count + excluded.stat_count,
+            stat_amount = stat_amount + excluded.stat_amount;
+    """)
+
+
+# Применение всех новых миграций
+# Обычная миграция - одна транзакция вместе с версией схемы, online - свои короткие транзакции
+def migrate_dbx(con: sqlite3.Connection):
+    for version, desc, func, online in sorted(MIGRATIONS, key=lambda migration_item: migration_item[0]):
+        if version <= get_version(con):
+            continue
+
+        if online:
+            func(con)
+
+            with transaction(con):
+                con.execute(f"PRAGMA user_version = {max(version, get_version(con))}")
+        else:
+            with transaction(con):
+                if version > get_version(con):
+                    func(con)
+                    con.execute(f"PRAGMA user_version = {version}")
+
+        print(f"DB migration {version} | {desc}")
+
+
+################################################################################
+# Базовые таблицы (совпадают со схемой, которую раньше создавал create_dbx)
+@migration(1, "base tables")
+def migration_base_tables(con: sqlite3.Connection):
+    # Создание таблицы с хранением - пользователей
+    con.execute(
+        ded(f"""
+            CREATE TABLE IF NOT EXISTS storage_users(
+                increment INTEGER PRIMARY KEY AUTOINCREMENT,
+                user_id INTEGER,
+                user_login TEXT,
+                user_name TEXT,
+                user_balance REAL,
+                user_refill REAL,
+                user_give REAL,
+                user_unix INTEGER
+            )
+        """)
+    )
+
+    # Создание таблицы с хранением - настроек
+    con.execute(
+        ded(f"""
+            CREATE TABLE IF NOT EXISTS storage_settings(
+                status_work TEXT,
+                status_refill TEXT,
+                status_buy TEXT,
+                misc_faq TEXT,
+                misc_support TEXT,
+                misc_bot TEXT,
+                misc_item_hide TEXT,
+                misc_profit_day INTEGER,
+                misc_profit_week INTEGER,
+                misc_profit_month INTEGER
+            )
+        """)
+    )
+
+    if con.execute("SELECT COUNT(*) AS settings_count FROM storage_settings").fetchone()['settings_count'] == 0:
+        con.execute(
+            ded(f"""
+                INSERT INTO storage_settings(
+                    status_work,
+                    status_refill,
+                    status_buy,
+                    misc_faq,
+                    misc_support,
+                    misc_bot,
+                    misc_item_hide,
+                    misc_profit_day,
+                    misc_profit_week,
+                    misc_profit_month
+                )
+                VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+            """),
+            [
+                'True',
+                'False',
+                'False',
+                'None',
+                'None',
+                'None',
+                'False',
+                get_unix(),
+                get_unix(),
+                get_unix(),
+            ]
+        )
+
+    # Создание таблицы с хранением - данных платежных систем
+    con.execute(
+        ded(f"""
+            CREATE TABLE IF NOT EXISTS storage_payment(
+                qiwi_login TEXT,
+                qiwi_token TEXT,
+                yoomoney_token TEXT,
+                way_qiwi TEXT,
+                way_yoomoney TEXT
+            )
+        """)
+    )
+
+    if con.execute("SELECT COUNT(*) AS payment_count FROM storage_payment").fetchone()['payment_count'] == 0:
+        con.execute(
+            ded(f"""
+                INSERT INTO storage_payment(
+                    qiwi_login,
+                    qiwi_token,
+                    yoomoney_token,
+                    way_qiwi,
+                    way_yoomoney
+                )
+                VALUES (?, ?, ?, ?, ?)
+            """),
+            [
+                'None',
+                'None',
+                'None',
+                'False',
+                'False',
+            ]
+        )
+
+    # Создание таблицы с хранением - пополнений пользователей
+    con.execute(
+        ded(f"""
+            CREATE TABLE IF NOT EXISTS storage_refill(
+                increment INTEGER PRIMARY KEY AUTOINCREMENT,
+                user_id INTEGER,
+                refill_comment TEXT,
+                refill_amount REAL,
+                refill_receipt TEXT,
+                refill_method TEXT,
+                refill_unix INTEGER
+            )
+        """)
+    )
+
+    # Создание таблицы с хранением - категорий
+    con.execute(
+        ded(f"""
+            CREATE TABLE IF NOT EXISTS storage_category(
+                increment INTEGER PRIMARY KEY AUTOINCREMENT,
+                category_id INTEGER,
+                category_name TEXT,
+                category_unix INTEGER
+            )
+        """)
+    )
+
+    # Создание таблицы с хранением - позиций
+    con.execute(
+        ded(f"""
+            CREATE TABLE IF NOT EXISTS storage_position(
+                increment INTEGER PRIMARY KEY AUTOINCREMENT,
+                category_id INTEGER,
+                position_id INTEGER,
+                position_name TEXT,
+                position_price REAL,
+                position_desc TEXT,
+                position_photo TEXT,
+                position_unix INTEGER
+            )
+        """)
+    )
+
+    # Создание таблицы с хранением - товаров
+    con.execute(
+        ded(f"""
+            CREATE TABLE IF NOT EXISTS storage_item(
+                increment INTEGER PRIMARY KEY AUTOINCREMENT,
+                user_id INTEGER,
+                category_id INTEGER,
+                position_id INTEGER,
+                item_id INTEGER,
+                item_unix INTEGER,
+                item_data TEXT
+            )
+        """)
+    )
+
+    # Создание таблицы с хранением - покупок
+    con.execute(
+        ded(f"""
+            CREATE TABLE IF NOT EXISTS storage_purchases(
+                increment INTEGER PRIMARY KEY AUTOINCREMENT,
+                user_id INTEGER,
+                user_balance_before REAL,
+                user_balance_after REAL,
+                purchase_receipt TEXT,
+                purchase_data TEXT,
+                purchase_count INTEGER,
+                purchase_price REAL,
+                purchase_price_one REAL,
+                purchase_position_id INTEGER,
+                purchase_position_name TEXT,
+                purchase_category_id INTEGER,
+                purchase_category_name TEXT,
+                purchase_unix INTEGER
+            )
+        """)
+    )
+
+
+# Реферальный код пригласившего партнёра (заменяет скрипт add_referrer_column.py)
+@migration(2, "storage_users.user_referrer")
+def migration_user_referrer(con: sqlite3.Connection):
+    add_column(con, "storage_users", "user_referrer", "TEXT DEFAULT NULL")
+
+
+# Платёжная система CactusPay
+@migration(3, "storage_payment cactuspay")
+def migration_payment_cactuspay(con: sqlite3.Connection):
+    add_column(con, "storage_payment", "cactuspay_token", "TEXT DEFAULT 'None'")
+    add_column(con, "storage_payment", "way_cactuspay", "TEXT DEFAULT 'False'")
+
+
+# Слияние записей одного юзера в самую раннюю: баланс, пополнения и выдачи суммируются,
+# реферер берётся из первой записи, где он указан
+def merge_users(con: sqlite3.Connection, user_id: int):
+    get_users = con.execute("SELECT * FROM storage_users WHERE user_id = ? ORDER BY increment", [user_id]).fetchall()
+
+    if len(get_users) <= 1:
+        return
+
+    user_balance = round(sum(user['user_balance'] or 0 for user in get_users), 2)
+    user_refill = round(sum(user['user_refill'] or 0 for user in get_users), 2)
+    user_give = round(sum(user['user_give'] or 0 for user in get_users), 2)
+    user_referrer = next((user['user_referrer'] for user in get_users if user['user_referrer'] is not None), None)
+
+    con.execute(
+        ded(f"""
+            UPDATE storage_users
+            SET user_balance = ?, user_refill = ?, user_give = ?, user_referrer = ?
+            WHERE increment = ?
+        """),
+        [user_balance, user_refill, user_give, user_referrer, get_users[0]['increment']],
+    )
+    con.execute(
+        "DELETE FROM storage_users WHERE user_id = ? AND increment != ?",
+        [user_id, get_users[0]['increment']],
+    )
+
+    print(f"DB migration 4 | user {user_id}: merged {len(get_users)} rows, balance {user_balance}")
+
+
+# Индексы на колонки поиска, каждый индекс строится своей транзакцией
+@migration(4, "lookup indexes", online=True)
+def migration_lookup_indexes(con: sqlite3.Connection):
+    # Дубли пользователей сливаются перед созданием уникального индекса, каждый юзер - отдельной транзакцией.
+    # Поиск дублей только читает таблицу и не блокирует запись
+    get_duplicates = con.execute(
+        "SELECT user_id FROM storage_users GROUP BY user_id HAVING COUNT(*) > 1"
+    ).fetchall()
+
+    if len(get_duplicates) >= 1:
+        # Временный индекс, чтобы слияние каждого юзера не сканировало таблицу целиком
+        with transaction(con):
+            add_index(con, "idx_users_user_id_merge", "storage_users", "user_id")
+
+        for duplicate in get_duplicates:
+            with transaction(con):
+                merge_users(con, duplicate['user_id'])
+
+        with transaction(con):
+            con.execute("DROP INDEX IF EXISTS idx_users_user_id_merge")
+
+    for index_name, (table, columns, unique) in DB_INDEXES.items():
+        with transaction(con):
+            add_index(con, index_name, table, columns, unique)
+
+
+# Статистика по часам, обновляется триггерами при записи покупок, пополнений и пользователей
+# Таблица и триггеры создаются одной транзакцией, существующая история переносится пачками
+@migration(5, "storage_stats rollups", online=True)
+def migration_stats_rollups(con: sqlite3.Connection):
+    with transaction(con):
+        migration_stats_table(con)
+
+    migrate_stats(con, "stats_rollups")
+
+
+# Таблица статистики и триггеры на вставку и удаление
+def migration_stats_table(con: sqlite3.Connection):
+    con.execute(
+        ded(f"""
+            CREATE TABLE IF NOT EXISTS storage_stats(
+                stat_metric TEXT NOT NULL,
+                stat_hour INTEGER NOT NULL,
+                stat_count INTEGER NOT NULL DEFAULT 0,
+                stat_amount REAL NOT NULL DEFAULT 0,
+                PRIMARY KEY (stat_metric, stat_hour)
+            ) WITHOUT ROWID
+        """)
+    )
+
+    # Триггер на каждую вставку и удаление
+    for stat_metric, (table, column_unix, column_count, column_amount) in STATS_METRICS.items():
+        for trigger_event, trigger_row, trigger_sign in (("INSERT", "NEW", ""), ("DELETE", "OLD", "-")):
+            con.execute(
+                ded(f"""
+                    CREATE TRIGGER IF NOT EXISTS stats_{table}_{trigger_event.lower()}
+                    AFTER {trigger_event} ON {table}
+                    BEGIN
+                        {get_stats_upsert(stat_metric, trigger_row, trigger_sign)}
+                    END
+                """)
+            )
+
+
+# Рассылки, которые переживают перезапуск бота (задание и статус отправки каждому получателю)
+@migration(6, "storage_mail jobs")
+def migration_mail_jobs(con: sqlite3.Connection):
+    con.execute(
+        ded(f"""
+            CREATE TABLE IF NOT EXISTS storage_mail(
+                increment INTEGER PRIMARY KEY AUTOINCREMENT,
+                mail_id INTEGER NOT NULL UNIQUE,
+                admin_id INTEGER,
+                mail_text TEXT,
+                mail_target TEXT NOT NULL DEFAULT 'all',
+                mail_status TEXT NOT NULL DEFAULT 'active',
+                mail_cursor INTEGER NOT NULL DEFAULT 0,
+                mail_total INTEGER NOT NULL DEFAULT 0,
+                mail_sent INTEGER NOT NULL DEFAULT 0,
+                mail_failed INTEGER NOT NULL DEFAULT 0,
+                progress_chat_id INTEGER,
+                progress_message_id INTEGER,
+                mail_unix INTEGER
+            )
+        """)
+    )
+
+    con.execute(
+        ded(f"""
+            CREATE TABLE IF NOT EXISTS storage_mail_recipients(
+                mail_id INTEGER NOT NULL,
+                user_id INTEGER NOT NULL,
+                recipient_status TEXT NOT NULL,
+                recipient_unix INTEGER,
+                PRIMARY KEY (mail_id, user_id)
+            ) WITHOUT ROWID
+        """)
+    )
+
+    add_index(con, "idx_mail_status", "storage_mail", "mail_status")
+
+
+# Пометка юзеров, которым рассылка не доставляется (бот заблокирован или чат не найден)
+@migration(7, "storage_users.user_active")
+def migration_user_active(con: sqlite3.Connection):
+    add_column(con, "storage_users", "user_active", "INTEGER NOT NULL DEFAULT 1")
+
+
+# Рассылки с медиа (file_id загружается один раз) и копированием сообщения админа
+@migration(8, "storage_mail media")
+def migration_mail_media(con: sqlite3.Connection):
+    add_column(con, "storage_mail", "mail_type", "TEXT NOT NULL DEFAULT 'text'")
+    add_column(con, "storage_mail", "mail_file_id", "TEXT DEFAULT NULL")
+    add_column(con, "storage_mail", "mail_source_chat_id", "INTEGER DEFAULT NULL")
+    add_column(con, "storage_mail", "mail_source_message_id", "INTEGER DEFAULT NULL")
+
+
+# Очередь событий для сервера Mini App, записывается в одной транзакции с изменением баланса
+@migration(9, "storage_outbox")
+def migration_outbox(con: sqlite3.Connection):
+    con.execute(
+        ded(f"""
+            CREATE TABLE IF NOT EXISTS storage_outbox(
+                increment INTEGER PRIMARY KEY AUTOINCREMENT,
+                outbox_key TEXT NOT NULL UNIQUE,
+                outbox_event TEXT NOT NULL,
+                outbox_payload TEXT NOT NULL,
+                outbox_status TEXT NOT NULL DEFAULT 'pending',
+                outbox_attempts INTEGER NOT NULL DEFAULT 0,
+                outbox_next_unix INTEGER NOT NULL DEFAULT 0,
+                outbox_error TEXT,
+                outbox_unix INTEGER
+            )
+        """)
+    )
+
+    add_index(con, "idx_outbox_status", "storage_outbox", "outbox_status, outbox_next_unix")
+
+
+# Выставленные счета (по ним уведомление платёжки находит юзера и сообщение со счётом)
+@migration(10, "storage_bills")
+def migration_bills(con: sqlite3.Connection):
+    con.execute(
+        ded(f"""
+            CREATE TABLE IF NOT EXISTS storage_bills(
+                bill_receipt TEXT PRIMARY KEY,
+                user_id INTEGER NOT NULL,
+                bill_way TEXT NOT NULL,
+                bill_amount REAL NOT NULL,
+                bill_status TEXT NOT NULL DEFAULT 'pending',
+                bill_message_id INTEGER,
+                bill_unix INTEGER
+            ) WITHOUT ROWID
+        """)
+    )
+
+
+# Проверка неоплаченных счетов в фоне и уникальный чек пополнения (повторное зачисление не запишется)
+@migration(11, "storage_bills polling, unique refill_receipt", online=True)
+def migration_bills_polling(con: sqlite3.Connection):
+    with transaction(con):
+        add_column(con, "storage_bills", "bill_checks", "INTEGER NOT NULL DEFAULT 0")
+        add_column(con, "storage_bills", "bill_next_unix", "INTEGER NOT NULL DEFAULT 0")
+
+        add_index(con, "idx_bills_status", "storage_bills", "bill_status, bill_next_unix")
+
+    with transaction(con):
+        migration_refill_receipt(con)
+
+
+# Уникальный индекс чека пополнения вместо обычного
+def migration_refill_receipt(con: sqlite3.Connection):
+    # Если в старых данных уже есть повторные чеки, индекс остаётся неуникальным (защищает проверка в Refillx.credit)
+    get_duplicates = con.execute(
+        ded(f"""
+            SELECT COUNT(*) AS duplicates_count FROM (
+                SELECT refill_receipt FROM storage_refill GROUP BY refill_receipt HAVING COUNT(*) > 1
+            )
+        """)
+    ).fetchone()['duplicates_count']
+
+    if get_duplicates == 0:
+        con.execute("DROP INDEX IF EXISTS idx_refill_receipt")
+        add_index(con, "idx_refill_receipt", "storage_refill", "refill_receipt", True)
+    else:
+        print(f"DB migration 11 | {get_duplicates} duplicate refill receipts, idx_refill_receipt stays non-unique")
+
+
+# Ссылки на фото с токеном бота удаляются из уже записанных событий регистрации реферала
+@migration(12, "storage_outbox referral_register without photo_url")
+def migration_outbox_photo_url(con: sqlite3.Connection):
+    get_events = con.execute(
+        "SELECT increment, outbox_payload FROM storage_outbox WHERE outbox_event = 'referral_register'"
+    ).fetchall()
+
+    save_events = []
+
+    for event in get_events:
+        get_payload = json.loads(event['outbox_payload'])
+
+        if 'photo_url' in get_payload:
+            get_payload.pop('photo_url')
+            save_events.append([json.dumps(get_payload, ensure_ascii=False), event['increment']])
+
+    con.executemany("UPDATE storage_outbox SET outbox_payload = ? WHERE increment = ?", save_events)
+
+
+# Изменение покупки или пополнения (сумма, количество, время) переносится в статистику: старая строка
+# вычитается, новая прибавляется. Статистика пересобирается пачками, если уже разошлась с историей
+@migration(13, "storage_stats update triggers", online=True)
+def migration_stats_update_triggers(con: sqlite3.Connection):
+    with transaction(con):
+        migration_stats_update_table(con)
+
+    migrate_stats(con, "stats_update_triggers")
+
+
+# Триггеры на изменение строк, по которым считается статистика
+def migration_stats_update_table(con: sqlite3.Connection):
+    for stat_metric, (table, column_unix, column_count, column_amount) in STATS_METRICS.items():
+        trigger_columns = ", ".join(
+            column for column in (column_unix, column_count, column_amount) if not column.isdigit()
+        )
+
+        con.execute(
+            ded(f"""
+                CREATE TRIGGER IF NOT EXISTS stats_{table}_update
+                AFTER UPDATE OF {trigger_columns} ON {table}
+                BEGIN
+                    {get_stats_upsert(stat_metric, "OLD", "-")}
+                    {get_stats_upsert(stat_metric, "NEW", "")}
+                END
+            """)
+        )
+
+
+################################################################################
+# Создание и обновление всех таблиц БД
+def create_dbx():
+    with connect_dbx() as con:
+        version_before = get_version(con)
+
+        migrate_dbx(con)
+
+        if get_version(con) == version_before:
+            print(f"DB was found | schema version {version_before}")
+        else:
+            con.execute("PRAGMA optimize")
+
+            for scan in explain_dbx(DB_LOOKUPS):
+                print(f"DB query without index: {scan}")
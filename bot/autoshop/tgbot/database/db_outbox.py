@@ -0,0 +1,134 @@
+# - *- coding: utf- 8 - *-
+import json
+import sqlite3
+
+from pydantic import BaseModel
+
+from tgbot.database.db_helper import AsyncDbx, connect_dbx
+from tgbot.utils.const_functions import get_unix, ded
+
+
+# Модель таблицы
+class OutboxModel(BaseModel):
+    increment: int
+    outbox_key: str  # Ключ идемпотентности, сервер по нему отбрасывает повторы
+    outbox_event: str
+    outbox_payload: str
+    outbox_status: str  # pending - ожидает отправки, done - доставлено, dead - попытки закончились
+    outbox_attempts: int
+    outbox_next_unix: int
+    outbox_error: str | None = None
+    outbox_unix: int | None = None
+
+    # Данные события
+    def get_payload(self) -> dict:
+        return json.loads(self.outbox_payload)
+
+
+# Запись событий в очередь внутри уже открытой транзакции (события: ключ, тип, данные)
+# Повторная запись с тем же ключом игнорируется
+def add_outbox(con: sqlite3.Connection, events: list[tuple[str, str, dict]]):
+    outbox_unix = get_unix()
+
+    con.executemany(
+        ded(f"""
+            INSERT OR IGNORE INTO {Outboxx.storage_name} (
+                outbox_key,
+                outbox_event,
+                outbox_payload,
+                outbox_unix
+            ) VALUES (?, ?, ?, ?)
+        """),
+        [
+            (outbox_key, outbox_event, json.dumps(outbox_payload, ensure_ascii=False), outbox_unix)
+            for outbox_key, outbox_event, outbox_payload in events
+        ],
+    )
+
+
+# Работа с очередью событий для сервера Mini App
+class Outboxx(AsyncDbx):
+    storage_name = "storage_outbox"
+
+    # Добавление событий отдельной транзакцией
+    @staticmethod
+    def add(events: list[tuple[str, str, dict]]):
+        with connect_dbx() as con:
+            add_outbox(con, events)
+
+    # События, которые пора отправить
+    @staticmethod
+    def gets_due(limit: int) -> list[OutboxModel]:
+        with connect_dbx() as con:
+            response = con.execute(
+                ded(f"""
+                    SELECT * FROM {Outboxx.storage_name}
+                    WHERE outbox_status = 'pending' AND outbox_next_unix <= ?
+                    ORDER BY increment
+                    LIMIT ?
+                """),
+                [get_unix(), limit],
+            ).fetchall()
+
+            return [OutboxModel(**cache_object) for cache_object in response]
+
+    # Событие доставлено
+    @staticmethod
+    def done(increment: int):
+        with connect_dbx() as con:
+            con.execute(
+                f"UPDATE {Outboxx.storage_name} SET outbox_status = 'done', outbox_error = NULL WHERE increment = ?",
+                [increment],
+            )
+
+    # Неудачная попытка (следующая через outbox_delay секунд или dead, если попытки закончились)
+    @staticmethod
+    def fail(increment: int, outbox_error: str, outbox_delay: int, max_attempts: int):
+        with connect_dbx() as con:
+            con.execute(
+                ded(f"""
+                    UPDATE {Outboxx.storage_name}
+                    SET
+                        outbox_attempts = outbox_attempts + 1,
+                        outbox_error = ?,
+                        outbox_next_unix = ?,
+                        outbox_status = CASE WHEN outbox_attempts + 1 >= ? THEN 'dead' ELSE 'pending' END
+                    WHERE increment = ?
+                """),
+                [outbox_error[:500], get_unix() + outbox_delay, max_attempts, increment],
+            )
+
+    # Возврат отложенных событий в очередь
+    @staticmethod
+    def requeue_dead() -> int:
+        with connect_dbx() as con:
+            response = con.execute(
+                ded(f"""
+                    UPDATE {Outboxx.storage_name}
+                    SET outbox_status = 'pending', outbox_attempts = 0, outbox_next_unix = 0
+                    WHERE outbox_status = 'dead'
+                """)
+            )
+
+            return response.rowcount
+
+    # Количество событий по статусам
+    @staticmethod
+    def counts() -> dict[str, int]:
+        with connect_dbx() as con:
+            response = con.execute(
+                f"SELECT outbox_status, COUNT(*) AS outbox_count FROM {Outboxx.storage_name} GROUP BY outbox_status"
+            ).fetchall()
+
+            return {cache_object['outbox_status']: cache_object['outbox_count'] for cache_object in response}
+
+    # Удаление доставленных событий старше указанного времени
+    @staticmethod
+    def clear_done(before_unix: int) -> int:
+        with connect_dbx() as con:
+            response = con.execute(
+                f"DELETE FROM {Outboxx.storage_name} WHERE outbox_status = 'done' AND outbox_unix < ?",
+                [before_unix],
+            )
+
+            return response.rowcount
@@ -1,10 +1,7 @@
 # - *- coding: utf- 8 - *-
-import sqlite3
-
 from pydantic import BaseModel
 
-from tgbot.data.config import PATH_DATABASE
-from tgbot.database.db_helper import dict_factory, update_format
+from tgbot.database.db_helper import AsyncDbx, DB_SNAPSHOTS, connect_dbx, update_format
 
 
 # Модель таблицы
@@ -19,24 +16,28 @@ class PaymentModel(BaseModel):
 
 
 # Работа с платежными системами
-class Paymentsx:
+class Paymentsx(AsyncDbx):
     storage_name = "storage_payment"
 
-    # Получение записи
+    # Получение записи (из кэша, пока таблица не изменялась)
     @staticmethod
     def get() -> PaymentModel:
-        with sqlite3.connect(PATH_DATABASE) as con:
-            con.row_factory = dict_factory
-            sql = f"SELECT * FROM {Paymentsx.storage_name}"
+        return DB_SNAPSHOTS.get(Paymentsx.storage_name, Paymentsx._load)
+
+    # Загрузка записи из БД
+    @staticmethod
+    def _load(con) -> PaymentModel:
+        sql = f"SELECT * FROM {Paymentsx.storage_name}"
 
-            return PaymentModel(**con.execute(sql).fetchone())
+        return PaymentModel(**con.execute(sql).fetchone())
 
     # Редактирование записи
     @staticmethod
     def update(**kwargs):
-        with sqlite3.connect(PATH_DATABASE) as con:
-            con.row_factory = dict_factory
+        with connect_dbx() as con:
             sql = f"UPDATE {Paymentsx.storage_name} SET"
             sql, parameters = update_format(sql, kwargs)
 
             con.execute(sql, parameters)
+
+        DB_SNAPSHOTS.invalidate(Paymentsx.storage_name)
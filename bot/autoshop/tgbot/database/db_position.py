@@ -1,10 +1,7 @@
 # - *- coding: utf- 8 - *-
-import sqlite3
-
 from pydantic import BaseModel
 
-from tgbot.data.config import PATH_DATABASE
-from tgbot.database.db_helper import dict_factory, update_format_where, update_format
+from tgbot.database.db_helper import AsyncDbx, connect_dbx, update_format_where, update_format
 from tgbot.utils.const_functions import ded, get_unix
 
 
@@ -21,7 +18,7 @@ class PositionModel(BaseModel):
 
 
 # Работа с категориями
-class Positionx:
+class Positionx(AsyncDbx):
     storage_name = "storage_position"
 
     # Добавление записи
@@ -36,9 +33,7 @@ class Positionx:
     ):
         position_unix = get_unix()
 
-        with sqlite3.connect(PATH_DATABASE) as con:
-            con.row_factory = dict_factory
-
+        with connect_dbx() as con:
             con.execute(
                 ded(f"""
                     INSERT INTO {Positionx.storage_name} (
@@ -65,8 +60,7 @@ class Positionx:
     # Получение записи
     @staticmethod
     def get(**kwargs) -> PositionModel:
-        with sqlite3.connect(PATH_DATABASE) as con:
-            con.row_factory = dict_factory
+        with connect_dbx() as con:
             sql = f"SELECT * FROM {Positionx.storage_name}"
             sql, parameters = update_format_where(sql, kwargs)
 
@@ -80,8 +74,7 @@ class Positionx:
     # Получение записей
     @staticmethod
     def gets(**kwargs) -> list[PositionModel]:
-        with sqlite3.connect(PATH_DATABASE) as con:
-            con.row_factory = dict_factory
+        with connect_dbx() as con:
             sql = f"SELECT * FROM {Positionx.storage_name}"
             sql, parameters = update_format_where(sql, kwargs)
 
@@ -95,8 +88,7 @@ class Positionx:
     # Получение всех записей
     @staticmethod
     def get_all() -> list[PositionModel]:
-        with sqlite3.connect(PATH_DATABASE) as con:
-            con.row_factory = dict_factory
+        with connect_dbx() as con:
             sql = f"SELECT * FROM {Positionx.storage_name}"
 
             response = con.execute(sql).fetchall()
@@ -106,11 +98,22 @@ class Positionx:
 
             return response
 
+    # Количество записей
+    @staticmethod
+    def count(**kwargs) -> int:
+        with connect_dbx() as con:
+            sql = f"SELECT COUNT(*) AS position_count FROM {Positionx.storage_name}"
+            parameters = []
+
+            if len(kwargs) >= 1:
+                sql, parameters = update_format_where(sql, kwargs)
+
+            return con.execute(sql, parameters).fetchone()['position_count']
+
     # Редактирование записи
     @staticmethod
     def update(position_id, **kwargs):
-        with sqlite3.connect(PATH_DATABASE) as con:
-            con.row_factory = dict_factory
+        with connect_dbx() as con:
             sql = f"UPDATE {Positionx.storage_name} SET"
             sql, parameters = update_format(sql, kwargs)
             parameters.append(position_id)
@@ -120,8 +123,7 @@ class Positionx:
     # Удаление записи
     @staticmethod
     def delete(**kwargs):
-        with sqlite3.connect(PATH_DATABASE) as con:
-            con.row_factory = dict_factory
+        with connect_dbx() as con:
             sql = f"DELETE FROM {Positionx.storage_name}"
             sql, parameters = update_format_where(sql, kwargs)
 
@@ -130,8 +132,7 @@ class Positionx:
     # Очистка всех записей
     @staticmethod
     def clear():
-        with sqlite3.connect(PATH_DATABASE) as con:
-            con.row_factory = dict_factory
+        with connect_dbx() as con:
             sql = f"DELETE FROM {Positionx.storage_name}"
 
             con.execute(sql)
@@ -4,9 +4,8 @@ from typing import Union
 
 from pydantic import BaseModel
 
-from tgbot.data.config import PATH_DATABASE
-from tgbot.database.db_helper import dict_factory, update_format_where, update_format
-from tgbot.utils.const_functions import ded, get_unix
+from tgbot.database.db_helper import AsyncDbx, connect_dbx, update_format_where, update_format
+from tgbot.utils.const_functions import ded, get_unix, gen_id
 
 
 # Модель таблицы
@@ -28,7 +27,7 @@ class PurchasesModel(BaseModel):
 
 
 # Работа с категориями
-class Purchasesx:
+class Purchasesx(AsyncDbx):
     storage_name = "storage_purchases"
 
     # Добавление записи
@@ -49,9 +48,7 @@ class Purchasesx:
     ):
         purchase_unix = get_unix()
 
-        with sqlite3.connect(PATH_DATABASE) as con:
-            con.row_factory = dict_factory
-
+        with connect_dbx() as con:
             con.execute(
                 ded(f"""
                     INSERT INTO {Purchasesx.storage_name} (
@@ -90,8 +87,7 @@ class Purchasesx:
     # Получение записи
     @staticmethod
     def get(**kwargs) -> PurchasesModel:
-        with sqlite3.connect(PATH_DATABASE) as con:
-            con.row_factory = dict_factory
+        with connect_dbx() as con:
             sql = f"SELECT * FROM {Purchasesx.storage_name}"
             sql, parameters = update_format_where(sql, kwargs)
 
@@ -105,8 +101,7 @@ class Purchasesx:
     # Получение записей
     @staticmethod
     def gets(**kwargs) -> list[PurchasesModel]:
-        with sqlite3.connect(PATH_DATABASE) as con:
-            con.row_factory = dict_factory
+        with connect_dbx() as con:
             sql = f"SELECT * FROM {Purchasesx.storage_name}"
             sql, parameters = update_format_where(sql, kwargs)
 
@@ -120,8 +115,7 @@ class Purchasesx:
     # Получение всех записей
     @staticmethod
     def get_all() -> list[PurchasesModel]:
-        with sqlite3.connect(PATH_DATABASE) as con:
-            con.row_factory = dict_factory
+        with connect_dbx() as con:
             sql = f"SELECT * FROM {Purchasesx.storage_name}"
 
             response = con.execute(sql).fetchall()
@@ -134,8 +128,7 @@ class Purchasesx:
     # Редактирование записи
     @staticmethod
     def update(purchase_receipt, **kwargs):
-        with sqlite3.connect(PATH_DATABASE) as con:
-            con.row_factory = dict_factory
+        with connect_dbx() as con:
             sql = f"UPDATE {Purchasesx.storage_name} SET"
             sql, parameters = update_format(sql, kwargs)
             parameters.append(purchase_receipt)
@@ -145,8 +138,7 @@ class Purchasesx:
     # Удаление записи
     @staticmethod
     def delete(**kwargs):
-        with sqlite3.connect(PATH_DATABASE) as con:
-            con.row_factory = dict_factory
+        with connect_dbx() as con:
             sql = f"DELETE FROM {Purchasesx.storage_name}"
             sql, parameters = update_format_where(sql, kwargs)
 
@@ -155,8 +147,134 @@ class Purchasesx:
     # Очистка всех записей
     @staticmethod
     def clear():
-        with sqlite3.connect(PATH_DATABASE) as con:
-            con.row_factory = dict_factory
+        with connect_dbx() as con:
             sql = f"DELETE FROM {Purchasesx.storage_name}"
 
             con.execute(sql)
+
+    # Покупка товаров одной транзакцией: списание товаров, баланса и запись покупки
+    # Статусы: 0 - успешно, 1 - недостаточно товаров, 2 - недостаточно средств, 3 - позиция не найдена
+    @staticmethod
+    def buy(
+            user_id: int,
+            position_id: int,
+            purchase_count: int,
+    ) -> tuple[int, Union[PurchasesModel, None], list[str]]:
+        if purchase_count < 1:
+            return 1, None, []
+
+        with connect_dbx() as con:
+            con.execute("BEGIN IMMEDIATE")
+
+            get_position = con.execute(
+                ded(f"""
+                    SELECT
+                        storage_position.position_name,
+                        storage_position.position_price,
+                        storage_category.category_id,
+                        storage_category.category_name
+                    FROM storage_position
+                    JOIN storage_category ON storage_category.category_id = storage_position.category_id
+                    WHERE storage_position.position_id = ?
+                """),
+                [position_id],
+            ).fetchone()
+
+            if get_position is None:
+                con.rollback()
+                return 3, None, []
+
+            # Забираем ровно purchase_count товаров, другие покупатели ждут завершения транзакции
+            if sqlite3.sqlite_version_info >= (3, 35, 0):
+                get_items = con.execute(
+                    ded(f"""
+                        DELETE FROM storage_item
+                        WHERE increment IN (
+                            SELECT increment FROM storage_item WHERE position_id = ? ORDER BY increment LIMIT ?
+                        )
+                        RETURNING increment, item_data
+                    """),
+                    [position_id, purchase_count],
+                ).fetchall()
+            else:
+                get_items = con.execute(
+                    "SELECT increment, item_data FROM storage_item WHERE position_id = ? ORDER BY increment LIMIT ?",
+                    [position_id, purchase_count],
+                ).fetchall()
+
+                con.executemany(
+                    "DELETE FROM storage_item WHERE increment = ?",
+                    [[item['increment']] for item in get_items],
+                )
+
+            if len(get_items) != purchase_count:
+                con.rollback()
+                return 1, None, []
+
+            purchase_price = round(get_position['position_price'] * purchase_count, 2)
+
+            get_user = con.execute(
+                "SELECT user_balance FROM storage_users WHERE user_id = ?",
+                [user_id],
+            ).fetchone()
+
+            # Списание только при достаточном балансе
+            response = con.execute(
+                ded(f"""
+                    UPDATE storage_users
+                    SET user_balance = round(user_balance - ?, 2)
+                    WHERE user_id = ? AND user_balance >= ?
+                """),
+                [purchase_price, user_id, purchase_price],
+            )
+
+            if response.rowcount != 1:
+                con.rollback()
+                return 2, None, []
+
+            save_items = [item['item_data'] for item in sorted(get_items, key=lambda item: item['increment'])]
+
+            if purchase_count > 1:
+                save_items = [f"{x + 1}. {item_data}" for x, item_data in enumerate(save_items)]
+
+            response = con.execute(
+                ded(f"""
+                    INSERT INTO {Purchasesx.storage_name} (
+                        user_id,
+                        user_balance_before,
+                        user_balance_after,
+                        purchase_receipt,
+                        purchase_data,
+                        purchase_count,
+                        purchase_price,
+                        purchase_price_one,
+                        purchase_position_id,
+                        purchase_position_name,
+                        purchase_category_id,
+                        purchase_category_name,
+                        purchase_unix
+                    ) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+                """),
+                [
+                    user_id,
+                    get_user['user_balance'],
+                    round(get_user['user_balance'] - purchase_price, 2),
+                    gen_id(),
+                    "\n".join(save_items),
+                    purchase_count,
+                    purchase_price,
+                    get_position['position_price'],
+                    position_id,
+                    get_position['position_name'],
+                    get_position['category_id'],
+                    get_position['category_name'],
+                    get_unix(),
+                ],
+            )
+
+            response = con.execute(
+                f"SELECT * FROM {Purchasesx.storage_name} WHERE increment = ?",
+                [response.lastrowid],
+            ).fetchone()
+
+            return 0, PurchasesModel(**response), save_items
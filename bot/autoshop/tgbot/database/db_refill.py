@@ -1,11 +1,12 @@
 # - *- coding: utf- 8 - *-
 import sqlite3
-from typing import Union
+from typing import Callable, Union, Optional
 
 from pydantic import BaseModel
 
-from tgbot.data.config import PATH_DATABASE
-from tgbot.database.db_helper import dict_factory, update_format_where, update_format
+from tgbot.database.db_helper import AsyncDbx, connect_dbx, update_format_where, update_format
+from tgbot.database.db_outbox import add_outbox
+from tgbot.database.db_users import UserModel
 from tgbot.utils.const_functions import get_unix, ded
 
 
@@ -21,7 +22,7 @@ class RefillModel(BaseModel):
 
 
 # Работа с пополнениями
-class Refillx:
+class Refillx(AsyncDbx):
     storage_name = "storage_refill"
 
     # Добавление записи
@@ -35,9 +36,7 @@ class Refillx:
     ):
         refill_unix = get_unix()
 
-        with sqlite3.connect(PATH_DATABASE) as con:
-            con.row_factory = dict_factory
-
+        with connect_dbx() as con:
             con.execute(
                 ded(f"""
                     INSERT INTO {Refillx.storage_name} (
@@ -59,11 +58,84 @@ class Refillx:
                 ],
             )
 
+    # Зачисление пополнения одной транзакцией: запись пополнения, баланс юзера и события для сервера
+    # get_events строит события из юзера, прочитанного внутри транзакции (до зачисления)
+    # Статусы: 0 - успешно, 1 - пополнение с этим чеком уже зачислено, 2 - юзер не найден
+    @staticmethod
+    def credit(
+            user_id: int,
+            refill_comment: str,
+            refill_amount: float,
+            refill_receipt: Union[str, int],
+            refill_method: str,
+            get_events: Callable[[UserModel], list[tuple[str, str, dict]]] = None,
+    ) -> tuple[int, Optional[UserModel]]:
+        refill_unix = get_unix()
+
+        with connect_dbx() as con:
+            con.execute("BEGIN IMMEDIATE")
+
+            get_refill = con.execute(
+                f"SELECT 1 FROM {Refillx.storage_name} WHERE refill_receipt = ?",
+                [refill_receipt],
+            ).fetchone()
+
+            if get_refill is not None:
+                con.rollback()
+                return 1, None
+
+            get_user = con.execute("SELECT * FROM storage_users WHERE user_id = ?", [user_id]).fetchone()
+
+            if get_user is None:
+                con.rollback()
+                return 2, None
+
+            # Уникальный индекс на refill_receipt не даст записать чек повторно
+            try:
+                con.execute(
+                    ded(f"""
+                        INSERT INTO {Refillx.storage_name} (
+                            user_id,
+                            refill_comment,
+                            refill_amount,
+                            refill_receipt,
+                            refill_method,
+                            refill_unix
+                        ) VALUES (?, ?, ?, ?, ?, ?)
+                    """),
+                    [
+                        user_id,
+                        refill_comment,
+                        refill_amount,
+                        refill_receipt,
+                        refill_method,
+                        refill_unix,
+                    ],
+                )
+            except sqlite3.IntegrityError:
+                con.rollback()
+                return 1, None
+
+            con.execute(
+                ded(f"""
+                    UPDATE storage_users
+                    SET user_balance = round(user_balance + ?, 2), user_refill = round(user_refill + ?, 2)
+                    WHERE user_id = ?
+                """),
+                [refill_amount, refill_amount, user_id],
+            )
+
+            get_user = UserModel(**get_user)
+
+            if get_events is not None:
+                add_outbox(con, get_events(get_user))
+
+            return 0, get_user
+
     # Получение записи
     @staticmethod
     def get(**kwargs) -> RefillModel:
-        with sqlite3.connect(PATH_DATABASE) as con:
-            con.row_factory = dict_factory
+        with connect_dbx() as con:
             sql = f"SELECT * FROM {Refillx.storage_name}"
             sql, parameters = update_format_where(sql, kwargs)
 
@@ -77,8 +149,7 @@ class Refillx:
     # Получение записей
     @staticmethod
     def gets(**kwargs) -> list[RefillModel]:
-        with sqlite3.connect(PATH_DATABASE) as con:
-            con.row_factory = dict_factory
+        with connect_dbx() as con:
             sql = f"SELECT * FROM {Refillx.storage_name}"
             sql, parameters = update_format_where(sql, kwargs)
 
@@ -92,8 +163,7 @@ class Refillx:
     # Получение всех записей
     @staticmethod
     def get_all() -> list[RefillModel]:
-        with sqlite3.connect(PATH_DATABASE) as con:
-            con.row_factory = dict_factory
+        with connect_dbx() as con:
             sql = f"SELECT * FROM {Refillx.storage_name}"
 
             response = con.execute(sql).fetchall()
@@ -106,8 +176,7 @@ class Refillx:
     # Редактирование записи
     @staticmethod
     def update(refill_receipt, **kwargs):
-        with sqlite3.connect(PATH_DATABASE) as con:
-            con.row_factory = dict_factory
+        with connect_dbx() as con:
             sql = f"UPDATE {Refillx.storage_name} SET"
             sql, parameters = update_format(sql, kwargs)
             parameters.append(refill_receipt)
@@ -117,8 +186,7 @@ class Refillx:
     # Удаление записи
     @staticmethod
     def delete(**kwargs):
-        with sqlite3.connect(PATH_DATABASE) as con:
-            con.row_factory = dict_factory
+        with connect_dbx() as con:
             sql = f"DELETE FROM {Refillx.storage_name}"
             sql, parameters = update_format_where(sql, kwargs)
 
@@ -127,8 +195,7 @@ class Refillx:
     # Очистка всех записей
     @staticmethod
     def clear():
-        with sqlite3.connect(PATH_DATABASE) as con:
-            con.row_factory = dict_factory
+        with connect_dbx() as con:
             sql = f"DELETE FROM {Refillx.storage_name}"
 
             con.execute(sql)
@@ -1,10 +1,7 @@
 # - *- coding: utf- 8 - *-
-import sqlite3
-
 from pydantic import BaseModel
 
-from tgbot.data.config import PATH_DATABASE
-from tgbot.database.db_helper import dict_factory, update_format
+from tgbot.database.db_helper import AsyncDbx, DB_SNAPSHOTS, connect_dbx, update_format
 
 
 # Модель таблицы
@@ -22,24 +19,28 @@ class SettingsModel(BaseModel):
 
 
 # Работа с настройками
-class Settingsx:
+class Settingsx(AsyncDbx):
     storage_name = "storage_settings"
 
-    # Получение записи
+    # Получение записи (из кэша, пока таблица не изменялась)
     @staticmethod
     def get() -> SettingsModel:
-        with sqlite3.connect(PATH_DATABASE) as con:
-            con.row_factory = dict_factory
-            sql = f"SELECT * FROM {Settingsx.storage_name}"
+        return DB_SNAPSHOTS.get(Settingsx.storage_name, Settingsx._load)
+
+    # Загрузка записи из БД
+    @staticmethod
+    def _load(con) -> SettingsModel:
+        sql = f"SELECT * FROM {Settingsx.storage_name}"
 
-            return SettingsModel(**con.execute(sql).fetchone())
+        return SettingsModel(**con.execute(sql).fetchone())
 
     # Редактирование записи
     @staticmethod
     def update(**kwargs):
-        with sqlite3.connect(PATH_DATABASE) as con:
-            con.row_factory = dict_factory
+        with connect_dbx() as con:
             sql = f"UPDATE {Settingsx.storage_name} SET"
             sql, parameters = update_format(sql, kwargs)
 
             con.execute(sql, parameters)
+
+        DB_SNAPSHOTS.invalidate(Settingsx.storage_name)
@@ -0,0 +1,101 @@
+# - *- coding: utf- 8 - *-
+import sqlite3
+
+from tgbot.database.db_helper import AsyncDbx, connect_dbx
+from tgbot.utils.const_functions import ded
+
+# Метрики статистики и источники для их пересборки (таблица, колонка времени, количество, сумма)
+STATS_METRICS = {
+    'purchase': ("storage_purchases", "purchase_unix", "purchase_count", "purchase_price"),
+    'refill': ("storage_refill", "refill_unix", "1", "refill_amount"),
+    'user': ("storage_users", "user_unix", "1", "0"),
+}
+
+
+# Заполнение статистики из истории покупок, пополнений и пользователей
+def fill_stats(con: sqlite3.Connection):
+    for stat_metric, (table, column_unix, column_count, column_amount) in STATS_METRICS.items():
+        con.execute(
+            ded(f"""
+                INSERT INTO {Statsx.storage_name} (stat_metric, stat_hour, stat_count, stat_amount)
+                SELECT
+                    ?,
+                    COALESCE({column_unix}, 0) / 3600,
+                    SUM(COALESCE({column_count}, 0)),
+                    SUM(COALESCE({column_amount}, 0))
+                FROM {table}
+                GROUP BY COALESCE({column_unix}, 0) / 3600
+            """),
+            [stat_metric],
+        )
+
+
+# Прибавление к статистике метрики строк истории с rowid в диапазоне (rowid_from; rowid_to]
+def fill_stats_rows(con: sqlite3.Connection, stat_metric: str, rowid_from: int, rowid_to: int):
+    table, column_unix, column_count, column_amount = STATS_METRICS[stat_metric]
+
+    con.execute(
+        ded(f"""
+            INSERT INTO {Statsx.storage_name} (stat_metric, stat_hour, stat_count, stat_amount)
+            SELECT
+                ?,
+                COALESCE({column_unix}, 0) / 3600,
+                SUM(COALESCE({column_count}, 0)),
+                SUM(COALESCE({column_amount}, 0))
+            FROM {table}
+            WHERE rowid > ? AND rowid <= ?
+            GROUP BY COALESCE({column_unix}, 0) / 3600
+            ON CONFLICT (stat_metric, stat_hour) DO UPDATE SET
+                stat_count = stat_count + excluded.stat_count,
+                stat_amount = stat_amount + excluded.stat_amount
+        """),
+        [stat_metric, rowid_from, rowid_to],
+    )
+
+
+# Работа со статистикой (суммы по часам, обновляются триггерами на покупки, пополнения и пользователей)
+class Statsx(AsyncDbx):
+    storage_name = "storage_stats"
+
+    # Получение количества и суммы метрики начиная с указанного времени
+    @staticmethod
+    def get_total(stat_metric: str, from_unix: int = 0) -> tuple[int, float]:
+        with connect_dbx() as con:
+            response = con.execute(
+                ded(f"""
+                    SELECT
+                        COALESCE(SUM(stat_count), 0) AS stat_count,
+                        COALESCE(SUM(stat_amount), 0) AS stat_amount
+                    FROM {Statsx.storage_name}
+                    WHERE stat_metric = ? AND stat_hour >= ?
+                """),
+                [stat_metric, from_unix // 3600],
+            ).fetchone()
+
+            return int(response['stat_count']), round(response['stat_amount'], 2)
+
+    # Получение средств пользователей (на балансах, выдано)
+    @staticmethod
+    def get_money() -> tuple[float, float]:
+        with connect_dbx() as con:
+            response = con.execute(
+                ded(f"""
+                    SELECT
+                        COALESCE(SUM(user_balance), 0) AS money_have,
+                        COALESCE(SUM(user_give), 0) AS money_give
+                    FROM storage_users
+                """)
+            ).fetchone()
+
+            return round(response['money_have'], 2), round(response['money_give'], 2)
+
+    # Пересборка статистики из истории
+    @staticmethod
+    def rebuild() -> int:
+        with connect_dbx() as con:
+            con.execute("BEGIN IMMEDIATE")
+            con.execute(f"DELETE FROM {Statsx.storage_name}")
+
+            fill_stats(con)
+
+            return con.execute(f"SELECT COUNT(*) AS stats_count FROM {Statsx.storage_name}").fetchone()['stats_count']
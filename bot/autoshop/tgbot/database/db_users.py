@@ -1,10 +1,7 @@
 # - *- coding: utf- 8 - *-
-import sqlite3
-
 from pydantic import BaseModel
 
-from tgbot.data.config import PATH_DATABASE
-from tgbot.database.db_helper import dict_factory, update_format_where, update_format
+from tgbot.database.db_helper import AsyncDbx, connect_dbx, update_format_where, update_format
 from tgbot.utils.const_functions import get_unix, ded
 
 
@@ -19,10 +16,11 @@ class UserModel(BaseModel):
     user_give: float
     user_unix: int
     user_referrer: str | None = None  # Реферальный код пригласившего партнёра (может быть NULL)
+    user_active: int = 1  # 0 - бот заблокирован или чат не найден при рассылке
 
 
 # Работа с юзером
-class Userx:
+class Userx(AsyncDbx):
     storage_name = "storage_users"
 
     # Добавление записи
@@ -38,9 +36,7 @@ class Userx:
         user_give = 0
         user_unix = get_unix()
 
-        with sqlite3.connect(PATH_DATABASE) as con:
-            con.row_factory = dict_factory
-
+        with connect_dbx() as con:
             con.execute(
                 ded(f"""
                     INSERT INTO {Userx.storage_name} (
@@ -66,11 +62,48 @@ class Userx:
                 ],
             )
 
+    # Добавление или обновление логина и имени одним запросом (количество изменённых строк)
+    # Юзер, помеченный неактивным при рассылке, снова становится активным
+    @staticmethod
+    def upsert(
+            user_id: int,
+            user_login: str,
+            user_name: str,
+    ) -> int:
+        user_unix = get_unix()
+
+        with connect_dbx() as con:
+            response = con.execute(
+                ded(f"""
+                    INSERT INTO {Userx.storage_name} (
+                        user_id,
+                        user_login,
+                        user_name,
+                        user_balance,
+                        user_refill,
+                        user_give,
+                        user_unix
+                    ) VALUES (?, ?, ?, 0, 0, 0, ?)
+                    ON CONFLICT (user_id) DO UPDATE SET
+                        user_login = excluded.user_login,
+                        user_name = excluded.user_name,
+                        user_active = 1
+                    WHERE user_login IS NOT excluded.user_login OR user_name IS NOT excluded.user_name OR user_active = 0
+                """),
+                [
+                    user_id,
+                    user_login,
+                    user_name,
+                    user_unix,
+                ],
+            )
+
+            return response.rowcount
+
     # Получение записи
     @staticmethod
     def get(**kwargs) -> UserModel:
-        with sqlite3.connect(PATH_DATABASE) as con:
-            con.row_factory = dict_factory
+        with connect_dbx() as con:
             sql = f"SELECT * FROM {Userx.storage_name}"
             sql, parameters = update_format_where(sql, kwargs)
 
@@ -81,11 +114,23 @@ class Userx:
 
             return response
 
+    # Получение записи по логину без учёта регистра
+    @staticmethod
+    def get_by_login(user_login: str) -> UserModel:
+        with connect_dbx() as con:
+            sql = f"SELECT * FROM {Userx.storage_name} WHERE lower(user_login) = lower(?)"
+
+            response = con.execute(sql, [user_login]).fetchone()
+
+            if response is not None:
+                response = UserModel(**response)
+
+            return response
+
     # Получение записей
     @staticmethod
     def gets(**kwargs) -> list[UserModel]:
-        with sqlite3.connect(PATH_DATABASE) as con:
-            con.row_factory = dict_factory
+        with connect_dbx() as con:
             sql = f"SELECT * FROM {Userx.storage_name}"
             sql, parameters = update_format_where(sql, kwargs)
 
@@ -96,11 +141,22 @@ class Userx:
 
             return response
 
+    # Количество записей
+    @staticmethod
+    def count(**kwargs) -> int:
+        with connect_dbx() as con:
+            sql = f"SELECT COUNT(*) AS user_count FROM {Userx.storage_name}"
+            parameters = []
+
+            if len(kwargs) >= 1:
+                sql, parameters = update_format_where(sql, kwargs)
+
+            return con.execute(sql, parameters).fetchone()['user_count']
+
     # Получение всех записей
     @staticmethod
     def get_all() -> list[UserModel]:
-        with sqlite3.connect(PATH_DATABASE) as con:
-            con.row_factory = dict_factory
+        with connect_dbx() as con:
             sql = f"SELECT * FROM {Userx.storage_name}"
 
             response = con.execute(sql).fetchall()
@@ -113,8 +169,7 @@ class Userx:
     # Редактирование записи
     @staticmethod
     def update(user_id, **kwargs):
-        with sqlite3.connect(PATH_DATABASE) as con:
-            con.row_factory = dict_factory
+        with connect_dbx() as con:
             sql = f"UPDATE {Userx.storage_name} SET"
             sql, parameters = update_format(sql, kwargs)
             parameters.append(user_id)
@@ -124,8 +179,7 @@ class Userx:
     # Удаление записи
     @staticmethod
     def delete(**kwargs):
-        with sqlite3.connect(PATH_DATABASE) as con:
-            con.row_factory = dict_factory
+        with connect_dbx() as con:
             sql = f"DELETE FROM {Userx.storage_name}"
             sql, parameters = update_format_where(sql, kwargs)
 
@@ -134,8 +188,7 @@ class Userx:
     # Очистка всех записей
     @staticmethod
     def clear():
-        with sqlite3.connect(PATH_DATABASE) as con:
-            con.row_factory = dict_factory
+        with connect_dbx() as con:
             sql = f"DELETE FROM {Userx.storage_name}"
 
             con.execute(sql)
@@ -32,6 +32,24 @@ def mail_confirm_finl() -> InlineKeyboardMarkup:
     return keyboard.as_markup()
 
 
+# Управление запущенной рассылкой
+def mail_control_finl(mail_id: int, mail_status: str) -> InlineKeyboardMarkup:
+    keyboard = InlineKeyboardBuilder()
+
+    if mail_status == "active":
+        keyboard.row(
+            ikb("⏸ Пауза", data=f"mail_control:pause:{mail_id}"),
+            ikb("⛔ Отменить", data=f"mail_control:cancel:{mail_id}"),
+        )
+    elif mail_status == "paused":
+        keyboard.row(
+            ikb("▶️ Продолжить", data=f"mail_control:resume:{mail_id}"),
+            ikb("⛔ Отменить", data=f"mail_control:cancel:{mail_id}"),
+        )
+
+    return keyboard.as_markup()
+
+
 # Поиск профиля пользователя
 def profile_search_finl(user_id) -> InlineKeyboardMarkup:
     keyboard = InlineKeyboardBuilder()
@@ -63,9 +81,9 @@ def profile_search_return_finl(user_id) -> InlineKeyboardMarkup:
 ################################################################################
 ############################## ПЛАТЕЖНЫЕ СИСТЕМЫ ###############################
 # Способы пополнения
-def payment_method_finl() -> InlineKeyboardMarkup:
+async def payment_method_finl() -> InlineKeyboardMarkup:
     keyboard        = InlineKeyboardBuilder()
-    get_payments    = Paymentsx.get()
+    get_payments    = await Paymentsx.aget()
 
     status_qiwi_kb          = ikb("✅", data="payment_method:QIWI:False")
     status_yoomoney_kb      = ikb("✅", data="payment_method:Yoomoney:False")
@@ -134,10 +152,10 @@ def payment_cactuspay_finl() -> InlineKeyboardMarkup:
 ################################################################################
 ################################## НАСТРОЙКИ ###################################
 # Кнопки с настройками
-def settings_open_finl() -> InlineKeyboardMarkup:
+async def settings_open_finl() -> InlineKeyboardMarkup:
     keyboard = InlineKeyboardBuilder()
 
-    get_settings = Settingsx.get()
+    get_settings = await Settingsx.aget()
 
     # Поддержка
     if get_settings.misc_support == "None":
@@ -168,10 +186,10 @@ def settings_open_finl() -> InlineKeyboardMarkup:
 
 
 # Выключатели
-def turn_open_finl() -> InlineKeyboardMarkup:
+async def turn_open_finl() -> InlineKeyboardMarkup:
     keyboard = InlineKeyboardBuilder()
 
-    get_settings = Settingsx.get()
+    get_settings = await Settingsx.aget()
 
     status_work_kb = ikb("Включены ✅", data="turn_work:False")
     status_buy_kb = ikb("Включены ✅", data="turn_buy:False")
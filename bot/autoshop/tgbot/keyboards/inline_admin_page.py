@@ -15,10 +15,10 @@ from tgbot.utils.const_functions import ikb
 ################################################################################
 ############################## ИЗМЕНЕНИЕ КАТЕГОРИИ #############################
 # Cтраницы выбора категории для изменения
-def category_edit_swipe_fp(remover) -> InlineKeyboardMarkup:
+async def category_edit_swipe_fp(remover) -> InlineKeyboardMarkup:
     keyboard = InlineKeyboardBuilder()
 
-    get_categories = Categoryx.get_all()
+    get_categories = await Categoryx.aget_all()
     if 10 - (len(get_categories) % 10) != 10:
         remover_page = len(get_categories) + (10 - (len(get_categories) % 10))
     else:
@@ -94,10 +94,10 @@ def category_edit_swipe_fp(remover) -> InlineKeyboardMarkup:
 ################################################################################
 ################################ СОЗДАНИЕ ПОЗИЦИИ ##############################
 # Страницы выбора категории для позиции
-def position_add_swipe_fp(remover) -> InlineKeyboardMarkup:
+async def position_add_swipe_fp(remover) -> InlineKeyboardMarkup:
     keyboard = InlineKeyboardBuilder()
 
-    get_categories = Categoryx.get_all()
+    get_categories = await Categoryx.aget_all()
     if (10 - (len(get_categories) % 10)) != 10:
         remover_page = len(get_categories) + (10 - (len(get_categories) % 10))
     else:
@@ -173,10 +173,10 @@ def position_add_swipe_fp(remover) -> InlineKeyboardMarkup:
 ################################################################################
 ############################### ИЗМЕНЕНИЕ ПОЗИЦИИ ##############################
 # Cтраницы категорий для изменения позиции
-def position_edit_category_swipe_fp(remover) -> InlineKeyboardMarkup:
+async def position_edit_category_swipe_fp(remover) -> InlineKeyboardMarkup:
     keyboard = InlineKeyboardBuilder()
 
-    get_categories = Categoryx.get_all()
+    get_categories = await Categoryx.aget_all()
     if (10 - (len(get_categories) % 10)) != 10:
         remover_page = len(get_categories) + (10 - (len(get_categories) % 10))
     else:
@@ -250,10 +250,10 @@ def position_edit_category_swipe_fp(remover) -> InlineKeyboardMarkup:
 
 
 # Cтраницы выбора позиции для изменения
-def position_edit_swipe_fp(remover, category_id) -> InlineKeyboardMarkup:
+async def position_edit_swipe_fp(remover, category_id) -> InlineKeyboardMarkup:
     keyboard = InlineKeyboardBuilder()
 
-    get_positions = Positionx.gets(category_id=category_id)
+    get_positions = await Positionx.agets(category_id=category_id)
     if 10 - (len(get_positions) % 10) != 10:
         remover_page = len(get_positions) + (10 - (len(get_positions) % 10))
     else:
@@ -261,13 +261,13 @@ def position_edit_swipe_fp(remover, category_id) -> InlineKeyboardMarkup:
 
     if remover >= len(get_positions): remover -= 10
 
+    get_counts = await Itemx.acounts_by_position()
+
     for count, a in enumerate(range(remover, len(get_positions))):
         if count < 10:
-            get_items = Itemx.gets(position_id=get_positions[a].position_id)
-
             keyboard.row(
                 ikb(
-                    f"{get_positions[a].position_name} | {get_positions[a].position_price}₽ | {len(get_items)} шт",
+                    f"{get_positions[a].position_name} | {get_positions[a].position_price}₽ | {get_counts.get(get_positions[a].position_id, 0)} шт",
                     data=f"position_edit_open:{get_positions[a].position_id}:{category_id}:{remover}",
                 )
             )
@@ -333,10 +333,10 @@ def position_edit_swipe_fp(remover, category_id) -> InlineKeyboardMarkup:
 ################################################################################
 ############################### ДОБАВЛЕНИЕ ТОВАРОВ #############################
 # Страницы категорий для добавления товаров
-def item_add_category_swipe_fp(remover) -> InlineKeyboardMarkup:
+async def item_add_category_swipe_fp(remover) -> InlineKeyboardMarkup:
     keyboard = InlineKeyboardBuilder()
 
-    get_categories = Categoryx.get_all()
+    get_categories = await Categoryx.aget_all()
     if (10 - (len(get_categories) % 10)) != 10:
         remover_page = len(get_categories) + (10 - (len(get_categories) % 10))
     else:
@@ -410,10 +410,10 @@ def item_add_category_swipe_fp(remover) -> InlineKeyboardMarkup:
 
 
 # Страницы позиций для добавления товаров
-def item_add_position_swipe_fp(remover, category_id) -> InlineKeyboardMarkup:
+async def item_add_position_swipe_fp(remover, category_id) -> InlineKeyboardMarkup:
     keyboard = InlineKeyboardBuilder()
 
-    get_positions = Positionx.gets(category_id=category_id)
+    get_positions = await Positionx.agets(category_id=category_id)
     if 10 - (len(get_positions) % 10) != 10:
         remover_page = len(get_positions) + (10 - (len(get_positions) % 10))
     else:
@@ -421,13 +421,13 @@ def item_add_position_swipe_fp(remover, category_id) -> InlineKeyboardMarkup:
 
     if remover >= len(get_positions): remover -= 10
 
+    get_counts = await Itemx.acounts_by_position()
+
     for count, a in enumerate(range(remover, len(get_positions))):
         if count < 10:
-            get_items = Itemx.gets(position_id=get_positions[a].position_id)
-
             keyboard.row(
                 ikb(
-                    f"{get_positions[a].position_name} | {get_positions[a].position_price}₽ | {len(get_items)} шт",
+                    f"{get_positions[a].position_name} | {get_positions[a].position_price}₽ | {get_counts.get(get_positions[a].position_id, 0)} шт",
                     data=f"item_add_position_open:{get_positions[a].position_id}:{category_id}",
                 )
             )
@@ -493,10 +493,10 @@ def item_add_position_swipe_fp(remover, category_id) -> InlineKeyboardMarkup:
 ################################################################################
 ################################ УДАЛЕНИЕ ТОВАРОВ ##############################
 # Страницы товаров для удаления
-def item_delete_swipe_fp(remover, position_id, category_id) -> InlineKeyboardMarkup:
+async def item_delete_swipe_fp(remover, position_id, category_id) -> InlineKeyboardMarkup:
     keyboard = InlineKeyboardBuilder()
 
-    get_items = Itemx.gets(position_id=position_id)
+    get_items = await Itemx.agets(position_id=position_id)
     if 10 - (len(get_items) % 10) != 10:
         remover_page = len(get_items) + (10 - (len(get_items) % 10))
     else:
@@ -54,10 +54,10 @@ def user_support_finl(support_login: str) -> InlineKeyboardMarkup:
 ################################################################################
 ################################### ПЛАТЕЖИ ####################################
 # Выбор способов пополнения
-def refill_method_finl() -> Union[InlineKeyboardMarkup, None]:
+async def refill_method_finl() -> Union[InlineKeyboardMarkup, None]:
     keyboard = InlineKeyboardBuilder()
 
-    get_payments = Paymentsx.get()
+    get_payments = await Paymentsx.aget()
 
     if get_payments.way_qiwi == "True":
         keyboard.row(ikb("🥝 QIWI", data="user_refill_method:QIWI"))
@@ -5,6 +5,7 @@ from aiogram.types import InlineKeyboardMarkup
 from aiogram.utils.keyboard import InlineKeyboardBuilder
 
 from tgbot.database.db_category import Categoryx
+from tgbot.database.db_helper import run_dbx
 from tgbot.database.db_item import Itemx
 from tgbot.utils.const_functions import ikb
 from tgbot.utils.misc_functions import get_positions_items
@@ -16,10 +17,10 @@ from tgbot.utils.misc_functions import get_positions_items
 ################################################################################
 ################################ ПОКУПКИ ТОВАРОВ ###############################
 # Страницы категорий при покупке товара
-def prod_item_category_swipe_fp(remover) -> InlineKeyboardMarkup:
+async def prod_item_category_swipe_fp(remover) -> InlineKeyboardMarkup:
     keyboard = InlineKeyboardBuilder()
 
-    get_categories = Categoryx.get_all()
+    get_categories = await Categoryx.aget_all()
     if 10 - (len(get_categories) % 10) != 10:
         remover_page = len(get_categories) + (10 - (len(get_categories) % 10))
     else:
@@ -93,10 +94,10 @@ def prod_item_category_swipe_fp(remover) -> InlineKeyboardMarkup:
 
 
 # Страницы позиций для покупки товаров
-def prod_item_position_swipe_fp(remover, category_id) -> InlineKeyboardMarkup:
+async def prod_item_position_swipe_fp(remover, category_id) -> InlineKeyboardMarkup:
     keyboard = InlineKeyboardBuilder()
 
-    get_positions = get_positions_items(category_id)
+    get_positions = await run_dbx(get_positions_items, category_id)
     if 10 - (len(get_positions) % 10) != 10:
         remover_page = len(get_positions) + (10 - (len(get_positions) % 10))
     else:
@@ -104,13 +105,13 @@ def prod_item_position_swipe_fp(remover, category_id) -> InlineKeyboardMarkup:
 
     if remover >= len(get_positions): remover -= 10
 
+    get_counts = await Itemx.acounts_by_position()
+
     for count, a in enumerate(range(remover, len(get_positions))):
         if count < 10:
-            get_items = Itemx.gets(position_id=get_positions[a].position_id)
-
             keyboard.row(
                 ikb(
-                    f"{get_positions[a].position_name} | {get_positions[a].position_price}₽ | {len(get_items)} шт",
+                    f"{get_positions[a].position_name} | {get_positions[a].position_price}₽ | {get_counts.get(get_positions[a].position_id, 0)} шт",
                     data=f"buy_position_open:{get_positions[a].position_id}:{remover}",
                 )
             )
@@ -4,10 +4,12 @@ from aiogram import Dispatcher
 from tgbot.middlewares.middleware_throttling import ThrottlingMiddleware
 from tgbot.middlewares.middleware_users import ExistsUserMiddleware
 
+USERS_MIDDLEWARE = ExistsUserMiddleware()  # Общий кэш юзеров для сообщений и колбэков
+
 
 # Регистрация всех миддлварей
 def register_all_middlwares(dp: Dispatcher):
-    dp.callback_query.outer_middleware(ExistsUserMiddleware())
-    dp.message.outer_middleware(ExistsUserMiddleware())
+    dp.callback_query.outer_middleware(USERS_MIDDLEWARE)
+    dp.message.outer_middleware(USERS_MIDDLEWARE)
 
     dp.message.middleware(ThrottlingMiddleware())
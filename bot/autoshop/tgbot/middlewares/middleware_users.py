@@ -1,19 +1,44 @@
 # - *- coding: utf- 8 - *-
 from aiogram import BaseMiddleware
 from aiogram.types import User
+from cachetools import TTLCache
 
 from tgbot.database.db_users import Userx
 from tgbot.utils.const_functions import clear_html
 
 
 # Проверка юзера в БД и его добавление
+# Известные юзеры кэшируются по айди вместе с логином и именем, повторный апдейт не обращается к БД
 class ExistsUserMiddleware(BaseMiddleware):
+    def __init__(self, maxsize: int = 50_000, ttl: int = 3600) -> None:
+        self.users = TTLCache(maxsize=maxsize, ttl=ttl)
+
+        self.stats = {
+            'hits': 0,  # Юзер найден в кэше с теми же логином и именем
+            'misses': 0,  # Юзера нет в кэше или изменились логин/имя
+            'writes': 0,  # Запросов, которые реально изменили БД
+        }
+
+    # Статистика кэша (доля попаданий, апдейтов без записи в БД)
+    def get_stats(self) -> dict:
+        total = self.stats['hits'] + self.stats['misses']
+
+        return {
+            **self.stats,
+            'size': len(self.users),
+            'hit_rate': round(self.stats['hits'] / total, 4) if total > 0 else 0.0,
+            'writes_avoided': total - self.stats['writes'],
+        }
+
+    # Удаление юзеров из кэша (чтобы следующий апдейт снова записал их в БД)
+    def forget(self, user_ids: list[int]):
+        for user_id in user_ids:
+            self.users.pop(user_id, None)
+
     async def __call__(self, handler, event, data):
         this_user: User = data.get("event_from_user")
 
         if not this_user.is_bot:
-            get_user = Userx.get(user_id=this_user.id)
-
             user_id = this_user.id
             user_login = this_user.username
             user_name = clear_html(this_user.full_name)
@@ -21,13 +46,14 @@ class ExistsUserMiddleware(BaseMiddleware):
             if user_name is None: user_name = ""
             if user_login is None: user_login = ""
 
-            if get_user is None:
-                Userx.add(user_id, user_login.lower(), user_name)
+            user_print = (user_login.lower(), user_name)
+
+            if self.users.get(user_id) == user_print:
+                self.stats['hits'] += 1
             else:
-                if user_name != get_user.user_name:
-                    Userx.update(get_user.user_id, user_name=user_name)
+                self.stats['misses'] += 1
+                self.stats['writes'] += await Userx.aupsert(user_id, user_login.lower(), user_name)
 
-                if user_login.lower() != get_user.user_login:
-                    Userx.update(get_user.user_id, user_login=user_login.lower())
+                self.users[user_id] = user_print
 
         return await handler(event, data)
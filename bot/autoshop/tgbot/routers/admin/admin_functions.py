@@ -1,17 +1,18 @@
 # - *- coding: utf- 8 - *-
-import asyncio
-
 from aiogram import Router, Bot, F
 from aiogram.filters import StateFilter
 from aiogram.types import CallbackQuery, Message
 
+from tgbot.database.db_mail import Mailx
 from tgbot.database.db_purchases import Purchasesx
 from tgbot.database.db_refill import Refillx
 from tgbot.database.db_users import Userx
-from tgbot.keyboards.inline_admin import profile_search_return_finl, mail_confirm_finl
-from tgbot.utils.const_functions import is_number, to_number, del_message, ded, get_unix, clear_html, convert_date
+from tgbot.keyboards.inline_admin import profile_search_return_finl, mail_confirm_finl, mail_control_finl
+from tgbot.services.mail_jobs import mail_start, mail_stop, mail_open_admin, mail_send, get_mail_content
+from tgbot.utils.const_functions import is_number, to_number, del_message, ded, clear_html
+from tgbot.utils.misc.bot_filters import IsAdmin
 from tgbot.utils.misc.bot_models import FSM, ARS
-from tgbot.utils.misc_functions import upload_text
+from tgbot.utils.misc_functions import get_purchases_file
 from tgbot.utils.text_functions import open_profile_admin, refill_open_admin, purchase_open_admin
 
 router = Router(name=__name__)
@@ -34,7 +35,8 @@ async def functions_mail(message: Message, bot: Bot, state: FSM, arSession: ARS)
     await state.set_state("here_mail_text")
     await message.answer(
         "<b>📢 Введите текст для рассылки пользователям</b>\n"
-        "❕ Вы можете использовать HTML разметку",
+        "❕ Вы можете использовать HTML разметку\n"
+        "❕ Можно отправить фото, видео, файл или любое другое сообщение",
     )
 
 
@@ -59,11 +61,11 @@ async def functions_search_get(message: Message, bot: Bot, state: FSM, arSession
         find_data = find_data[1:]
 
     if find_data.isdigit():
-        get_user = Userx.get(user_id=find_data)
-        get_refill = Refillx.get(refill_receipt=find_data)
-        get_purchase = Purchasesx.get(purchase_receipt=find_data)
+        get_user = await Userx.aget(user_id=find_data)
+        get_refill = await Refillx.aget(refill_receipt=find_data)
+        get_purchase = await Purchasesx.aget(purchase_receipt=find_data)
     else:
-        get_user = Userx.get(user_login=find_data.lower())
+        get_user = await Userx.aget_by_login(find_data)
 
     if get_user is None and get_refill is None and get_purchase is None:
         return await message.answer(
@@ -83,19 +85,22 @@ async def functions_search_get(message: Message, bot: Bot, state: FSM, arSession
         return await refill_open_admin(bot, message.from_user.id, get_refill)
 
     if get_purchase is not None:
-        return await purchase_open_admin(bot, arSession, message.from_user.id, get_purchase)
+        return await purchase_open_admin(bot, message.from_user.id, get_purchase)
 
 
 ################################### РАССЫЛКА ###################################
-# Принятие текста для рассылки
-@router.message(F.text, StateFilter("here_mail_text"))
+# Принятие текста или сообщения с медиа для рассылки
+@router.message(StateFilter("here_mail_text"))
 async def functions_mail_get(message: Message, bot: Bot, state: FSM, arSession: ARS):
-    await state.update_data(here_mail_text="📢 Рассылка.\n" + str(message.text))
+    mail_content = get_mail_content(message, "📢 Рассылка.\n")
 
-    get_users = Userx.get_all()
+    users_count = await Userx.acount(user_active=1)
 
     try:
-        await (await message.answer(message.text)).delete()
+        if mail_content['mail_type'] == "text":
+            await (await message.answer(message.text)).delete()
+        else:
+            await mail_send(bot, message.from_user.id, **mail_content)
     except:
         return await message.answer(
             "<b>❌ Ошибка синтаксиса HTML.</b>\n"
@@ -103,14 +108,21 @@ async def functions_mail_get(message: Message, bot: Bot, state: FSM, arSession:
             "❕ Вы можете использовать HTML разметку.",
         )
 
+    await state.update_data(here_mail_content=mail_content)
     await state.set_state("here_mail_confirm")
 
-    await message.answer(
-        f"<b>📢 Отправить <code>{len(get_users)}</code> юзерам сообщение?</b>\n"
-        f"{message.text}",
-        reply_markup=mail_confirm_finl(),
-        disable_web_page_preview=True
-    )
+    if mail_content['mail_type'] == "text":
+        await message.answer(
+            f"<b>📢 Отправить <code>{users_count}</code> юзерам сообщение?</b>\n"
+            f"{message.text}",
+            reply_markup=mail_confirm_finl(),
+            disable_web_page_preview=True
+        )
+    else:
+        await message.answer(
+            f"<b>📢 Отправить <code>{users_count}</code> юзерам сообщение выше?</b>",
+            reply_markup=mail_confirm_finl(),
+        )
 
 
 # Подтверждение отправки рассылки
@@ -118,49 +130,61 @@ async def functions_mail_get(message: Message, bot: Bot, state: FSM, arSession:
 async def functions_mail_confirm(call: CallbackQuery, bot: Bot, state: FSM, arSession: ARS):
     get_action = call.data.split(":")[1]
 
-    get_users = Userx.get_all()
+    users_count = await Userx.acount(user_active=1)
 
-    send_message = (await state.get_data())['here_mail_text']
+    mail_content = (await state.get_data())['here_mail_content']
     await state.clear()
 
     if get_action == "yes":
-        await call.message.edit_text(f"<b>📢 Рассылка началась... (0/{len(get_users)})</b>")
+        await call.message.edit_text(f"<b>📢 Рассылка началась... (0/{users_count})</b>")
+
+        mail_id = await Mailx.aadd(
+            call.from_user.id,
+            progress_chat_id=call.message.chat.id,
+            progress_message_id=call.message.message_id,
+            **mail_content,
+        )
 
-        await asyncio.create_task(functions_mail_make(bot, send_message, call))
+        mail_start(bot, mail_id)
     else:
         await call.message.edit_text("<b>📢 Вы отменили отправку рассылки ✅</b>")
 
 
-# Сама отправка рассылки
-async def functions_mail_make(bot: Bot, text: str, call: CallbackQuery):
-    users_receive, users_block, users_count = 0, 0, 0
-
-    get_users = Userx.get_all()
-    get_time = get_unix()
-
-    for user in get_users:
-        try:
-            await bot.send_message(user.user_id, text)
-            users_receive += 1
-        except:
-            users_block += 1
-
-        users_count += 1
-
-        if users_count % 10 == 0:
-            await call.message.edit_text(f"<b>📢 Рассылка началась... ({users_count}/{len(get_users)})</b>")
+# Пауза, продолжение и отмена рассылки
+@router.callback_query(F.data.startswith("mail_control:"), IsAdmin())
+async def functions_mail_control(call: CallbackQuery, bot: Bot, state: FSM, arSession: ARS):
+    get_action = call.data.split(":")[1]
+    mail_id = int(call.data.split(":")[2])
+
+    get_mail = await Mailx.aget(mail_id=mail_id)
+
+    if get_mail is None or get_mail.mail_status in ("cancelled", "done"):
+        return await call.answer("❗ Рассылка уже завершена", True)
+
+    if get_action == "pause" and get_mail.mail_status == "active":
+        await Mailx.aupdate(mail_id, mail_status="paused")
+        await call.answer("⏸ Рассылка ставится на паузу")
+        await mail_stop(mail_id)
+    elif get_action == "resume" and get_mail.mail_status == "paused":
+        await Mailx.aupdate(mail_id, mail_status="active")
+        await call.answer("▶️ Рассылка продолжена")
+        mail_start(bot, mail_id)
+    elif get_action == "cancel":
+        await Mailx.aupdate(mail_id, mail_status="cancelled")
+        await call.answer("⛔ Рассылка отменяется")
+        await mail_stop(mail_id)
+    else:
+        return await call.answer()
 
-        await asyncio.sleep(0.07)
+    get_mail = await Mailx.aget(mail_id=mail_id)
 
-    await call.message.edit_text(
-        ded(f"""
-            <b>📢 Рассылка была завершена за <code>{get_unix() - get_time}сек</code></b>
-            ➖➖➖➖➖➖➖➖➖➖
-            👤 Всего пользователей: <code>{len(get_users)}</code>
-            ✅ Пользователей получило сообщение: <code>{users_receive}</code>
-            ❌ Пользователей не получило сообщение: <code>{users_block}</code>
-        """)
-    )
+    try:
+        await call.message.edit_text(
+            mail_open_admin(get_mail, await Mailx.aget_statuses(mail_id)),
+            reply_markup=mail_control_finl(mail_id, get_mail.mail_status),
+        )
+    except:
+        ...
 
 
 ############################## УПРАВЛЕНИЕ ПРОФИЛЕМ #############################
@@ -169,7 +193,7 @@ async def functions_mail_make(bot: Bot, text: str, call: CallbackQuery):
 async def functions_profile_refresh(call: CallbackQuery, bot: Bot, state: FSM, arSession: ARS):
     user_id = call.data.split(":")[1]
 
-    get_user = Userx.get(user_id=user_id)
+    get_user = await Userx.aget(user_id=user_id)
 
     await state.clear()
 
@@ -182,8 +206,8 @@ async def functions_profile_refresh(call: CallbackQuery, bot: Bot, state: FSM, a
 async def functions_profile_purchases(call: CallbackQuery, bot: Bot, state: FSM, arSession: ARS):
     user_id = call.data.split(":")[1]
 
-    get_user = Userx.get(user_id=user_id)
-    get_purchases = Purchasesx.gets(user_id=call.from_user.id)
+    get_user = await Userx.aget(user_id=user_id)
+    get_purchases = await Purchasesx.agets(user_id=user_id)
     get_purchases = get_purchases[-10:]
 
     if len(get_purchases) < 1:
@@ -192,19 +216,14 @@ async def functions_profile_purchases(call: CallbackQuery, bot: Bot, state: FSM,
     await call.answer("🎁 Последние 10 покупок")
     await del_message(call.message)
 
-    for purchase in get_purchases:
-        link_items = await upload_text(arSession, purchase.purchase_data)
-
-        await call.message.answer(
-            ded(f"""
-                <b>🧾 Чек: <code>#{purchase.purchase_receipt}</code></b>
-                🎁 Товар: <code>{purchase.purchase_position_name} | {purchase.purchase_count}шт | {purchase.purchase_price}₽</code>
-                🕰 Дата покупки: <code>{convert_date(purchase.purchase_unix)}</code>
-                🔗 Товары: <a href='{link_items}'>кликабельно</a>
-            """)
-        )
-
-        await asyncio.sleep(0.2)
+    await call.message.answer_document(
+        get_purchases_file(get_purchases, f"purchases_{user_id}.txt"),
+        caption=ded(f"""
+            <b>🎁 Последние покупки пользователя: <code>{len(get_purchases)}шт</code></b>
+            ▪️ Пользователь: <a href='tg://user?id={get_user.user_id}'>{get_user.user_name}</a> | <code>{get_user.user_id}</code>
+            ▪️ Чеки: <code>{', '.join(f"#{purchase.purchase_receipt}" for purchase in get_purchases)}</code>
+        """),
+    )
 
     await open_profile_admin(bot, call.from_user.id, get_user)
 
@@ -244,8 +263,8 @@ async def functions_profile_balance_add_get(message: Message, bot: Bot, state: F
 
     await state.clear()
 
-    get_user = Userx.get(user_id=user_id)
-    Userx.update(
+    get_user = await Userx.aget(user_id=user_id)
+    await Userx.aupdate(
         user_id,
         user_balance=round(get_user.user_balance + to_number(message.text), 2),
         user_give=round(get_user.user_give + to_number(message.text), 2),
@@ -302,14 +321,14 @@ async def functions_profile_balance_set_get(message: Message, bot: Bot, state: F
 
     await state.clear()
 
-    get_user = Userx.get(user_id=user_id)
+    get_user = await Userx.aget(user_id=user_id)
 
     if to_number(message.text) > get_user.user_balance:
         user_give = get_user.user_give + to_number(message.text)
     else:
         user_give = get_user.user_give
 
-    Userx.update(
+    await Userx.aupdate(
         user_id,
         user_balance=to_number(message.text),
         user_give=user_give,
@@ -345,7 +364,7 @@ async def functions_profile_user_message_get(message: Message, bot: Bot, state:
     await state.clear()
 
     get_message = "<b>💌 Сообщение от администратора:</b>\n" + f"<code>{clear_html(message.text)}</code>"
-    get_user = Userx.get(user_id=user_id)
+    get_user = await Userx.aget(user_id=user_id)
 
     try:
         await bot.send_message(user_id, get_message)
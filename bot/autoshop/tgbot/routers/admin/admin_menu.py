@@ -8,10 +8,15 @@ from aiogram.types import Message, FSInputFile
 from aiogram.utils.media_group import MediaGroupBuilder
 
 from tgbot.data.config import PATH_LOGS, PATH_DATABASE
+from tgbot.database.db_helper import checkpoint_dbx, run_dbx
+from tgbot.database.db_outbox import Outboxx
+from tgbot.database.db_stats import Statsx
 from tgbot.keyboards.reply_main import payments_frep, settings_frep, functions_frep, items_frep
+from tgbot.services.outbox import OUTBOX
 from tgbot.utils.const_functions import get_date
 from tgbot.utils.misc.bot_models import FSM, ARS
 from tgbot.utils.misc_functions import get_statistics
+from tgbot.utils.text_functions import get_status_admin
 
 router = Router(name=__name__)
 
@@ -65,7 +70,41 @@ async def admin_products(message: Message, bot: Bot, state: FSM, arSession: ARS)
 async def admin_statistics(message: Message, bot: Bot, state: FSM, arSession: ARS):
     await state.clear()
 
-    await message.answer(get_statistics())
+    await message.answer(await run_dbx(get_statistics))
+
+
+# Пересборка статистики из истории покупок, пополнений и пользователей
+@router.message(Command(commands=['stats_rebuild']))
+async def admin_statistics_rebuild(message: Message, bot: Bot, state: FSM, arSession: ARS):
+    await state.clear()
+
+    cache_message = await message.answer("<b>⌛ Ждите, статистика пересобирается...</b>")
+
+    stats_count = await Statsx.arebuild()
+
+    await cache_message.edit_text(
+        f"<b>📊 Статистика была успешно пересобрана ✅</b>\n"
+        f"▪️ Записей статистики: <code>{stats_count}шт</code>",
+    )
+
+
+# Состояние интеграции с сервером Mini App (задержки запросов, очередь событий)
+@router.message(Command(commands=['status']))
+async def admin_status(message: Message, bot: Bot, state: FSM, arSession: ARS):
+    await state.clear()
+
+    await message.answer(await get_status_admin())
+
+
+# Возврат отложенных событий для сервера Mini App в очередь
+@router.message(Command(commands=['outbox_retry']))
+async def admin_outbox_retry(message: Message, bot: Bot, state: FSM, arSession: ARS):
+    await state.clear()
+
+    events_count = await Outboxx.arequeue_dead()
+    OUTBOX.wake()
+
+    await message.answer(f"<b>📡 Событий возвращено в очередь: <code>{events_count}шт</code></b>")
 
 
 # Получение БД
@@ -73,6 +112,8 @@ async def admin_statistics(message: Message, bot: Bot, state: FSM, arSession: AR
 async def admin_database(message: Message, bot: Bot, state: FSM, arSession: ARS):
     await state.clear()
 
+    await run_dbx(checkpoint_dbx)
+
     await message.answer_document(
         FSInputFile(PATH_DATABASE),
         caption=f"<b>📦 #BACKUP | <code>{get_date(full=False)}</code></b>",
@@ -22,7 +22,7 @@ async def payment_methods(message: Message, bot: Bot, state: FSM, arSession: ARS
 
     await message.answer(
         "<b>🖲 Выберите способы пополнений</b>",
-        reply_markup=payment_method_finl(),
+        reply_markup=await payment_method_finl(),
     )
 
 
@@ -31,27 +31,27 @@ async def payment_methods(message: Message, bot: Bot, state: FSM, arSession: ARS
 async def payment_methods_edit(call: CallbackQuery, bot: Bot, state: FSM, arSession: ARS):
     way_pay         = call.data.split(":")[1]
     way_status      = call.data.split(":")[2]
-    get_payment     = Paymentsx.get()
+    get_payment     = await Paymentsx.aget()
 
     if way_pay == "QIWI":
         if way_status == "True" and get_payment.qiwi_login == "None":
             return await call.answer("❗ Добавьте QIWI кошелёк перед включением Способов пополнений", True)
 
-        Paymentsx.update(way_qiwi=way_status)
+        await Paymentsx.aupdate(way_qiwi=way_status)
     elif way_pay == "Yoomoney":
         if way_status == "True" and get_payment.yoomoney_token == "None":
             return await call.answer("❗ Добавьте ЮMoney кошелёк перед включением Способов пополнений", True)
 
-        Paymentsx.update(way_yoomoney=way_status)
+        await Paymentsx.aupdate(way_yoomoney=way_status)
     elif way_pay == "CactusPay":
         if way_status == "True" and get_payment.cactuspay_token == "None":
             return await call.answer("❗ Добавьте CactusPay кошелёк перед включением Способов пополнений", True)
 
-        Paymentsx.update(way_cactuspay=way_status)
+        await Paymentsx.aupdate(way_cactuspay=way_status)
 
     await call.message.edit_text(
         "<b>🖲 Выберите способы пополнений</b>",
-        reply_markup=payment_method_finl(),
+        reply_markup=await payment_method_finl(),
     )
 
 
@@ -103,7 +103,7 @@ async def payment_qiwi_edit_token(message: Message, bot: Bot, state: FSM, arSess
 
     await state.clear()
 
-    Paymentsx.update(
+    await Paymentsx.aupdate(
         cactuspay_token=message.text,
     )
 
@@ -191,7 +191,7 @@ async def payment_yoomoney_edit_token(message: Message, bot: Bot, state: FSM, ar
     ).authorization_enter(str(get_code))
 
     if status:
-        Paymentsx.update(yoomoney_token=token)
+        await Paymentsx.aupdate(yoomoney_token=token)
 
     await cache_message.edit_text(response)
 
@@ -281,7 +281,7 @@ async def payment_qiwi_edit_token(message: Message, bot: Bot, state: FSM, arSess
     ).edit()
 
     if status:
-        Paymentsx.update(
+        await Paymentsx.aupdate(
             qiwi_login=qiwi_login,
             qiwi_token=qiwi_token,
         )
@@ -1,8 +1,13 @@
 # - *- coding: utf- 8 - *-
+import asyncio
+import time
+from itertools import islice
+
 from aiogram import Router, Bot, F
 from aiogram.filters import StateFilter
 from aiogram.types import CallbackQuery, Message
 
+from tgbot.data.config import ITEMS_FILE_TYPES, ITEMS_FILE_CHUNK, ITEMS_FILE_PROGRESS
 from tgbot.database.db_category import Categoryx
 from tgbot.database.db_item import Itemx
 from tgbot.database.db_position import Positionx
@@ -17,9 +22,9 @@ from tgbot.keyboards.inline_admin_prod import (category_edit_delete_finl, positi
                                                category_edit_cancel_finl, products_removes_finl,
                                                products_removes_categories_finl, products_removes_positions_finl,
                                                products_removes_items_finl, item_add_finish_finl)
-from tgbot.utils.const_functions import clear_list, is_number, to_number, del_message, ded, get_unix, clear_html
+from tgbot.utils.const_functions import is_number, to_number, del_message, ded, get_unix, clear_html
 from tgbot.utils.misc.bot_models import FSM, ARS
-from tgbot.utils.misc_functions import upload_text, upload_photo
+from tgbot.utils.misc_functions import upload_photo, get_text_file, get_items_delimiter, parse_items_file
 from tgbot.utils.text_functions import category_open_admin, position_open_admin, item_open_admin
 
 router = Router(name=__name__)
@@ -39,12 +44,12 @@ async def prod_category_add(message: Message, bot: Bot, state: FSM, arSession: A
 async def prod_category_edit(message: Message, bot: Bot, state: FSM, arSession: ARS):
     await state.clear()
 
-    get_categories = Categoryx.get_all()
+    get_categories = await Categoryx.aget_all()
 
     if len(get_categories) >= 1:
         await message.answer(
             "<b>🗃 Выберите категорию для изменения 🖍</b>",
-            reply_markup=category_edit_swipe_fp(0),
+            reply_markup=await category_edit_swipe_fp(0),
         )
     else:
         await message.answer("<b>❌ Отсутствуют категории для изменения категорий</b>")
@@ -55,12 +60,12 @@ async def prod_category_edit(message: Message, bot: Bot, state: FSM, arSession:
 async def prod_position_add(message: Message, bot: Bot, state: FSM, arSession: ARS):
     await state.clear()
 
-    get_categories = Categoryx.get_all()
+    get_categories = await Categoryx.aget_all()
 
     if len(get_categories) >= 1:
         await message.answer(
             "<b>📁 Выберите категорию для позиции ➕</b>",
-            reply_markup=position_add_swipe_fp(0),
+            reply_markup=await position_add_swipe_fp(0),
         )
     else:
         await message.answer("<b>❌ Отсутствуют категории для создания позиции</b>")
@@ -71,12 +76,12 @@ async def prod_position_add(message: Message, bot: Bot, state: FSM, arSession: A
 async def prod_position_edit(message: Message, bot: Bot, state: FSM, arSession: ARS):
     await state.clear()
 
-    get_categories = Categoryx.get_all()
+    get_categories = await Categoryx.aget_all()
 
     if len(get_categories) >= 1:
         await message.answer(
             "<b>📁 Выберите позицию для изменения 🖍</b>",
-            reply_markup=position_edit_category_swipe_fp(0),
+            reply_markup=await position_edit_category_swipe_fp(0),
         )
     else:
         await message.answer("<b>❌ Отсутствуют категории для изменения позиций</b>")
@@ -87,12 +92,12 @@ async def prod_position_edit(message: Message, bot: Bot, state: FSM, arSession:
 async def prod_item_add(message: Message, bot: Bot, state: FSM, arSession: ARS):
     await state.clear()
 
-    get_categories = Categoryx.get_all()
+    get_categories = await Categoryx.aget_all()
 
     if len(get_categories) >= 1:
         await message.answer(
             "<b>🎁 Выберите позицию для товаров ➕</b>",
-            reply_markup=item_add_category_swipe_fp(0),
+            reply_markup=await item_add_category_swipe_fp(0),
         )
     else:
         await message.answer("<b>❌ Отсутствуют позиции для добавления товара</b>")
@@ -123,7 +128,7 @@ async def prod_category_add_name_get(message: Message, bot: Bot, state: FSM, arS
     await state.clear()
 
     category_id = get_unix()
-    Categoryx.add(category_id, clear_html(message.text))
+    await Categoryx.aadd(category_id, clear_html(message.text))
 
     await category_open_admin(bot, message.from_user.id, category_id, 0)
 
@@ -137,7 +142,7 @@ async def prod_category_edit_swipe(call: CallbackQuery, bot: Bot, state: FSM, ar
 
     await call.message.edit_text(
         "<b>🗃 Выберите категорию для изменения 🖍</b>",
-        reply_markup=category_edit_swipe_fp(remover),
+        reply_markup=await category_edit_swipe_fp(remover),
     )
 
 
@@ -187,7 +192,7 @@ async def prod_category_edit_name_get(message: Message, bot: Bot, state: FSM, ar
 
     await state.clear()
 
-    Categoryx.update(category_id, category_name=clear_html(message.text))
+    await Categoryx.aupdate(category_id, category_name=clear_html(message.text))
     await category_open_admin(bot, message.from_user.id, category_id, remover)
 
 
@@ -209,18 +214,18 @@ async def prod_category_edit_delete_confirm(call: CallbackQuery, bot: Bot, state
     category_id = call.data.split(":")[1]
     remover = int(call.data.split(":")[2])
 
-    Categoryx.delete(category_id=category_id)
-    Positionx.delete(category_id=category_id)
-    Itemx.delete(category_id=category_id)
+    await Categoryx.adelete(category_id=category_id)
+    await Positionx.adelete(category_id=category_id)
+    await Itemx.adelete(category_id=category_id)
 
     await call.answer("🗃 Категория и все её данные были успешно удалены ✅")
 
-    get_categories = Categoryx.get_all()
+    get_categories = await Categoryx.aget_all()
 
     if len(get_categories) >= 1:
         await call.message.edit_text(
             "<b>🗃 Выберите категорию для изменения 🖍</b>",
-            reply_markup=category_edit_swipe_fp(remover),
+            reply_markup=await category_edit_swipe_fp(remover),
         )
     else:
         await del_message(call.message)
@@ -235,7 +240,7 @@ async def prod_position_add_swipe(call: CallbackQuery, bot: Bot, state: FSM, arS
 
     await call.message.edit_text(
         "<b>📁 Выберите категорию для позиции ➕</b>",
-        reply_markup=position_add_swipe_fp(remover),
+        reply_markup=await position_add_swipe_fp(remover),
     )
 
 
@@ -345,7 +350,7 @@ async def prod_position_add_photo_get(message: Message, bot: Bot, state: FSM, ar
     else:
         position_photo = "None"
 
-    Positionx.add(
+    await Positionx.aadd(
         category_id,
         position_id,
         position_name,
@@ -366,7 +371,7 @@ async def prod_position_edit_category_swipe(call: CallbackQuery, bot: Bot, state
 
     await call.message.edit_text(
         "<b>📁 Выберите позицию для изменения 🖍</b>",
-        reply_markup=position_edit_category_swipe_fp(remover),
+        reply_markup=await position_edit_category_swipe_fp(remover),
     )
 
 
@@ -375,13 +380,13 @@ async def prod_position_edit_category_swipe(call: CallbackQuery, bot: Bot, state
 async def prod_position_edit_category_open(call: CallbackQuery, bot: Bot, state: FSM, arSession: ARS):
     category_id = call.data.split(":")[1]
 
-    get_category = Categoryx.get(category_id=category_id)
-    get_positions = Positionx.gets(category_id=category_id)
+    get_category = await Categoryx.aget(category_id=category_id)
+    get_positions = await Positionx.agets(category_id=category_id)
 
     if len(get_positions) >= 1:
         await call.message.edit_text(
             "<b>📁 Выберите позицию для изменения 🖍</b>",
-            reply_markup=position_edit_swipe_fp(0, category_id),
+            reply_markup=await position_edit_swipe_fp(0, category_id),
         )
     else:
         await call.answer(f"📁 Позиции в категории {get_category.category_name} отсутствуют")
@@ -397,7 +402,7 @@ async def prod_position_edit_swipe(call: CallbackQuery, bot: Bot, state: FSM, ar
 
     await call.message.answer(
         "<b>📁 Выберите позицию для изменения 🖍</b>",
-        reply_markup=position_edit_swipe_fp(remover, category_id),
+        reply_markup=await position_edit_swipe_fp(remover, category_id),
     )
 
 
@@ -453,7 +458,7 @@ async def prod_position_edit_name_get(message: Message, bot: Bot, state: FSM, ar
 
     await state.clear()
 
-    Positionx.update(position_id, position_name=clear_html(message.text))
+    await Positionx.aupdate(position_id, position_name=clear_html(message.text))
     await position_open_admin(bot, message.from_user.id, position_id)
 
 
@@ -502,7 +507,7 @@ async def prod_position_edit_price_get(message: Message, bot: Bot, state: FSM, a
 
     await state.clear()
 
-    Positionx.update(position_id, position_price=to_number(message.text))
+    await Positionx.aupdate(position_id, position_price=to_number(message.text))
     await position_open_admin(bot, message.from_user.id, position_id)
 
 
@@ -564,7 +569,7 @@ async def prod_position_edit_desc_get(message: Message, bot: Bot, state: FSM, ar
 
     await state.clear()
 
-    Positionx.update(position_id, position_desc=position_desc)
+    await Positionx.aupdate(position_id, position_desc=position_desc)
     await position_open_admin(bot, message.from_user.id, position_id)
 
 
@@ -607,7 +612,7 @@ async def prod_position_edit_photo_get(message: Message, bot: Bot, state: FSM, a
     else:
         position_photo = "None"
 
-    Positionx.update(position_id, position_photo=position_photo)
+    await Positionx.aupdate(position_id, position_photo=position_photo)
     await position_open_admin(bot, message.from_user.id, position_id)
 
 
@@ -618,16 +623,15 @@ async def prod_position_edit_items(call: CallbackQuery, bot: Bot, state: FSM, ar
     category_id = call.data.split(":")[2]
     remover = int(call.data.split(":")[3])
 
-    get_position = Positionx.get(position_id=position_id)
-    get_items = Itemx.gets(position_id=position_id)
+    get_position = await Positionx.aget(position_id=position_id)
+    get_items = await Itemx.agets(position_id=position_id)
 
     if len(get_items) >= 1:
         save_items = "\n\n".join([item.item_data for item in get_items])
-        save_items = await upload_text(arSession, save_items)
 
-        await call.message.answer(
-            f"<b>📥 Все товары позиции: <code>{get_position.position_name}</code>\n"
-            f"🔗 Ссылка: <a href='{save_items}'>кликабельно</a></b>",
+        await call.message.answer_document(
+            get_text_file(save_items, f"items_{position_id}.txt"),
+            caption=f"<b>📥 Все товары позиции: <code>{get_position.position_name}</code> | <code>{len(get_items)}шт</code></b>",
             reply_markup=close_finl(),
         )
         await call.answer(cache_time=5)
@@ -657,15 +661,15 @@ async def prod_position_edit_delete_confirm(call: CallbackQuery, bot: Bot, state
     category_id = call.data.split(":")[2]
     remover = int(call.data.split(":")[3])
 
-    Itemx.delete(position_id=position_id)
-    Positionx.delete(position_id=position_id)
+    await Itemx.adelete(position_id=position_id)
+    await Positionx.adelete(position_id=position_id)
 
     await call.answer("📁 Вы успешно удалили позицию и её товары ✅")
 
-    if len(Positionx.gets(category_id=category_id)) >= 1:
+    if len(await Positionx.agets(category_id=category_id)) >= 1:
         await call.message.edit_text(
             "<b>📁 Выберите позицию для изменения 🖍</b>",
-            reply_markup=position_edit_swipe_fp(remover, category_id),
+            reply_markup=await position_edit_swipe_fp(remover, category_id),
         )
     else:
         await del_message(call.message)
@@ -693,7 +697,7 @@ async def prod_position_edit_clear_confirm(call: CallbackQuery, bot: Bot, state:
     category_id = call.data.split(":")[2]
     remover = int(call.data.split(":")[3])
 
-    Itemx.delete(position_id=position_id)
+    await Itemx.adelete(position_id=position_id)
     await call.answer("📁 Вы успешно удалили все товары в позиции ✅")
 
     await del_message(call.message)
@@ -710,7 +714,7 @@ async def prod_item_add_category_swipe(call: CallbackQuery, bot: Bot, state: FSM
 
     await call.message.edit_text(
         "<b>🎁 Выберите позицию для товаров ➕</b>",
-        reply_markup=item_add_category_swipe_fp(remover),
+        reply_markup=await item_add_category_swipe_fp(remover),
     )
 
 
@@ -720,15 +724,15 @@ async def prod_item_add_category_open(call: CallbackQuery, bot: Bot, state: FSM,
     category_id = call.data.split(":")[1]
     remover = int(call.data.split(":")[2])
 
-    get_category = Categoryx.get(category_id=category_id)
-    get_positions = Positionx.gets(category_id=category_id)
+    get_category = await Categoryx.aget(category_id=category_id)
+    get_positions = await Positionx.agets(category_id=category_id)
 
     await del_message(call.message)
 
     if len(get_positions) >= 1:
         await call.message.answer(
             "<b>🎁 Выберите позицию для товаров ➕</b>",
-            reply_markup=item_add_position_swipe_fp(0, category_id),
+            reply_markup=await item_add_position_swipe_fp(0, category_id),
         )
     else:
         await call.answer(f"🎁 Позиции в категории {get_category.category_name} отсутствуют")
@@ -742,7 +746,7 @@ async def prod_item_add_position_swipe(call: CallbackQuery, bot: Bot, state: FSM
 
     await call.message.edit_text(
         "<b>🎁 Выберите позицию для товаров ➕</b>",
-        reply_markup=item_add_position_swipe_fp(remover, category_id),
+        reply_markup=await item_add_position_swipe_fp(remover, category_id),
     )
 
 
@@ -768,6 +772,9 @@ async def prod_item_add_position_open(call: CallbackQuery, bot: Bot, state: FSM,
             Данные товара...
 
             Данные товара...</code>
+
+            📄 Можно отправить файл <code>.txt</code> или <code>.csv</code>.
+            В подписи к файлу можно указать разделитель товаров, например <code>\\n</code> - по одному товару на строку.
         """),
         reply_markup=item_add_finish_finl(position_id),
     )
@@ -799,33 +806,97 @@ async def prod_item_add_finish(call: CallbackQuery, bot: Bot, state: FSM, arSess
 async def prod_item_add_get(message: Message, bot: Bot, state: FSM, arSession: ARS):
     cache_message = await message.answer("<b>⌛ Ждите, товары добавляются...</b>")
 
-    count_add = 0
-    get_items = clear_list(message.text.split("\n\n"))
-
-    for check_item in get_items:
-        if not check_item.isspace() and check_item != "":
-            count_add += 1
-
     count_item = (await state.get_data())['here_add_item_count']
     category_id = (await state.get_data())['here_add_item_category_id']
     position_id = (await state.get_data())['here_add_item_position_id']
 
-    await state.update_data(here_add_item_count=count_item + count_add)
-
-    get_user = Userx.get(user_id=message.from_user.id)
-    Itemx.add(
+    get_user = await Userx.aget(user_id=message.from_user.id)
+    count_add, _ = await Itemx.aadd_bulk(
         get_user.user_id,
         category_id,
         position_id,
-        get_items,
+        message.text.split("\n\n"),
     )
 
+    await state.update_data(here_add_item_count=count_item + count_add)
+
     await cache_message.edit_text(
         f"<b>📥 Товары в кол-ве <u>{count_add}шт</u> были успешно добавлены ✅</b>",
         reply_markup=item_add_finish_finl(position_id),
     )
 
 
+# Принятие файла с товарами
+@router.message(F.document, StateFilter('here_add_items'), flags={'rate': 0})
+async def prod_item_add_document(message: Message, bot: Bot, state: FSM, arSession: ARS):
+    file_name = message.document.file_name or ""
+    file_type = file_name.split(".")[-1].lower() if "." in file_name else ""
+    delimiter = get_items_delimiter(message.caption)
+
+    position_id = (await state.get_data())['here_add_item_position_id']
+
+    if file_type not in ITEMS_FILE_TYPES:
+        return await message.answer(
+            "<b>❌ Поддерживаются только файлы <code>.txt</code> и <code>.csv</code></b>",
+            reply_markup=item_add_finish_finl(position_id),
+        )
+
+    if file_type == "csv" and delimiter is not None and len(delimiter) != 1:
+        return await message.answer(
+            "<b>❌ Разделитель колонок .csv файла должен быть одним символом</b>",
+            reply_markup=item_add_finish_finl(position_id),
+        )
+
+    if message.document.file_size is not None and message.document.file_size > 20 * 1024 * 1024:
+        return await message.answer(
+            "<b>❌ Файл слишком большой, максимальный размер - 20МБ</b>",
+            reply_markup=item_add_finish_finl(position_id),
+        )
+
+    cache_message = await message.answer("<b>⌛ Ждите, файл загружается...</b>")
+
+    count_item = (await state.get_data())['here_add_item_count']
+    category_id = (await state.get_data())['here_add_item_category_id']
+
+    get_user = await Userx.aget(user_id=message.from_user.id)
+    get_file = await bot.download(message.document)
+    get_items = parse_items_file(get_file, file_type, delimiter)
+
+    count_add, count_progress, time_start = 0, 0, time.perf_counter()
+
+    while True:
+        # Разбор файла идёт в отдельном потоке, чтобы большой файл не блокировал другие апдейты
+        items_chunk = await asyncio.to_thread(list, islice(get_items, ITEMS_FILE_CHUNK))
+
+        if len(items_chunk) == 0:
+            break
+
+        count_chunk, _ = await Itemx.aadd_bulk(
+            get_user.user_id,
+            category_id,
+            position_id,
+            items_chunk,
+        )
+        count_add += count_chunk
+
+        if count_add - count_progress >= ITEMS_FILE_PROGRESS:
+            count_progress = count_add
+
+            await cache_message.edit_text(
+                f"<b>⌛ Ждите, товары добавляются... Добавлено: <code>{count_add}шт</code></b>",
+            )
+
+    await state.update_data(here_add_item_count=count_item + count_add)
+
+    items_speed = count_add / max(time.perf_counter() - time_start, 0.001)
+
+    await cache_message.edit_text(
+        f"<b>📥 Товары в кол-ве <u>{count_add}шт</u> были успешно добавлены ✅</b>\n"
+        f"⚡ Скорость загрузки: <code>{items_speed:.0f}шт/сек</code>",
+        reply_markup=item_add_finish_finl(position_id),
+    )
+
+
 ################################################################################
 ############################### УДАЛЕНИЕ ТОВАРОВ ###############################
 # Страницы удаления товаров
@@ -835,15 +906,15 @@ async def prod_item_delete_swipe(call: CallbackQuery, bot: Bot, state: FSM, arSe
     category_id = call.data.split(":")[2]
     remover = int(call.data.split(":")[3])
 
-    get_items = Itemx.gets(position_id=position_id)
-    get_position = Positionx.get(position_id=position_id)
+    get_items = await Itemx.acount(position_id=position_id)
+    get_position = await Positionx.aget(position_id=position_id)
 
     await del_message(call.message)
 
-    if len(get_items) >= 1:
+    if get_items >= 1:
         await call.message.answer(
             "<b>🎁 Выберите товар для удаления</b>",
-            reply_markup=item_delete_swipe_fp(remover, position_id, category_id),
+            reply_markup=await item_delete_swipe_fp(remover, position_id, category_id),
         )
     else:
         await call.answer(f"🎁 Товары в позиции {get_position.position_name} отсутствуют")
@@ -863,10 +934,11 @@ async def prod_item_delete_open(call: CallbackQuery, bot: Bot, state: FSM, arSes
 async def prod_item_delete_confirm_open(call: CallbackQuery, bot: Bot, state: FSM, arSession: ARS):
     item_id = call.data.split(":")[1]
 
-    get_item = Itemx.get(item_id=item_id)
-    get_items = Itemx.gets(position_id=get_item.position_id)
+    get_item = await Itemx.aget(item_id=item_id)
 
-    Itemx.delete(item_id=item_id)
+    await Itemx.adelete(item_id=item_id)
+
+    get_items = await Itemx.acount(position_id=get_item.position_id)
 
     await call.message.edit_text(
         f"<b>✅ Товар был успешно удалён</b>\n"
@@ -874,10 +946,10 @@ async def prod_item_delete_confirm_open(call: CallbackQuery, bot: Bot, state: FS
         f"🎁️ Товар: <code>{get_item.item_data}</code>"
     )
 
-    if len(get_items) >= 1:
+    if get_items >= 1:
         await call.message.answer(
             "<b>🎁 Выберите товар для удаления</b>",
-            reply_markup=item_delete_swipe_fp(0, get_item.position_id, get_item.category_id),
+            reply_markup=await item_delete_swipe_fp(0, get_item.position_id, get_item.category_id),
         )
 
 
@@ -897,9 +969,9 @@ async def prod_removes_return(call: CallbackQuery, bot: Bot, state: FSM, arSessi
 # Удаление всех категорий
 @router.callback_query(F.data == "prod_removes_categories")
 async def prod_removes_categories(call: CallbackQuery, bot: Bot, state: FSM, arSession: ARS):
-    get_categories = len(Categoryx.get_all())
-    get_positions = len(Positionx.get_all())
-    get_items = len(Itemx.get_all())
+    get_categories = len(await Categoryx.aget_all())
+    get_positions = len(await Positionx.aget_all())
+    get_items = await Itemx.acount()
 
     await call.message.edit_text(
         f"<b>❌ Вы действительно хотите удалить все категории, позиции и товары?</b>\n"
@@ -913,13 +985,13 @@ async def prod_removes_categories(call: CallbackQuery, bot: Bot, state: FSM, arS
 # Подтверждение удаления всех категорий (позиций и товаров включительно)
 @router.callback_query(F.data == "prod_removes_categories_confirm")
 async def prod_removes_categories_confirm(call: CallbackQuery, bot: Bot, state: FSM, arSession: ARS):
-    get_categories = len(Categoryx.get_all())
-    get_positions = len(Positionx.get_all())
-    get_items = len(Itemx.get_all())
+    get_categories = len(await Categoryx.aget_all())
+    get_positions = len(await Positionx.aget_all())
+    get_items = await Itemx.acount()
 
-    Categoryx.clear()
-    Positionx.clear()
-    Itemx.clear()
+    await Categoryx.aclear()
+    await Positionx.aclear()
+    await Itemx.aclear()
 
     await call.message.edit_text(
         f"<b>✅ Вы успешно удалили все категории</b>\n"
@@ -932,8 +1004,8 @@ async def prod_removes_categories_confirm(call: CallbackQuery, bot: Bot, state:
 # Удаление всех позиций
 @router.callback_query(F.data == "prod_removes_positions")
 async def prod_removes_positions(call: CallbackQuery, bot: Bot, state: FSM, arSession: ARS):
-    get_positions = len(Positionx.get_all())
-    get_items = len(Itemx.get_all())
+    get_positions = len(await Positionx.aget_all())
+    get_items = await Itemx.acount()
 
     await call.message.edit_text(
         f"<b>❌ Вы действительно хотите удалить все позиции и товары?</b>\n"
@@ -946,11 +1018,11 @@ async def prod_removes_positions(call: CallbackQuery, bot: Bot, state: FSM, arSe
 # Подтверждение удаления всех позиций (товаров включительно)
 @router.callback_query(F.data == "prod_removes_positions_confirm")
 async def prod_position_remove(call: CallbackQuery, bot: Bot, state: FSM, arSession: ARS):
-    get_positions = len(Positionx.get_all())
-    get_items = len(Itemx.get_all())
+    get_positions = len(await Positionx.aget_all())
+    get_items = await Itemx.acount()
 
-    Positionx.clear()
-    Itemx.clear()
+    await Positionx.aclear()
+    await Itemx.aclear()
 
     await call.message.edit_text(
         f"<b>✅ Вы успешно удалили все позиции</b>\n"
@@ -962,7 +1034,7 @@ async def prod_position_remove(call: CallbackQuery, bot: Bot, state: FSM, arSess
 # Удаление всех товаров
 @router.callback_query(F.data == "prod_removes_items")
 async def prod_removes_items(call: CallbackQuery, bot: Bot, state: FSM, arSession: ARS):
-    get_items = len(Itemx.get_all())
+    get_items = await Itemx.acount()
 
     await call.message.edit_text(
         f"<b>❌ Вы действительно хотите удалить все товары?</b>\n"
@@ -974,9 +1046,9 @@ async def prod_removes_items(call: CallbackQuery, bot: Bot, state: FSM, arSessio
 # Согласие на удаление всех товаров
 @router.callback_query(F.data == "prod_removes_items_confirm")
 async def prod_item_remove(call: CallbackQuery, bot: Bot, state: FSM, arSession: ARS):
-    get_items = len(Itemx.get_all())
+    get_items = await Itemx.acount()
 
-    Itemx.clear()
+    await Itemx.aclear()
 
     await call.message.edit_text(
         f"<b>✅ Вы успешно удалили все товары</b>\n"
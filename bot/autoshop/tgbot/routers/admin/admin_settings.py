@@ -19,7 +19,7 @@ async def settings_data_edit(message: Message, bot: Bot, state: FSM, arSession:
 
     await message.answer(
         "<b>🖍 Изменение данных бота.</b>",
-        reply_markup=settings_open_finl(),
+        reply_markup=await settings_open_finl(),
     )
 
 
@@ -30,7 +30,7 @@ async def settings_turn_edit(message: Message, bot: Bot, state: FSM, arSession:
 
     await message.answer(
         "<b>🕹 Включение и выключение основных функций</b>",
-        reply_markup=turn_open_finl(),
+        reply_markup=await turn_open_finl(),
     )
 
 
@@ -40,8 +40,8 @@ async def settings_turn_edit(message: Message, bot: Bot, state: FSM, arSession:
 async def settings_turn_work(call: CallbackQuery, bot: Bot, state: FSM, arSession: ARS):
     get_status = call.data.split(":")[1]
 
-    get_user = Userx.get(user_id=call.from_user.id)
-    Settingsx.update(status_work=get_status)
+    get_user = await Userx.aget(user_id=call.from_user.id)
+    await Settingsx.aupdate(status_work=get_status)
 
     if get_status == "True":
         send_text = "🔴 Отправил бота на технические работы."
@@ -55,7 +55,7 @@ async def settings_turn_work(call: CallbackQuery, bot: Bot, state: FSM, arSessio
         not_me=get_user.user_id,
     )
 
-    await call.message.edit_reply_markup(reply_markup=turn_open_finl())
+    await call.message.edit_reply_markup(reply_markup=await turn_open_finl())
 
 
 # Включение/выключение покупок
@@ -63,8 +63,8 @@ async def settings_turn_work(call: CallbackQuery, bot: Bot, state: FSM, arSessio
 async def settings_turn_buy(call: CallbackQuery, bot: Bot, state: FSM, arSession: ARS):
     get_status = call.data.split(":")[1]
 
-    get_user = Userx.get(user_id=call.from_user.id)
-    Settingsx.update(status_buy=get_status)
+    get_user = await Userx.aget(user_id=call.from_user.id)
+    await Settingsx.aupdate(status_buy=get_status)
 
     if get_status == "True":
         send_text = "🟢 Включил покупки в боте."
@@ -78,7 +78,7 @@ async def settings_turn_buy(call: CallbackQuery, bot: Bot, state: FSM, arSession
         not_me=get_user.user_id,
     )
 
-    await call.message.edit_reply_markup(reply_markup=turn_open_finl())
+    await call.message.edit_reply_markup(reply_markup=await turn_open_finl())
 
 
 # Включение/выключение пополнений
@@ -86,8 +86,8 @@ async def settings_turn_buy(call: CallbackQuery, bot: Bot, state: FSM, arSession
 async def settings_turn_pay(call: CallbackQuery, bot: Bot, state: FSM, arSession: ARS):
     get_status = call.data.split(":")[1]
 
-    get_user = Userx.get(user_id=call.from_user.id)
-    Settingsx.update(status_refill=get_status)
+    get_user = await Userx.aget(user_id=call.from_user.id)
+    await Settingsx.aupdate(status_refill=get_status)
 
     if get_status == "True":
         send_text = "🟢 Включил пополнения в боте."
@@ -101,7 +101,7 @@ async def settings_turn_pay(call: CallbackQuery, bot: Bot, state: FSM, arSession
         not_me=get_user.user_id,
     )
 
-    await call.message.edit_reply_markup(reply_markup=turn_open_finl())
+    await call.message.edit_reply_markup(reply_markup=await turn_open_finl())
 
 
 ############################### ИЗМЕНЕНИЕ ДАННЫХ ###############################
@@ -137,11 +137,11 @@ async def settings_faq_edit(call: CallbackQuery, bot: Bot, state: FSM, arSession
 async def settings_item_hide_edit(call: CallbackQuery, bot: Bot, state: FSM, arSession: ARS):
     status = call.data.split(":")[1]
 
-    Settingsx.update(misc_item_hide=status)
+    await Settingsx.aupdate(misc_item_hide=status)
 
     await call.message.edit_text(
         "<b>🖍 Изменение данных бота.</b>",
-        reply_markup=settings_open_finl(),
+        reply_markup=await settings_open_finl(),
     )
 
 
@@ -156,18 +156,18 @@ async def settings_support_get(message: Message, bot: Bot, state: FSM, arSession
 
     await state.clear()
 
-    Settingsx.update(misc_support=get_support)
+    await Settingsx.aupdate(misc_support=get_support)
 
     await message.answer(
         "<b>🖍 Изменение данных бота.</b>",
-        reply_markup=settings_open_finl(),
+        reply_markup=await settings_open_finl(),
     )
 
 
 # Принятие FAQ
 @router.message(F.text, StateFilter("here_settings_faq"))
 async def settings_faq_get(message: Message, bot: Bot, state: FSM, arSession: ARS):
-    get_message = insert_tags(message.from_user.id, message.text)
+    get_message = await insert_tags(message.from_user.id, message.text)
 
     try:
         await (await message.answer(get_message)).delete()
@@ -178,9 +178,9 @@ async def settings_faq_get(message: Message, bot: Bot, state: FSM, arSession: AR
         )
 
     await state.clear()
-    Settingsx.update(misc_faq=message.text)
+    await Settingsx.aupdate(misc_faq=message.text)
 
     await message.answer(
         "<b>🖍 Изменение данных бота.</b>",
-        reply_markup=settings_open_finl(),
+        reply_markup=await settings_open_finl(),
     )
@@ -5,9 +5,11 @@ from aiogram.types import Message, CallbackQuery
 import aiohttp
 import asyncio
 
-from tgbot.data.config import SERVER_API_URL, PARTNER_API_SECRET
+from tgbot.database.db_outbox import Outboxx
 from tgbot.database.db_settings import Settingsx
 from tgbot.keyboards.inline_user import user_support_finl, user_welcome_finl
+from tgbot.services.api_server import SERVER_API, ServerUnavailable
+from tgbot.services.outbox import OUTBOX
 from tgbot.utils.const_functions import ded
 from tgbot.utils.misc.bot_filters import IsBuy, IsRefill, IsWork
 from tgbot.utils.misc.bot_models import FSM, ARS
@@ -41,7 +43,7 @@ router = Router(name=__name__)
 async def filter_work_message(message: Message, bot: Bot, state: FSM, arSession: ARS):
     await state.clear()
 
-    get_settings = Settingsx.get()
+    get_settings = await Settingsx.aget()
 
     if get_settings.misc_support != "None":
         return await message.answer(
@@ -139,6 +141,7 @@ async def main_start(message: Message, bot: Bot, state: FSM, arSession: ARS):
                     
                     # Попробовать получить фото профиля
                     user_photo_url = None
+                    file_id = None
                     try:
                         photos = await bot.get_user_profile_photos(message.from_user.id, limit=1)
                         if photos.total_count > 0:
@@ -151,58 +154,56 @@ async def main_start(message: Message, bot: Bot, state: FSM, arSession: ARS):
                     print(f"👤 User info: nickname={user_nickname or user_full_name}, photo={bool(user_photo_url)}")
                     
                     # Отправляем на сервер для регистрации
-                    async with aiohttp.ClientSession() as session:
-                        try:
-                            async with session.post(
-                                f"{SERVER_API_URL}/api/referral/register",
-                                json={
-                                    "userId": user_id,
-                                    "referrerId": referrer_id,
-                                    "nickname": user_nickname or user_full_name,
-                                    "photoUrl": user_photo_url
-                                },
-                                headers={
-                                    'X-API-Secret': PARTNER_API_SECRET
-                                },
-                                timeout=aiohttp.ClientTimeout(total=10)
-                            ) as resp:
-                                print(f"📡 Server response status: {resp.status}")
-                                
-                                # Читаем ответ как текст сначала для отладки
-                                response_text = await resp.text()
-                                print(f"📡 Server response text: {response_text[:200]}")
-                                
-                                try:
-                                    import json
-                                    result = json.loads(response_text)
-                                except Exception as json_err:
-                                    print(f"❌ Error parsing JSON response: {json_err}")
-                                    print(f"Response was: {response_text}")
-                                    return
-                                
-                                if resp.status == 200 and result.get('success'):
-                                    # ✅ СОХРАНИТЬ referrer_code в БД
-                                    from tgbot.database.db_users import Userx
-                                    try:
-                                        Userx.update(message.from_user.id, user_referrer=referral_code)
-                                        print(f"💾 Saved referrer code '{referral_code}' for user {user_id}")
-                                    except Exception as db_err:
-                                        print(f"❌ Error saving referrer to DB: {db_err}")
-                                    
-                                    # Убрали сообщение - только логирование
-                                    print(f"✅ Referral registered: {user_id} -> {referrer_id}")
-                                    # НЕ делаем return - пользователь увидит обычное приветствие
-                                elif result.get('message') == 'Already referred':
-                                    # Убрали сообщение - пользователь уже знает
-                                    print(f"ℹ️ User {user_id} already referred")
-                                else:
-                                    print(f"⚠️ Unexpected response: status={resp.status}, result={result}")
-                        except aiohttp.ClientError as e:
-                            print(f"❌ Network error registering referral: {type(e).__name__}: {str(e)}")
-                        except asyncio.TimeoutError:
-                            print(f"❌ Timeout registering referral - server did not respond in 10 seconds")
-                        except Exception as e:
-                            print(f"❌ Error registering referral: {type(e).__name__}: {str(e)}")
+                    try:
+                        status, result = await SERVER_API.post(
+                            "referral",
+                            "/api/referral/register",
+                            json={
+                                "userId": user_id,
+                                "referrerId": referrer_id,
+                                "nickname": user_nickname or user_full_name,
+                                "photoUrl": user_photo_url
+                            },
+                        )
+                        print(f"📡 Server response status: {status}")
+
+                        if result is None:
+                            print("❌ Error parsing JSON response from server")
+                        elif status == 200 and result.get('success'):
+                            # ✅ СОХРАНИТЬ referrer_code в БД
+                            from tgbot.database.db_users import Userx
+                            try:
+                                await Userx.aupdate(message.from_user.id, user_referrer=referral_code)
+                                print(f"💾 Saved referrer code '{referral_code}' for user {user_id}")
+                            except Exception as db_err:
+                                print(f"❌ Error saving referrer to DB: {db_err}")
+                            
+                            # Убрали сообщение - только логирование
+                            print(f"✅ Referral registered: {user_id} -> {referrer_id}")
+                            # НЕ делаем return - пользователь увидит обычное приветствие
+                        elif result.get('message') == 'Already referred':
+                            # Убрали сообщение - пользователь уже знает
+                            print(f"ℹ️ User {user_id} already referred")
+                        else:
+                            print(f"⚠️ Unexpected response: status={status}, result={result}")
+                    except (ServerUnavailable, aiohttp.ClientError, asyncio.TimeoutError) as e:
+                        # Сервер недоступен - регистрация уйдёт в очередь и отправится позже
+                        print(f"⚠️ Referral registration queued: {type(e).__name__}: {str(e)}")
+
+                        await Outboxx.aadd([(
+                            f"referral_register:{user_id}",
+                            "referral_register",
+                            {
+                                'user_id': message.from_user.id,
+                                'referrer_id': referrer_id,
+                                'referral_code': referral_code,
+                                'nickname': user_nickname or user_full_name,
+                                'photo_file_id': file_id,  # Ссылка на фото строится при отправке, токен бота в БД не пишется
+                            },
+                        )])
+                        OUTBOX.wake()
+                    except Exception as e:
+                        print(f"❌ Error registering referral: {type(e).__name__}: {str(e)}")
                 else:
                     print(f"⚠️ User tried to refer themselves: {user_id}")
             except ValueError as e:
@@ -1,18 +1,17 @@
 # - *- coding: utf- 8 - *-
-import asyncio
-
 from aiogram import Router, Bot, F
 from aiogram.filters import Command
 from aiogram.types import CallbackQuery, Message
 
 from tgbot.data.config import BOT_VERSION, get_desc
+from tgbot.database.db_helper import run_dbx
 from tgbot.database.db_purchases import Purchasesx
 from tgbot.database.db_settings import Settingsx
 from tgbot.keyboards.inline_user import user_support_finl
 from tgbot.keyboards.inline_user_page import *
-from tgbot.utils.const_functions import ded, del_message, convert_date
+from tgbot.utils.const_functions import ded, del_message
 from tgbot.utils.misc.bot_models import FSM, ARS
-from tgbot.utils.misc_functions import upload_text, insert_tags, get_items_available
+from tgbot.utils.misc_functions import insert_tags, get_items_available, get_purchases_file
 from tgbot.utils.text_functions import open_profile_user
 
 router = Router(name=__name__)
@@ -23,12 +22,12 @@ router = Router(name=__name__)
 async def user_shop(message: Message, bot: Bot, state: FSM, arSession: ARS):
     await state.clear()
 
-    get_categories = Categoryx.get_all()
+    get_categories = await Categoryx.aget_all()
 
     if len(get_categories) >= 1:
         await message.answer(
             "<b>🎁 Выберите нужный вам товар:</b>",
-            reply_markup=prod_item_category_swipe_fp(0),
+            reply_markup=await prod_item_category_swipe_fp(0),
         )
     else:
         await message.answer("<b>🎁 Увы, товары в данное время отсутствуют.</b>")
@@ -47,7 +46,7 @@ async def user_profile(message: Message, bot: Bot, state: FSM, arSession: ARS):
 async def user_available(message: Message, bot: Bot, state: FSM, arSession: ARS):
     await state.clear()
 
-    items_available = get_items_available()
+    items_available = await run_dbx(get_items_available)
 
     if len(items_available) >= 1:
         await message.answer(
@@ -62,7 +61,7 @@ async def user_available(message: Message, bot: Bot, state: FSM, arSession: ARS)
 async def user_faq(message: Message, bot: Bot, state: FSM, arSession: ARS):
     await state.clear()
 
-    get_settings = Settingsx.get()
+    get_settings = await Settingsx.aget()
     send_message = get_settings.misc_faq
 
     if send_message == "None":
@@ -73,7 +72,7 @@ async def user_faq(message: Message, bot: Bot, state: FSM, arSession: ARS):
         """)
 
     await message.answer(
-        insert_tags(message.from_user.id, send_message),
+        await insert_tags(message.from_user.id, send_message),
         disable_web_page_preview=True,
     )
 
@@ -83,7 +82,7 @@ async def user_faq(message: Message, bot: Bot, state: FSM, arSession: ARS):
 async def user_support(message: Message, bot: Bot, state: FSM, arSession: ARS):
     await state.clear()
 
-    get_settings = Settingsx.get()
+    get_settings = await Settingsx.aget()
 
     if get_settings.misc_support == "None":
         return await message.answer(
@@ -130,26 +129,20 @@ async def user_profile_return(call: CallbackQuery, bot: Bot, state: FSM, arSessi
 # Просмотр истории покупок
 @router.callback_query(F.data == "user_purchases")
 async def user_purchases(call: CallbackQuery, bot: Bot, state: FSM, arSession: ARS):
-    get_purchases = Purchasesx.gets(user_id=call.from_user.id)
+    get_purchases = await Purchasesx.agets(user_id=call.from_user.id)
     get_purchases = get_purchases[-5:]
 
     if len(get_purchases) >= 1:
         await call.answer("🎁 Последние 5 покупок")
         await del_message(call.message)
 
-        for purchase in get_purchases:
-            link_items = await upload_text(arSession, purchase.purchase_data)
-
-            await call.message.answer(
-                ded(f"""
-                    <b>🧾 Чек: <code>#{purchase.purchase_receipt}</code></b>
-                    ▪️ Товар: <code>{purchase.purchase_position_name} | {purchase.purchase_count}шт | {purchase.purchase_price}₽</code>
-                    ▪️ Дата покупки: <code>{convert_date(purchase.purchase_unix)}</code>
-                    ▪️ Товары: <a href='{link_items}'>кликабельно</a>
-                """)
-            )
-
-            await asyncio.sleep(0.2)
+        await call.message.answer_document(
+            get_purchases_file(get_purchases, f"purchases_{call.from_user.id}.txt"),
+            caption=ded(f"""
+                <b>🎁 Последние покупки: <code>{len(get_purchases)}шт</code></b>
+                ▪️ Чеки: <code>{', '.join(f"#{purchase.purchase_receipt}" for purchase in get_purchases)}</code>
+            """),
+        )
 
         await open_profile_user(bot, call.from_user.id, arSession)
     else:
@@ -161,7 +154,7 @@ async def user_purchases(call: CallbackQuery, bot: Bot, state: FSM, arSession: A
 async def user_available_swipe(call: CallbackQuery, bot: Bot, state: FSM, arSession: ARS):
     remover = int(call.data.split(":")[1])
 
-    items_available = get_items_available()
+    items_available = await run_dbx(get_items_available)
 
     if remover >= len(items_available):
         remover = len(items_available) - 1
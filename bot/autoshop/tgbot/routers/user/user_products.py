@@ -1,17 +1,20 @@
 # - *- coding: utf- 8 - *-
 import asyncio
+import math
 
 from aiogram import Router, Bot, F
 from aiogram.filters import StateFilter
 from aiogram.types import CallbackQuery, Message
 
+from tgbot.database.db_helper import run_dbx
 from tgbot.database.db_position import Positionx
 from tgbot.database.db_purchases import Purchasesx
 from tgbot.database.db_users import Userx
 from tgbot.keyboards.inline_user import products_confirm_finl, products_return_finl
 from tgbot.keyboards.inline_user_page import *
 from tgbot.keyboards.reply_main import menu_frep
-from tgbot.utils.const_functions import split_messages, get_unix, ded, del_message, convert_date, gen_id
+from tgbot.services.balance_cache import BALANCE_CACHE
+from tgbot.utils.const_functions import split_messages, ded, del_message, convert_date
 from tgbot.utils.misc.bot_models import FSM, ARS
 from tgbot.utils.misc_functions import get_positions_items
 from tgbot.utils.text_functions import position_open_user
@@ -26,7 +29,7 @@ async def user_buy_category_swipe(call: CallbackQuery, bot: Bot, state: FSM, arS
 
     await call.message.edit_text(
         "<b>🎁 Выберите нужный вам товар:</b>",
-        reply_markup=prod_item_category_swipe_fp(remover),
+        reply_markup=await prod_item_category_swipe_fp(remover),
     )
 
 
@@ -36,15 +39,15 @@ async def user_buy_category_open(call: CallbackQuery, bot: Bot, state: FSM, arSe
     category_id = call.data.split(":")[1]
     remover = int(call.data.split(":")[2])
 
-    get_category = Categoryx.get(category_id=category_id)
-    get_positions = get_positions_items(category_id)
+    get_category = await Categoryx.aget(category_id=category_id)
+    get_positions = await run_dbx(get_positions_items, category_id)
 
     if len(get_positions) >= 1:
         await del_message(call.message)
 
         await call.message.answer(
             f"<b>🎁 Текущая категория: <code>{get_category.category_name}</code></b>",
-            reply_markup=prod_item_position_swipe_fp(remover, category_id),
+            reply_markup=await prod_item_position_swipe_fp(remover, category_id),
         )
     else:
         if remover == 0:
@@ -64,12 +67,12 @@ async def user_buy_position_swipe(call: CallbackQuery, bot: Bot, state: FSM, arS
     category_id = call.data.split(":")[1]
     remover = int(call.data.split(":")[2])
 
-    get_category = Categoryx.get(category_id=category_id)
+    get_category = await Categoryx.aget(category_id=category_id)
 
     await del_message(call.message)
     await call.message.answer(
         f"<b>🎁 Текущая категория: <code>{get_category.category_name}</code></b>",
-        reply_markup=prod_item_position_swipe_fp(remover, category_id),
+        reply_markup=await prod_item_position_swipe_fp(remover, category_id),
     )
 
 
@@ -92,27 +95,23 @@ async def user_buy_open(call: CallbackQuery, bot: Bot, state: FSM, arSession: AR
     position_id = call.data.split(":")[1]
     remover = int(call.data.split(":")[2])
 
-    get_position = Positionx.get(position_id=position_id)
-    get_items = Itemx.gets(position_id=position_id)
-    get_user = Userx.get(user_id=call.from_user.id)
+    get_position = await Positionx.aget(position_id=position_id)
+    get_items = await Itemx.acount(position_id=position_id)
+    get_user = await Userx.aget(user_id=call.from_user.id)
 
     # Проверка, имеется ли на балансе пользователя достаточно средств
     if int(get_user.user_balance) < int(get_position.position_price):
         return await call.answer("❗ У вас недостаточно средств. Пополните баланс", True)
 
-    if len(get_items) < 1:
+    if get_items < 1:
         return await call.answer("❗ Товаров нет в наличии", True)
 
     # Максимальное количество товаров к покупке, подстроенные под баланс пользователя
     if get_position.position_price != 0:
         get_count = round(int(get_user.user_balance / get_position.position_price), 2)
 
-        if get_count > len(get_items):
-            get_items = len(get_items)
-        else:
+        if get_count < get_items:
             get_items = get_count
-    else:
-        get_items = len(get_items)
 
     # Если в наличии всего один товар, то пропустить ввод количества товаров к покупке
     if get_items == 1:
@@ -153,18 +152,18 @@ async def user_buy_open(call: CallbackQuery, bot: Bot, state: FSM, arSession: AR
 async def user_buy_count(message: Message, bot: Bot, state: FSM, arSession: ARS):
     position_id = (await state.get_data())['here_buy_position_id']
 
-    get_position = Positionx.get(position_id=position_id)
-    get_user = Userx.get(user_id=message.from_user.id)
-    get_items = Itemx.gets(position_id=position_id)
+    get_position = await Positionx.aget(position_id=position_id)
+    get_user = await Userx.aget(user_id=message.from_user.id)
+    get_items = await Itemx.acount(position_id=position_id)
 
     # Максимальное количество товаров к покупке, подстроенные под баланс пользователя
     if get_position.position_price != 0:
         get_count = int(get_user.user_balance / get_position.position_price)
 
-        if get_count > len(get_items):
-            get_count = len(get_items)
+        if get_count > get_items:
+            get_count = get_items
     else:
-        get_count = len(get_items)
+        get_count = get_items
 
     send_message = ded(f"""
         🎁 Введите количество товаров для покупки
@@ -185,12 +184,12 @@ async def user_buy_count(message: Message, bot: Bot, state: FSM, arSession: ARS)
     amount_pay = round(get_position.position_price * get_count, 2)
 
     # Если товаров нет в наличии
-    if len(get_items) < 1:
+    if get_items < 1:
         await state.clear()
         return await message.answer("<b>🎁 Товар который вы хотели купить, закончился</b>")
 
     # Если товаров меньше 1 или меньше наличия
-    if get_count < 1 or get_count > len(get_items):
+    if get_count < 1 or get_count > get_items:
         return await message.answer(
             f"<b>❌ Неверное количество товаров.</b>\n" + send_message,
             reply_markup=products_return_finl(position_id, get_position.category_id),
@@ -223,57 +222,20 @@ async def user_buy_confirm(call: CallbackQuery, bot: Bot, state: FSM, arSession:
     position_id = int(call.data.split(":")[1])
     purchase_count = int(call.data.split(":")[2])
 
-    get_items = Itemx.gets(position_id=position_id)
+    await call.message.edit_text("<b>🔄 Ждите, товары подготавливаются</b>")
+
+    buy_status, get_purchase, save_items = await Purchasesx.abuy(call.from_user.id, position_id, purchase_count)
 
-    # Проверка наличия нужного количества товаров
-    if purchase_count > len(get_items):
+    if buy_status == 1 or buy_status == 3:
         return await call.message.edit_text(
             "<b>🎁 Товар который вы хотели купить закончился или изменился.</b>",
         )
+    elif buy_status == 2:
+        return await call.message.edit_text("<b>❗ На вашем счёте недостаточно средств</b>")
 
-    await call.message.edit_text("<b>🔄 Ждите, товары подготавливаются</b>")
-
-    get_position = Positionx.get(position_id=position_id)
-    get_category = Categoryx.get(category_id=get_position.category_id)
-    get_user = Userx.get(user_id=call.from_user.id)
-
-    purchase_price = round(get_position.position_price * purchase_count, 2)
+    BALANCE_CACHE.forget(call.from_user.id)
 
-    # Проверка баланса пользователя и общей суммы покупки
-    if get_user.user_balance < purchase_price:
-        return await call.message.answer("<b>❗ На вашем счёте недостаточно средств</b>")
-
-    save_items, save_len = Itemx.buy(get_items, purchase_count)
-    save_count = len(save_items)
-
-    # Если в наличии оказалось меньше товаров, чем было запрошено
-    if purchase_count != save_count:
-        purchase_price = round(get_position.position_price * save_count, 2)
-        purchase_count = save_count
-
-    Userx.update(
-        get_user.user_id,
-        user_balance=round(get_user.user_balance - purchase_price, 2),
-    )
-
-    purchase_receipt = gen_id()
-    purchase_unix = get_unix()
-    purchase_data = "\n".join(save_items)
-
-    Purchasesx.add(
-        get_user.user_id,
-        get_user.user_balance,
-        round(get_user.user_balance - purchase_price, 2),
-        purchase_receipt,
-        purchase_data,
-        purchase_count,
-        purchase_price,
-        get_position.position_price,
-        get_position.position_id,
-        get_position.position_name,
-        get_category.category_id,
-        get_category.category_name,
-    )
+    save_len = math.ceil(3500 / (max(len(item) for item in save_items) + 1))
 
     await del_message(call.message)
 
@@ -285,9 +247,9 @@ async def user_buy_confirm(call: CallbackQuery, bot: Bot, state: FSM, arSession:
         ded(f"""
             <b>✅ Вы успешно купили товар(ы)</b>
             ➖➖➖➖➖➖➖➖➖➖
-            ▪️ Чек: <code>#{purchase_receipt}</code>
-            ▪️ Товар: <code>{get_position.position_name} | {purchase_count}шт | {purchase_price}₽</code>
-            ▪️ Дата покупки: <code>{convert_date(purchase_unix)}</code>
+            ▪️ Чек: <code>#{get_purchase.purchase_receipt}</code>
+            ▪️ Товар: <code>{get_purchase.purchase_position_name} | {get_purchase.purchase_count}шт | {get_purchase.purchase_price}₽</code>
+            ▪️ Дата покупки: <code>{convert_date(get_purchase.purchase_unix)}</code>
         """),
         reply_markup=menu_frep(call.from_user.id),
     )
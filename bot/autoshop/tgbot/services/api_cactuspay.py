@@ -1,12 +1,11 @@
 # - *- coding: utf- 8 - *-
-import json
 from typing import Union
 
 from aiogram import Bot
 from aiogram.types import Message, CallbackQuery
 from aiohttp import ClientConnectorCertificateError
 
-from tgbot.database.db_payments import Paymentsx
+from tgbot.services.api_payments import PAYMENT_CLIENTS
 from tgbot.utils.const_functions import ded, send_errors, gen_id
 from tgbot.utils.misc.bot_models import ARS
 from tgbot.utils.misc_functions import send_admins
@@ -14,6 +13,8 @@ from tgbot.utils.misc_functions import send_admins
 
 # Апи работы с QIWI
 class CactusPayAPI:
+    api_url = "https://lk.cactuspay.pro/api/"  # Адрес API CactusPay
+
     def __init__(
             self,
             bot: Bot,
@@ -23,14 +24,12 @@ class CactusPayAPI:
             skipping_error: bool = False,
     ):
         if token is not None:
-            self.token = token
+            self.client = PAYMENT_CLIENTS.build("CactusPay", cactuspay_token=token)
         else:
-            get_payment = Paymentsx.get()
-            self.token = get_payment.cactuspay_token
+            self.client = PAYMENT_CLIENTS.get("CactusPay")
 
-        self.headers = {
-            'Content-Type': 'application/json',
-        }
+        self.token = self.client.settings['cactuspay_token']
+        self.headers = self.client.headers
 
         self.bot = bot
         self.arSession = arSession
@@ -39,12 +38,13 @@ class CactusPayAPI:
 
     # Запрос платежа
     async def get_payment_url(self, pay_amount, bill_receipt):
-        session         = await self.arSession.get_session()
-        url             = f"https://lk.cactuspay.pro/api/?method=create"
-        response        = await session.post(url, json={"token": self.token, "amount": pay_amount, "order_id": bill_receipt}, ssl=True)
-        
+        url             = f"{self.api_url}?method=create"
+
         try:
-            response_data = json.loads((await response.read()).decode())
+            # Создание платежа не повторяется, чтобы не выставить счёт дважды
+            response_status, response_data = await self.client.request(
+                "POST", url, retries=0, json={"token": self.token, "amount": pay_amount, "order_id": bill_receipt}, ssl=True,
+            )
             print(f"🔍 CactusPay create response: {response_data}")
             
             # Проверяем разные форматы ответа
@@ -62,12 +62,7 @@ class CactusPayAPI:
             print(f"❌ Unexpected CactusPay response format: {response_data}")
             return None
         except Exception as e:
-            print(f"❌ Error parsing CactusPay response: {e}")
-            try:
-                response_text = (await response.read()).decode()
-                print(f"❌ Raw response: {response_text}")
-            except:
-                pass
+            print(f"❌ Error creating CactusPay payment: {e}")
             return None
 
     # Генерация платежа
@@ -113,12 +108,12 @@ class CactusPayAPI:
     # Проверка платежа
     async def bill_check(self, receipt: Union[str, int]) -> tuple[int, float, str]:
 
-        session         = await self.arSession.get_session()
-        url             = f"https://lk.cactuspay.pro/api/?method=get"
-        response        = await session.post(url, json={"token": self.token, "order_id": receipt}, ssl=True)
-        
+        url             = f"{self.api_url}?method=get"
+
         try:
-            response_data = json.loads((await response.read()).decode())
+            response_status, response_data = await self.client.request(
+                "POST", url, json={"token": self.token, "order_id": receipt}, ssl=True,
+            )
             print(f"🔍 CactusPay check response: {response_data}")
             
             pay_status      = 1  # По умолчанию: ошибка
@@ -0,0 +1,134 @@
+# - *- coding: utf- 8 - *-
+import asyncio
+import json
+import time
+from typing import Any, Optional
+
+import aiohttp
+
+from tgbot.data.config import PAYMENT_TIMEOUTS, PAYMENT_RETRIES
+from tgbot.database.db_payments import Paymentsx
+from tgbot.services.api_server import EndpointStats
+
+# Настройки платёжек из storage_payment, от которых зависит клиент (платёжка: колонки)
+PAYMENT_SETTINGS = {
+    'QIWI': ("qiwi_login", "qiwi_token"),
+    'Yoomoney': ("yoomoney_token",),
+    'CactusPay': ("cactuspay_token",),
+}
+
+
+# Клиент платёжки: настройки и заголовки собираются один раз, запросы идут через общую сессию платёжки
+class PaymentClient:
+    def __init__(self, name: str, settings: dict, registry: "PaymentRegistry"):
+        self.name = name
+        self.settings = settings
+        self.registry = registry
+
+        self.cache = {}  # Данные аккаунта, которые не меняются без смены настроек (например номер кошелька)
+
+        if name == "QIWI":
+            self.headers = {'authorization': f"Bearer {settings['qiwi_token']}"}
+        elif name == "Yoomoney":
+            self.headers = {
+                'Authorization': f"Bearer {settings['yoomoney_token']}",
+                'Content-Type': "application/x-www-form-urlencoded",
+            }
+        else:
+            self.headers = {'Content-Type': "application/json"}
+
+    # Сессия платёжки
+    async def get_session(self) -> aiohttp.ClientSession:
+        return await self.registry.get_session(self.name)
+
+    # Запрос к платёжке (HTTP статус, ответ в JSON или текстом)
+    # Сетевые ошибки, таймауты и ответы 5xx повторяются с паузой, после последней попытки ошибка пробрасывается
+    async def request(self, method: str, url: str, retries: Optional[int] = None, **kwargs) -> tuple[int, Any]:
+        session = await self.get_session()
+        stats = self.registry.get_stats_object(self.name)
+
+        if retries is None:
+            retries = PAYMENT_RETRIES
+
+        kwargs.setdefault('headers', self.headers)
+
+        for attempt in range(retries + 1):
+            time_start = time.perf_counter()
+            is_error = True
+
+            try:
+                async with session.request(method, url, **kwargs) as response:
+                    response_text = await response.text()
+                    is_error = response.status >= 500
+
+                try:
+                    response_data = json.loads(response_text)
+                except ValueError:
+                    response_data = response_text
+
+                if not is_error or attempt == retries:
+                    return response.status, response_data
+            except aiohttp.ClientConnectorCertificateError:
+                raise
+            except (aiohttp.ClientError, asyncio.TimeoutError):
+                if attempt == retries:
+                    raise
+            finally:
+                stats.add((time.perf_counter() - time_start) * 1000, is_error)
+
+            await asyncio.sleep(0.5 * 2 ** attempt)
+
+
+# Клиенты платёжек в памяти (клиент пересобирается только при изменении его настроек через Paymentsx.update)
+class PaymentRegistry:
+    def __init__(self):
+        self.clients: dict[str, PaymentClient] = {}
+        self.stats: dict[str, EndpointStats] = {}
+
+        self._sessions: dict[str, aiohttp.ClientSession] = {}
+
+    # Клиент платёжки с текущими настройками
+    def get(self, name: str) -> PaymentClient:
+        get_payment = Paymentsx.get()
+        settings = {column: getattr(get_payment, column) for column in PAYMENT_SETTINGS[name]}
+
+        get_client = self.clients.get(name)
+
+        if get_client is None or get_client.settings != settings:
+            get_client = self.clients[name] = PaymentClient(name, settings, self)
+
+        return get_client
+
+    # Клиент с настройками, которые ещё не сохранены (проверка новых данных админом), не кэшируется
+    def build(self, name: str, **settings) -> PaymentClient:
+        return PaymentClient(name, settings, self)
+
+    # Сессия платёжки (своя на каждую платёжку, с таймаутом из PAYMENT_TIMEOUTS)
+    async def get_session(self, name: str) -> aiohttp.ClientSession:
+        get_session = self._sessions.get(name)
+
+        if get_session is None or get_session.closed:
+            get_session = self._sessions[name] = aiohttp.ClientSession(
+                connector=aiohttp.TCPConnector(limit=20, ttl_dns_cache=300, keepalive_timeout=60),
+                timeout=aiohttp.ClientTimeout(total=PAYMENT_TIMEOUTS.get(name, 10)),
+            )
+
+        return get_session
+
+    # Статистика одной платёжки
+    def get_stats_object(self, name: str) -> EndpointStats:
+        return self.stats.setdefault(name, EndpointStats())
+
+    # Статистика задержек по платёжкам
+    def get_stats(self) -> dict[str, dict]:
+        return {name: stats.get() for name, stats in self.stats.items()}
+
+    # Закрытие сессий
+    async def close(self):
+        for get_session in self._sessions.values():
+            await get_session.close()
+
+        self._sessions.clear()
+
+
+PAYMENT_CLIENTS = PaymentRegistry()  # Клиенты всех платёжек
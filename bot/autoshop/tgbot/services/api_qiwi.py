@@ -1,12 +1,11 @@
 # - *- coding: utf- 8 - *-
-import json
 from typing import Union
 
 from aiogram import Bot
 from aiogram.types import Message, CallbackQuery
 from aiohttp import ClientConnectorCertificateError
 
-from tgbot.database.db_payments import Paymentsx
+from tgbot.services.api_payments import PAYMENT_CLIENTS
 from tgbot.utils.const_functions import ded, send_errors, gen_id
 from tgbot.utils.misc.bot_models import ARS
 from tgbot.utils.misc_functions import send_admins
@@ -24,17 +23,13 @@ class QiwiAPI:
             skipping_error: bool = False,
     ):
         if login is not None:
-            self.login = login
-            self.token = token
+            self.client = PAYMENT_CLIENTS.build("QIWI", qiwi_login=login, qiwi_token=token)
         else:
-            get_payment = Paymentsx.get()
+            self.client = PAYMENT_CLIENTS.get("QIWI")
 
-            self.login = get_payment.qiwi_login
-            self.token = get_payment.qiwi_token
-
-        self.headers = {
-            'authorization': f'Bearer {self.token}',
-        }
+        self.login = self.client.settings['qiwi_login']
+        self.token = self.client.settings['qiwi_token']
+        self.headers = self.client.headers
 
         self.bot = bot
         self.arSession = arSession
@@ -255,26 +250,23 @@ class QiwiAPI:
             url: str,
             params: dict = None,
     ) -> tuple[bool, any, int]:
-        session = await self.arSession.get_session()
-
         try:
-            response = await session.get(url, params=params, headers=self.headers, ssl=False)
-            response_data = json.loads((await response.read()).decode())
+            response_status, response_data = await self.client.request(method, url, params=params, ssl=False)
 
-            if response.status == 200:
+            if response_status == 200:
                 return True, response_data, 200
             else:
                 await self.error_wallet_user()
-                await self.error_wallet_admin(f"{response.status} - {str(response_data)}")
+                await self.error_wallet_admin(f"{response_status} - {str(response_data)}")
 
-                return False, response_data, response.status
+                return False, response_data, response_status
         except ClientConnectorCertificateError:
             await self.error_wallet_user()
             await self.error_wallet_admin("CERTIFICATE_VERIFY_FAILED")
 
-            return False, "CERTIFICATE_VERIFY_FAILED", response.status
+            return False, "CERTIFICATE_VERIFY_FAILED", "CERTIFICATE_VERIFY_FAILED"
         except Exception as ex:
             await self.error_wallet_user()
             await self.error_wallet_admin(str(ex))
 
-            return False, str(ex), response.status
+            return False, str(ex), 0
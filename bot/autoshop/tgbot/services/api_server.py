@@ -0,0 +1,183 @@
+# - *- coding: utf- 8 - *-
+import json
+import time
+from collections import deque
+from typing import Any, Optional
+
+import aiohttp
+
+from tgbot.data.config import (SERVER_API_URL, PARTNER_API_SECRET, SERVER_API_LIMIT, SERVER_API_TIMEOUTS,
+                               SERVER_API_TIMEOUT, SERVER_BREAKER_FAILURES, SERVER_BREAKER_TIMEOUT)
+
+
+# Сервер считается недоступным, запрос не отправлялся
+class ServerUnavailable(Exception):
+    ...
+
+
+# Задержки запросов одного эндпоинта
+class EndpointStats:
+    def __init__(self, samples: int = 500):
+        self.count = 0
+        self.errors = 0
+        self.latencies = deque(maxlen=samples)  # Последние задержки в миллисекундах
+
+    # Учёт запроса
+    def add(self, latency: float, error: bool = False):
+        self.count += 1
+        self.latencies.append(latency)
+
+        if error:
+            self.errors += 1
+
+    # Сводка (количество, ошибки, средняя, p50, p95 и максимальная задержка в мс)
+    def get(self) -> dict:
+        latencies = sorted(self.latencies)
+
+        if len(latencies) == 0:
+            return {'count': self.count, 'errors': self.errors}
+
+        return {
+            'count': self.count,
+            'errors': self.errors,
+            'avg_ms': round(sum(latencies) / len(latencies), 1),
+            'p50_ms': round(latencies[len(latencies) // 2], 1),
+            'p95_ms': round(latencies[min(len(latencies) - 1, int(len(latencies) * 0.95))], 1),
+            'max_ms': round(latencies[-1], 1),
+        }
+
+
+# Автоматический выключатель: после failures ошибок подряд запросы не отправляются timeout секунд,
+# затем пропускается один пробный запрос (half_open) - при успехе сервер снова доступен
+class CircuitBreaker:
+    def __init__(self, failures: int = SERVER_BREAKER_FAILURES, timeout: float = SERVER_BREAKER_TIMEOUT):
+        self.failures = failures
+        self.timeout = timeout
+
+        self.state = "closed"  # closed - запросы идут, open - сервер отключён, half_open - идёт пробный запрос
+        self.errors = 0  # Ошибок подряд
+        self.opened = 0  # Сколько раз сервер отключался
+        self.opened_at = 0.0
+
+    # Запросы сейчас не пропускаются: сервер отключён и время пробного запроса ещё не пришло,
+    # или пробный запрос уже отправлен и ответа ещё нет
+    @property
+    def is_open(self) -> bool:
+        return self.state == "half_open" or (
+                self.state == "open" and time.monotonic() - self.opened_at < self.timeout
+        )
+
+    # Можно ли отправить запрос
+    def allow(self) -> bool:
+        if self.state == "closed":
+            return True
+
+        if self.state == "open" and time.monotonic() - self.opened_at >= self.timeout:
+            self.state = "half_open"
+            return True
+
+        return False
+
+    # Учёт результата запроса
+    def add(self, error: bool):
+        if not error:
+            if self.state != "closed":
+                print("✅ Сервер Mini App снова доступен")
+
+            self.state = "closed"
+            self.errors = 0
+        else:
+            self.errors += 1
+
+            if self.state == "half_open" or self.errors >= self.failures:
+                if self.state == "closed":
+                    self.opened += 1
+                    print(f"⚠️ Сервер Mini App недоступен, запросы отключены на {self.timeout}сек")
+
+                self.state = "open"
+                self.opened_at = time.monotonic()
+
+    # Состояние для админа
+    def get(self) -> dict:
+        return {
+            'state': self.state,
+            'errors': self.errors,
+            'opened': self.opened,
+            'retry_in': max(0, int(self.timeout - (time.monotonic() - self.opened_at))) if self.state == "open" else 0,
+        }
+
+
+# Общий клиент сервера Mini App (keep-alive, лимит подключений, кэш DNS, таймауты по эндпоинтам)
+class ServerAPI:
+    def __init__(self, base_url: str = SERVER_API_URL, secret: str = PARTNER_API_SECRET):
+        self.base_url = base_url.rstrip("/")
+        self.secret = secret
+
+        self.stats: dict[str, EndpointStats] = {}
+        self.breaker = CircuitBreaker()
+
+        self._session: Optional[aiohttp.ClientSession] = None
+
+    # Вызов сессии
+    async def get_session(self) -> aiohttp.ClientSession:
+        if self._session is None or self._session.closed:
+            self._session = aiohttp.ClientSession(
+                connector=aiohttp.TCPConnector(
+                    limit=SERVER_API_LIMIT,
+                    ttl_dns_cache=300,
+                    keepalive_timeout=60,
+                ),
+                headers={'X-API-Secret': self.secret},
+            )
+
+        return self._session
+
+    # Запрос к серверу (HTTP статус, ответ в JSON или None)
+    # endpoint - имя эндпоинта для таймаута и статистики, например "balance" или "referral"
+    # Пока сервер отключён выключателем, сразу вызывается ServerUnavailable
+    async def request(self, method: str, endpoint: str, path: str, **kwargs) -> tuple[int, Any]:
+        if not self.breaker.allow():
+            raise ServerUnavailable(f"Server is unavailable, retry in {self.breaker.get()['retry_in']}s")
+
+        session = await self.get_session()
+        timeout = aiohttp.ClientTimeout(total=SERVER_API_TIMEOUTS.get(endpoint, SERVER_API_TIMEOUT))
+
+        time_start = time.perf_counter()
+        is_error = True
+
+        try:
+            async with session.request(method, self.base_url + path, timeout=timeout, **kwargs) as response:
+                response_text = await response.text()
+                is_error = response.status >= 500
+
+                try:
+                    response_data = json.loads(response_text)
+                except ValueError:
+                    response_data = None
+
+                return response.status, response_data
+        finally:
+            self.stats.setdefault(endpoint, EndpointStats()).add((time.perf_counter() - time_start) * 1000, is_error)
+            self.breaker.add(is_error)
+
+    async def get(self, endpoint: str, path: str, **kwargs) -> tuple[int, Any]:
+        return await self.request("GET", endpoint, path, **kwargs)
+
+    async def post(self, endpoint: str, path: str, **kwargs) -> tuple[int, Any]:
+        return await self.request("POST", endpoint, path, **kwargs)
+
+    # Отправка события (повтор с тем же ключом сервер отбрасывает по заголовку Idempotency-Key)
+    async def send(self, endpoint: str, path: str, body: dict, key: str = None) -> tuple[int, Any]:
+        return await self.post(endpoint, path, json=body, headers={'Idempotency-Key': key} if key else None)
+
+    # Статистика задержек по эндпоинтам
+    def get_stats(self) -> dict[str, dict]:
+        return {endpoint: stats.get() for endpoint, stats in self.stats.items()}
+
+    # Закрытие сессии
+    async def close(self):
+        if self._session is not None:
+            await self._session.close()
+
+
+SERVER_API = ServerAPI()  # Один клиент на все интеграции с сервером
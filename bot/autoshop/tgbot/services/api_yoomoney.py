@@ -6,7 +6,7 @@ from aiogram import Bot
 from aiogram.types import CallbackQuery, Message
 from aiohttp import ClientConnectorCertificateError
 
-from tgbot.database.db_payments import Paymentsx
+from tgbot.services.api_payments import PAYMENT_CLIENTS
 from tgbot.utils.const_functions import ded, gen_id, send_errors
 from tgbot.utils.misc.bot_models import ARS
 from tgbot.utils.misc_functions import send_admins
@@ -22,22 +22,17 @@ class YoomoneyAPI:
             skipping_error: bool = False,
     ):
         if token is not None:
-            self.token = token
+            self.client = PAYMENT_CLIENTS.build("Yoomoney", yoomoney_token=token)
         else:
-            get_payment = Paymentsx.get()
-
-            self.token = get_payment.yoomoney_token
+            self.client = PAYMENT_CLIENTS.get("Yoomoney")
 
+        self.token = self.client.settings['yoomoney_token']
         self.base_url = 'https://yoomoney.ru/api/'
-        self.headers = {
-            'Authorization': f'Bearer {self.token}',
-            'Content-Type': 'application/x-www-form-urlencoded',
-        }
+        self.headers = self.client.headers
 
         self.bot = bot
         self.arSession = arSession
         self.update = update
-        self.token = token
         self.skipping_error = skipping_error
 
     # Рассылка админам о нерабочем кошельке
@@ -122,15 +117,21 @@ class YoomoneyAPI:
         else:
             return "<b>🔮 Не удалось получить баланс ЮMoney кошелька ❌</b>"
 
-    # Информация об аккаунте
+    # Номер кошелька (запрашивается один раз, пока не изменится токен)
     async def account_info(self):
+        if 'account' in self.client.cache:
+            return self.client.cache['account']
+
         status, response = await self._request("account-info")
 
+        if status:
+            self.client.cache['account'] = response['account']
+
         return response['account']
 
     # Получение ссылки на авторизацию
     async def authorization_get(self) -> str:
-        session = await self.arSession.get_session()
+        session = await self.client.get_session()
 
         headers = {
             'Content-Type': 'application/x-www-form-urlencoded'
@@ -138,13 +139,12 @@ class YoomoneyAPI:
 
         url = f"https://yoomoney.ru/oauth/authorize?client_id=DC7FFCDA285C720D958E6EB6FB4910335C186CB6C8539A1686B5E109128562AB&response_type=code&redirect_uri=https://yoomoney.ru&scope=account-info%20operation-history%20operation-details"
 
-        response = await session.post(url, headers=headers)
-
-        return str(response.url)
+        async with session.post(url, headers=headers) as response:
+            return str(response.url)
 
     # Принятие кода авторизации и получение токена
     async def authorization_enter(self, get_code: str) -> tuple[bool, str, str]:
-        session = await self.arSession.get_session()
+        session = await self.client.get_session()
 
         headers = {
             'Content-Type': 'application/x-www-form-urlencoded'
@@ -152,8 +152,8 @@ class YoomoneyAPI:
 
         url = f"https://yoomoney.ru/oauth/token?code={get_code}&client_id=DC7FFCDA285C720D958E6EB6FB4910335C186CB6C8539A1686B5E109128562AB&grant_type=authorization_code&redirect_uri=https://yoomoney.ru"
 
-        response = await session.post(url, headers=headers)
-        response_data = json.loads((await response.read()).decode())
+        async with session.post(url, headers=headers) as response:
+            response_data = json.loads((await response.read()).decode())
 
         if "error" in response_data:
             error = response_data['error']
@@ -179,7 +179,7 @@ class YoomoneyAPI:
 
     # Создание платежа
     async def bill(self, pay_amount: Union[float, int]) -> tuple[str, str, int]:
-        session = await self.arSession.get_session()
+        session = await self.client.get_session()
 
         bill_receipt = gen_id()
 
@@ -204,7 +204,8 @@ class YoomoneyAPI:
             url += str(value).replace("_", "-") + "=" + str(payload[value])
             url += "&"
 
-        bill_link = str((await session.post(url[:-1].replace(" ", "%20"))).url)
+        async with session.post(url[:-1].replace(" ", "%20")) as response:
+            bill_link = str(response.url)
 
         bill_message = ded(f"""
             <b>💰 Пополнение баланса</b>
@@ -257,19 +258,16 @@ class YoomoneyAPI:
             method: str,
             data: dict = None,
     ) -> tuple[bool, any]:
-        session = await self.arSession.get_session()
-
         url = self.base_url + method
 
         try:
-            response = await session.post(url, headers=self.headers, data=data)
-            response_data = json.loads((await response.read()).decode())
+            response_status, response_data = await self.client.request("POST", url, data=data)
 
-            if response.status == 200:
+            if response_status == 200:
                 return True, response_data
             else:
                 await self.error_wallet_user()
-                await self.error_wallet_admin(f"{response.status} - {str(response_data)}")
+                await self.error_wallet_admin(f"{response_status} - {str(response_data)}")
 
                 return False, response_data
         except ClientConnectorCertificateError:
@@ -0,0 +1,94 @@
+# - *- coding: utf- 8 - *-
+import asyncio
+from typing import Awaitable, Callable, Optional
+
+from cachetools import TTLCache
+
+from tgbot.data.config import BALANCE_CACHE_TTL, BALANCE_CACHE_SIZE
+
+
+# Кэш балансов с сервера Mini App (айди юзера: {'rubles', 'chips'})
+# Одновременные запросы баланса одного юзера ждут один запрос к серверу
+class BalanceCache:
+    def __init__(self, maxsize: int = BALANCE_CACHE_SIZE, ttl: int = BALANCE_CACHE_TTL):
+        self.balances = TTLCache(maxsize=maxsize, ttl=ttl)
+
+        self.stats = {
+            'hits': 0,  # Баланс взят из кэша
+            'misses': 0,  # Баланс запрошен у сервера
+            'joined': 0,  # Запрос присоединился к уже идущему запросу этого юзера
+        }
+
+        self._loading: dict[int, asyncio.Future] = {}
+        self._versions: dict[int, int] = {}  # Записи во время запроса, чтобы старый ответ сервера не попал в кэш
+
+    # Статистика кэша
+    def get_stats(self) -> dict:
+        total = self.stats['hits'] + self.stats['misses'] + self.stats['joined']
+
+        return {
+            **self.stats,
+            'size': len(self.balances),
+            'hit_rate': round((self.stats['hits'] + self.stats['joined']) / total, 4) if total > 0 else 0.0,
+        }
+
+    # Баланс из кэша или через load_func (None при ошибке, не кэшируется)
+    async def get(self, user_id: int, load_func: Callable[[], Awaitable[Optional[dict]]]) -> Optional[dict]:
+        get_balance = self.balances.get(user_id)
+
+        if get_balance is not None:
+            self.stats['hits'] += 1
+            return get_balance
+
+        if user_id in self._loading:
+            self.stats['joined'] += 1
+            return await asyncio.shield(self._loading[user_id])
+
+        self.stats['misses'] += 1
+
+        future = asyncio.get_running_loop().create_future()
+        self._loading[user_id] = future
+        self._versions[user_id] = 0
+
+        try:
+            get_balance = await load_func()
+        except Exception as ex:
+            future.set_exception(ex)
+            future.exception()  # Ошибка передаётся ожидающим, без предупреждения о непрочитанном исключении
+            raise
+        else:
+            # Во время запроса баланс изменился в боте - ответ сервера устарел
+            if self._versions[user_id] != 0:
+                get_balance = self.balances.get(user_id, get_balance)
+            elif get_balance is not None:
+                self.balances[user_id] = get_balance
+
+            future.set_result(get_balance)
+        finally:
+            if not future.done():
+                future.cancel()
+
+            self._loading.pop(user_id, None)
+            self._versions.pop(user_id, None)
+
+        return get_balance
+
+    # Запись баланса (изменение в боте или уведомление от сервера), chips сохраняются, если не переданы
+    def set(self, user_id: int, rubles: float, chips: Optional[int] = None):
+        if chips is None:
+            chips = (self.balances.get(user_id) or {}).get('chips', 0)
+
+        if user_id in self._versions:
+            self._versions[user_id] += 1
+
+        self.balances[user_id] = {'rubles': float(rubles), 'chips': int(chips)}
+
+    # Удаление баланса из кэша (следующий запрос уйдёт на сервер)
+    def forget(self, user_id: int):
+        if user_id in self._versions:
+            self._versions[user_id] += 1
+
+        self.balances.pop(user_id, None)
+
+
+BALANCE_CACHE = BalanceCache()
@@ -0,0 +1,219 @@
+# - *- coding: utf- 8 - *-
+import asyncio
+import time
+from typing import AsyncIterable, Awaitable, Callable, Iterable, Optional, Union
+
+from aiogram.exceptions import (TelegramRetryAfter, TelegramServerError, TelegramNetworkError,
+                                TelegramForbiddenError, TelegramNotFound, TelegramBadRequest)
+
+from tgbot.data.config import MAIL_RATE, MAIL_WORKERS, MAIL_RETRIES, MAIL_PROGRESS
+
+# Статусы отправки и их описание для отчёта
+MAIL_STATUSES = {
+    'sent': "✅ Доставлено",
+    'blocked': "🚫 Бот заблокирован",
+    'not_found': "👻 Чат не найден",
+    'bad_request': "⚠️ Ошибка запроса",
+    'retry_failed': "⏳ Не отправлено после повторов",
+    'error': "❌ Прочие ошибки",
+}
+
+
+# Ведро токенов для ограничения скорости отправки
+class TokenBucket:
+    def __init__(self, rate: float, capacity: Optional[float] = None):
+        self.rate = rate
+        self.capacity = capacity or rate
+        self.tokens = self.capacity
+        self.updated = time.monotonic()
+        self.paused_until = 0.0
+
+        self._lock = asyncio.Lock()
+        self._stopped = asyncio.Event()
+
+    # Остановка выдачи токенов (при TelegramRetryAfter ждут все отправители)
+    def pause(self, seconds: float):
+        self.paused_until = max(self.paused_until, time.monotonic() + seconds)
+        self.tokens = 0
+
+    # Остановка ведра, ожидающие токен сразу получают отказ
+    def stop(self):
+        self._stopped.set()
+
+    # Пауза, которая прерывается остановкой ведра (True - ведро остановлено)
+    async def wait(self, seconds: float) -> bool:
+        try:
+            await asyncio.wait_for(self._stopped.wait(), seconds)
+        except asyncio.TimeoutError:
+            ...
+
+        return self._stopped.is_set()
+
+    # Ожидание токена (False - ведро остановлено, отправлять нельзя)
+    async def acquire(self) -> bool:
+        async with self._lock:
+            while not self._stopped.is_set():
+                now = time.monotonic()
+
+                if now < self.paused_until:
+                    await self.wait(self.paused_until - now)
+                    continue
+
+                self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+                self.updated = now
+
+                if self.tokens >= 1:
+                    self.tokens -= 1
+                    return True
+
+                await self.wait((1 - self.tokens) / self.rate)
+
+            return False
+
+
+# Отчёт о рассылке
+class BroadcastReport:
+    def __init__(self, total: int = 0):
+        self.total = total
+        self.count = 0
+        self.retries = 0
+        self.statuses = {status: 0 for status in MAIL_STATUSES}
+        self.time_start = time.monotonic()
+        self.time_end = None
+
+    @property
+    def sent(self) -> int:
+        return self.statuses['sent']
+
+    @property
+    def failed(self) -> int:
+        return self.count - self.sent
+
+    @property
+    def duration(self) -> int:
+        return int((self.time_end or time.monotonic()) - self.time_start)
+
+    # Учёт результата отправки
+    def add(self, status: str):
+        self.statuses[status] += 1
+        self.count += 1
+
+    # Ошибки по типам для сообщения админу
+    def get_errors(self) -> list[str]:
+        return [
+            f"{MAIL_STATUSES[status]}: <code>{count}</code>"
+            for status, count in self.statuses.items()
+            if status != "sent" and count >= 1
+        ]
+
+
+# Рассылка сообщений с ограничением скорости, повторами и несколькими отправителями
+class Broadcaster:
+    def __init__(
+            self,
+            rate: float = MAIL_RATE,
+            workers: int = MAIL_WORKERS,
+            retries: int = MAIL_RETRIES,
+            progress_interval: float = MAIL_PROGRESS,
+    ):
+        self.bucket = TokenBucket(rate)
+        self.workers = workers
+        self.retries = retries
+        self.progress_interval = progress_interval
+        self.stopped = False
+
+    # Остановка рассылки (отправки в процессе завершаются, новые не начинаются)
+    def stop(self):
+        self.stopped = True
+        self.bucket.stop()
+
+    # Отправка одному пользователю с повторами (возвращает статус, None - рассылка остановлена до отправки)
+    async def send(self, user_id: int, send_func: Callable[[int], Awaitable], report: BroadcastReport) -> Optional[str]:
+        for attempt in range(self.retries + 1):
+            if not await self.bucket.acquire():
+                return None
+
+            try:
+                await send_func(user_id)
+                return "sent"
+            except TelegramRetryAfter as ex:
+                self.bucket.pause(ex.retry_after)
+            except (TelegramServerError, TelegramNetworkError):
+                await self.bucket.wait(min(2 ** attempt, 30))
+            except TelegramForbiddenError:
+                return "blocked"
+            except TelegramNotFound:
+                return "not_found"
+            except TelegramBadRequest as ex:
+                if "chat not found" in str(ex).lower():
+                    return "not_found"
+
+                return "bad_request"
+            except Exception:
+                return "error"
+
+            report.retries += 1
+
+        return "retry_failed"
+
+    # Запуск рассылки по списку или асинхронному потоку айди пользователей
+    async def run(
+            self,
+            user_ids: Union[Iterable[int], AsyncIterable[int]],
+            send_func: Callable[[int], Awaitable],
+            total: int = 0,
+            progress_func: Optional[Callable[[BroadcastReport], Awaitable]] = None,
+            result_func: Optional[Callable[[int, str], Awaitable]] = None,
+    ) -> BroadcastReport:
+        report = BroadcastReport(total)
+        queue = asyncio.Queue(maxsize=self.workers * 2)
+
+        async def producer():
+            if hasattr(user_ids, "__aiter__"):
+                async for user_id in user_ids:
+                    if self.stopped: break
+                    await queue.put(user_id)
+            else:
+                for user_id in user_ids:
+                    if self.stopped: break
+                    await queue.put(user_id)
+
+            for _ in range(self.workers):
+                await queue.put(None)
+
+        async def worker():
+            while (user_id := await queue.get()) is not None:
+                if self.stopped:
+                    continue
+
+                status = await self.send(user_id, send_func, report)
+
+                # Не отправлено из-за остановки - юзер получит сообщение после продолжения рассылки
+                if status is None:
+                    continue
+
+                report.add(status)
+
+                if result_func is not None:
+                    await result_func(user_id, status)
+
+        async def progress():
+            while True:
+                await asyncio.sleep(self.progress_interval)
+
+                try:
+                    await progress_func(report)
+                except Exception:
+                    ...
+
+        progress_task = asyncio.create_task(progress()) if progress_func is not None else None
+
+        try:
+            await asyncio.gather(producer(), *[worker() for _ in range(self.workers)])
+        finally:
+            if progress_task is not None:
+                progress_task.cancel()
+
+            report.time_end = time.monotonic()
+
+        return report
@@ -0,0 +1,259 @@
+# - *- coding: utf- 8 - *-
+import asyncio
+from collections import deque
+from typing import AsyncIterator
+
+from aiogram import Bot
+from aiogram.types import Message
+
+from tgbot.data.config import MAIL_PAGE, MAIL_FLUSH, MAIL_KEEP
+from tgbot.database.db_mail import Mailx, MailModel, MAIL_INACTIVE
+from tgbot.keyboards.inline_admin import mail_control_finl
+from tgbot.middlewares import USERS_MIDDLEWARE
+from tgbot.services.broadcaster import Broadcaster, BroadcastReport, MAIL_STATUSES
+from tgbot.utils.const_functions import ded, convert_date, get_unix
+
+# Названия состояний рассылки
+MAIL_STATES = {
+    'active': "📢 Рассылка идёт",
+    'paused': "⏸ Рассылка на паузе",
+    'cancelled': "⛔ Рассылка отменена",
+    'done': "✅ Рассылка завершена",
+}
+
+
+# Типы медиа, которые рассылаются по file_id (тип: метод отправки), animation раньше document
+MAIL_MEDIA = {
+    'photo': "send_photo",
+    'video': "send_video",
+    'animation': "send_animation",
+    'document': "send_document",
+    'audio': "send_audio",
+    'voice': "send_voice",
+}
+
+
+# Содержимое рассылки из сообщения админа
+def get_mail_content(message: Message, prefix: str = "") -> dict:
+    if message.text is not None:
+        return {'mail_type': "text", 'mail_text': prefix + message.text}
+
+    for mail_type in MAIL_MEDIA:
+        get_media = getattr(message, mail_type)
+
+        if get_media:
+            if isinstance(get_media, list):
+                get_media = get_media[-1]
+
+            return {
+                'mail_type': mail_type,
+                'mail_text': prefix + (message.caption or ""),
+                'mail_file_id': get_media.file_id,
+            }
+
+    # Остальные сообщения (стикеры, кружки, опросы) копируются из чата админа
+    return {
+        'mail_type': "copy",
+        'mail_text': None,
+        'mail_source_chat_id': message.chat.id,
+        'mail_source_message_id': message.message_id,
+    }
+
+
+# Отправка содержимого рассылки одному пользователю
+async def mail_send(
+        bot: Bot,
+        user_id: int,
+        mail_type: str,
+        mail_text: str = None,
+        mail_file_id: str = None,
+        mail_source_chat_id: int = None,
+        mail_source_message_id: int = None,
+):
+    if mail_type == "text":
+        await bot.send_message(user_id, mail_text)
+    elif mail_type in MAIL_MEDIA:
+        await getattr(bot, MAIL_MEDIA[mail_type])(user_id, mail_file_id, caption=mail_text)
+    else:
+        await bot.copy_message(user_id, mail_source_chat_id, mail_source_message_id)
+
+
+# Текст состояния рассылки для админа
+def mail_open_admin(get_mail: MailModel, get_statuses: dict[str, int]) -> str:
+    get_errors = "\n".join(
+        f"{MAIL_STATUSES.get(status, status)}: <code>{count}</code>"
+        for status, count in get_statuses.items()
+        if status != "sent"
+    )
+
+    return ded(f"""
+        <b>{MAIL_STATES.get(get_mail.mail_status, get_mail.mail_status)} ({get_mail.mail_sent + get_mail.mail_failed}/{get_mail.mail_total})</b>
+        ➖➖➖➖➖➖➖➖➖➖
+        👤 Всего пользователей: <code>{get_mail.mail_total}</code>
+        ✅ Пользователей получило сообщение: <code>{get_mail.mail_sent}</code>
+        ❌ Пользователей не получило сообщение: <code>{get_mail.mail_failed}</code>
+        🕰 Дата создания: <code>{convert_date(get_mail.mail_unix)}</code>""") + (f"\n➖➖➖➖➖➖➖➖➖➖\n{get_errors}" if get_errors else "")
+
+
+# Рассылка, сохраняемая в БД (после перезапуска продолжается с последнего подтверждённого айди)
+class MailJob:
+    def __init__(self, bot: Bot, mail_id: int):
+        self.bot = bot
+        self.mail_id = mail_id
+        self.broadcaster = Broadcaster()
+
+        self.pending = deque()  # Айди, выданные отправителям, по возрастанию
+        self.finished = set()  # Айди из pending, по которым уже есть результат
+        self.results = []  # Ещё не сохранённые в БД результаты
+        self.cursor = 0
+        self.restart = False  # Продолжение запрошено, пока рассылка ещё останавливалась
+
+        self._flush_lock = asyncio.Lock()
+
+    # Получатели страницами по возрастанию айди, начиная после курсора
+    async def get_recipients(self) -> AsyncIterator[int]:
+        after_user_id = self.cursor
+
+        while True:
+            get_users = await Mailx.aget_recipients(self.mail_id, after_user_id, MAIL_PAGE)
+
+            if len(get_users) == 0:
+                return
+
+            for user_id in get_users:
+                self.pending.append(user_id)
+                yield user_id
+
+            after_user_id = get_users[-1]
+
+    # Запоминание результата отправки
+    async def add_result(self, user_id: int, status: str):
+        self.results.append((user_id, status))
+        self.finished.add(user_id)
+
+        if len(self.results) >= MAIL_FLUSH:
+            await self.flush()
+
+    # Сохранение результатов и сдвиг курсора до последнего айди, перед которым всё обработано
+    async def flush(self):
+        async with self._flush_lock:
+            while len(self.pending) >= 1 and self.pending[0] in self.finished:
+                self.cursor = self.pending.popleft()
+                self.finished.discard(self.cursor)
+
+            get_results, self.results = self.results, []
+
+            if len(get_results) >= 1:
+                await Mailx.aadd_results(self.mail_id, get_results, self.cursor)
+
+                # Неактивные юзеры снова станут активными при следующем апдейте от них
+                USERS_MIDDLEWARE.forget([user_id for user_id, status in get_results if status in MAIL_INACTIVE])
+
+    # Обновление сообщения с прогрессом у админа
+    async def edit_progress(self, report: BroadcastReport = None):
+        await self.flush()
+
+        get_mail = await Mailx.aget(mail_id=self.mail_id)
+
+        if get_mail.progress_chat_id is None:
+            return
+
+        try:
+            await self.bot.edit_message_text(
+                mail_open_admin(get_mail, await Mailx.aget_statuses(self.mail_id)),
+                chat_id=get_mail.progress_chat_id,
+                message_id=get_mail.progress_message_id,
+                reply_markup=mail_control_finl(get_mail.mail_id, get_mail.mail_status),
+            )
+        except:
+            ...
+
+    # Запуск рассылки
+    async def run(self):
+        get_mail = await Mailx.aget(mail_id=self.mail_id)
+        self.cursor = get_mail.mail_cursor
+
+        async def send_mail(user_id: int):
+            await mail_send(
+                self.bot,
+                user_id,
+                get_mail.mail_type,
+                get_mail.mail_text,
+                get_mail.mail_file_id,
+                get_mail.mail_source_chat_id,
+                get_mail.mail_source_message_id,
+            )
+
+        try:
+            await self.broadcaster.run(
+                self.get_recipients(),
+                send_mail,
+                total=get_mail.mail_total,
+                progress_func=self.edit_progress,
+                result_func=self.add_result,
+            )
+        finally:
+            await self.flush()
+
+        # Рассылка дошла до конца без остановки
+        if not self.broadcaster.stopped:
+            await Mailx.aupdate(self.mail_id, mail_status="done")
+
+        await self.edit_progress()
+
+
+# Запущенные рассылки (айди рассылки: рассылка, задача)
+MAIL_TASKS: dict[int, tuple[MailJob, asyncio.Task]] = {}
+
+
+# Запуск рассылки в фоне
+# Если прошлый запуск ещё останавливается, рассылка запустится заново сразу после его завершения
+def mail_start(bot: Bot, mail_id: int):
+    if mail_id in MAIL_TASKS:
+        mail_job, mail_task = MAIL_TASKS[mail_id]
+
+        if mail_job.broadcaster.stopped:
+            mail_job.restart = True
+
+        return
+
+    mail_job = MailJob(bot, mail_id)
+    mail_task = asyncio.create_task(mail_job.run())
+    mail_task.add_done_callback(lambda _: mail_done(bot, mail_id))
+
+    MAIL_TASKS[mail_id] = (mail_job, mail_task)
+
+
+# Завершение задачи рассылки
+def mail_done(bot: Bot, mail_id: int):
+    mail_job, mail_task = MAIL_TASKS.pop(mail_id)
+
+    if mail_job.restart:
+        mail_start(bot, mail_id)
+
+
+# Остановка рассылки (состояние в БД меняет вызывающий)
+async def mail_stop(mail_id: int):
+    if mail_id in MAIL_TASKS:
+        mail_job, mail_task = MAIL_TASKS[mail_id]
+        mail_job.restart = False
+        mail_job.broadcaster.stop()
+
+        await asyncio.wait([mail_task], timeout=30)
+
+
+# Продолжение незавершённых рассылок после запуска бота
+async def mail_resume_all(bot: Bot):
+    for get_mail in await Mailx.agets(mail_status="active"):
+        mail_start(bot, get_mail.mail_id)
+
+
+# Остановка всех рассылок при выключении бота (остаются active и продолжатся при запуске)
+async def mail_stop_all():
+    for mail_id in list(MAIL_TASKS):
+        await mail_stop(mail_id)
+
+
+# Очистка статусов получателей старых рассылок (запускается шедулером раз в сутки)
+async def mail_prune():
+    await Mailx.aprune(get_unix() - MAIL_KEEP)
@@ -0,0 +1,204 @@
+# - *- coding: utf- 8 - *-
+import asyncio
+import random
+from typing import Awaitable, Callable, Optional
+
+from aiogram import Bot
+
+from tgbot.data.config import OUTBOX_INTERVAL, OUTBOX_BATCH, OUTBOX_ATTEMPTS, OUTBOX_BACKOFF_MAX
+from tgbot.database.db_outbox import Outboxx, OutboxModel
+from tgbot.database.db_users import Userx
+from tgbot.services.api_server import SERVER_API, ServerUnavailable
+from tgbot.services.referral_service import ReferralService
+from tgbot.utils.const_functions import get_unix
+
+
+# Синхронизация баланса (отправляется актуальный баланс на момент доставки)
+async def outbox_balance(bot: Bot, payload: dict, outbox_key: str) -> bool:
+    get_user = await Userx.aget(user_id=payload['user_id'])
+
+    if get_user is None:
+        return True
+
+    status, _ = await SERVER_API.send(
+        "balance",
+        f"/api/balance/{get_user.user_id}",
+        {"rubles": float(get_user.user_balance), "chips": 0},
+        outbox_key,
+    )
+
+    return status == 200
+
+
+# Транзакция в истории Mini App
+async def outbox_transaction(bot: Bot, payload: dict, outbox_key: str) -> bool:
+    status, _ = await SERVER_API.send(
+        "transactions",
+        f"/api/transactions/{payload['user_id']}",
+        {
+            "type": payload['type'],
+            "amount": float(payload['amount']),
+            "source": payload['source'],
+            "description": payload['description'],
+        },
+        outbox_key,
+    )
+
+    return status == 200
+
+
+# Первый депозит реферала
+async def outbox_referral_first(bot: Bot, payload: dict, outbox_key: str) -> bool:
+    return await ReferralService.register_first_deposit(
+        str(payload['user_id']),
+        payload['referrer_code'],
+        payload['amount'],
+        idempotency_key=outbox_key,
+    )
+
+
+# Повторный депозит реферала
+async def outbox_referral_repeated(bot: Bot, payload: dict, outbox_key: str) -> bool:
+    return await ReferralService.register_repeated_deposit(
+        str(payload['user_id']),
+        payload['referrer_code'],
+        payload['amount'],
+        idempotency_key=outbox_key,
+    )
+
+
+# Ссылка на фото профиля (содержит токен бота, поэтому в очереди хранится только file_id)
+async def get_photo_url(bot: Bot, file_id: Optional[str]) -> Optional[str]:
+    if not file_id:
+        return None
+
+    try:
+        get_file = await bot.get_file(file_id)
+    except Exception:
+        return None
+
+    return f"https://api.telegram.org/file/bot{bot.token}/{get_file.file_path}"
+
+
+# Регистрация реферала, которая не прошла при /start (реферер сохраняется после ответа сервера)
+async def outbox_referral_register(bot: Bot, payload: dict, outbox_key: str) -> bool:
+    status, result = await SERVER_API.post(
+        "referral",
+        "/api/referral/register",
+        json={
+            "userId": str(payload['user_id']),
+            "referrerId": payload['referrer_id'],
+            "nickname": payload['nickname'],
+            "photoUrl": await get_photo_url(bot, payload.get('photo_file_id')),
+        },
+        headers={'Idempotency-Key': outbox_key},
+    )
+
+    if status == 200 and result is not None and result.get('success'):
+        await Userx.aupdate(payload['user_id'], user_referrer=payload['referral_code'])
+        return True
+
+    return result is not None and result.get('message') == 'Already referred'
+
+
+# Обработчики событий (тип события: функция доставки, True - доставлено)
+OUTBOX_HANDLERS: dict[str, Callable[[Bot, dict, str], Awaitable[bool]]] = {
+    'balance': outbox_balance,
+    'transaction': outbox_transaction,
+    'referral_first': outbox_referral_first,
+    'referral_repeated': outbox_referral_repeated,
+    'referral_register': outbox_referral_register,
+}
+
+
+# Фоновая отправка событий из storage_outbox с повторами и экспоненциальной паузой
+class OutboxDispatcher:
+    def __init__(self):
+        self.bot: Optional[Bot] = None
+
+        self._task: Optional[asyncio.Task] = None
+        self._wake = asyncio.Event()
+        self._cleared = 0
+
+    # Немедленная проверка очереди (после записи новых событий)
+    def wake(self):
+        self._wake.set()
+
+    # Пауза перед следующей попыткой
+    @staticmethod
+    def get_delay(outbox_attempts: int) -> int:
+        outbox_delay = min(OUTBOX_INTERVAL * 2 ** outbox_attempts, OUTBOX_BACKOFF_MAX)
+
+        return int(outbox_delay * random.uniform(0.8, 1.2))
+
+    # Доставка одного события
+    async def deliver(self, event: OutboxModel):
+        outbox_handler = OUTBOX_HANDLERS.get(event.outbox_event)
+
+        try:
+            if outbox_handler is None:
+                is_sent, outbox_error = False, f"Unknown event {event.outbox_event}"
+            else:
+                is_sent, outbox_error = await outbox_handler(self.bot, event.get_payload(), event.outbox_key), "Rejected"
+        except ServerUnavailable:
+            return  # Сервер отключён выключателем, попытка не засчитывается
+        except Exception as ex:
+            is_sent, outbox_error = False, f"{type(ex).__name__}: {ex}"
+
+        if is_sent:
+            await Outboxx.adone(event.increment)
+        else:
+            await Outboxx.afail(event.increment, outbox_error, self.get_delay(event.outbox_attempts), OUTBOX_ATTEMPTS)
+
+    # Отправка одной пачки событий (количество обработанных)
+    # События доставляются одновременно через общий пул подключений к серверу
+    async def drain(self) -> int:
+        get_events = await Outboxx.agets_due(OUTBOX_BATCH)
+
+        await asyncio.gather(*[self.deliver(event) for event in get_events])
+
+        return len(get_events)
+
+    async def run(self):
+        while True:
+            self._wake.clear()
+
+            try:
+                # Пока сервер отключён, очередь не разбирается (пробный запрос отправит первый обработчик)
+                events_count = 0 if SERVER_API.breaker.is_open else await self.drain()
+
+                # Раз в час удаляются доставленные события старше суток
+                if get_unix() - self._cleared >= 3600:
+                    await Outboxx.aclear_done(get_unix() - 86400)
+                    self._cleared = get_unix()
+            except Exception as ex:
+                print(f"myError outbox: {ex}")
+                events_count = 0
+
+            if events_count < OUTBOX_BATCH:
+                try:
+                    await asyncio.wait_for(self._wake.wait(), OUTBOX_INTERVAL)
+                except asyncio.TimeoutError:
+                    ...
+
+    # Запуск в фоне
+    def start(self, bot: Bot):
+        self.bot = bot
+
+        if self._task is None:
+            self._task = asyncio.create_task(self.run())
+
+    # Остановка (недоставленные события остаются в БД и отправятся после запуска)
+    async def stop(self):
+        if self._task is not None:
+            self._task.cancel()
+
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                ...
+
+            self._task = None
+
+
+OUTBOX = OutboxDispatcher()
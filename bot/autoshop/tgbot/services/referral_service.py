@@ -2,11 +2,10 @@
 """
 Сервис для интеграции с реферальной системой партнёрской программы
 """
-import aiohttp
 import asyncio
 from typing import Optional
 
-from tgbot.data.config import SERVER_API_URL, PARTNER_API_SECRET
+from tgbot.services.api_server import SERVER_API, ServerUnavailable
 
 
 class ReferralService:
@@ -35,25 +34,23 @@ class ReferralService:
                 except:
                     referrer_id = referrer_code
             
-            async with aiohttp.ClientSession() as session:
-                async with session.post(
-                    f"{SERVER_API_URL}/api/referral/register",
-                    json={
-                        "userId": user_id,
-                        "referrerId": referrer_id
-                    },
-                    headers={'X-API-Secret': PARTNER_API_SECRET},
-                    timeout=aiohttp.ClientTimeout(total=10)
-                ) as resp:
-                    result = await resp.json()
-                    
-                    if resp.status == 200 and result.get('success'):
-                        print(f"✅ Referral click registered: {user_id} → {referrer_id}")
-                        return True
-                    else:
-                        print(f"⚠️ Referral click failed: {result.get('message', 'Unknown error')}")
-                        return False
-                        
+            status, result = await SERVER_API.post(
+                "referral",
+                "/api/referral/register",
+                json={
+                    "userId": user_id,
+                    "referrerId": referrer_id
+                },
+            )
+            result = result or {}
+
+            if status == 200 and result.get('success'):
+                print(f"✅ Referral click registered: {user_id} → {referrer_id}")
+                return True
+            else:
+                print(f"⚠️ Referral click failed: {result.get('message', 'Unknown error')}")
+                return False
+
         except asyncio.TimeoutError:
             print(f"❌ Timeout registering referral click")
             return False
@@ -62,7 +59,7 @@ class ReferralService:
             return False
     
     @staticmethod
-    async def register_first_deposit(user_id: str, referrer_code: str, amount: float) -> bool:
+    async def register_first_deposit(user_id: str, referrer_code: str, amount: float, idempotency_key: str = None) -> bool:
         """
         Зарегистрировать первый депозит пользователя
         
@@ -70,40 +67,44 @@ class ReferralService:
             user_id: Telegram ID пользователя
             referrer_code: Реферальный код партнёра
             amount: Сумма пополнения
+            idempotency_key: Ключ, по которому сервер отбрасывает повторную отправку
         
         Returns:
             True если успешно
+        
+        Raises:
+            ServerUnavailable: сервер отключён выключателем, запрос не отправлялся
         """
         if not referrer_code or amount <= 0:
             return False
         
         try:
-            async with aiohttp.ClientSession() as session:
-                async with session.post(
-                    f"{SERVER_API_URL}/api/referral/register-referral",
-                    json={
-                        "referralCode": referrer_code,
-                        "referralUserId": str(user_id),
-                        "depositAmount": amount
-                    },
-                    headers={'X-API-Secret': PARTNER_API_SECRET},
-                    timeout=aiohttp.ClientTimeout(total=10)
-                ) as resp:
-                    result = await resp.json()
-                    
-                    if resp.status == 200:
-                        print(f"✅ First deposit registered: {user_id} → {amount}₽")
-                        return True
-                    else:
-                        print(f"⚠️ First deposit failed: {result.get('message')}")
-                        return False
-                        
+            status, result = await SERVER_API.send(
+                "referral",
+                "/api/referral/register-referral",
+                {
+                    "referralCode": referrer_code,
+                    "referralUserId": str(user_id),
+                    "depositAmount": amount
+                },
+                idempotency_key,
+            )
+
+            if status == 200:
+                print(f"✅ First deposit registered: {user_id} → {amount}₽")
+                return True
+            else:
+                print(f"⚠️ First deposit failed: {(result or {}).get('message')}")
+                return False
+
+        except ServerUnavailable:
+            raise  # Сервер отключён выключателем - outbox повторит без траты попытки
         except Exception as e:
             print(f"❌ Error registering first deposit: {e}")
             return False
     
     @staticmethod
-    async def register_repeated_deposit(user_id: str, referrer_code: str, amount: float) -> bool:
+    async def register_repeated_deposit(user_id: str, referrer_code: str, amount: float, idempotency_key: str = None) -> bool:
         """
         Зарегистрировать повторное пополнение
         
@@ -111,33 +112,38 @@ class ReferralService:
             user_id: Telegram ID пользователя
             referrer_code: Реферальный код партнёра
             amount: Сумма пополнения
+            idempotency_key: Ключ, по которому сервер отбрасывает повторную отправку
         
         Returns:
             True если успешно
+        
+        Raises:
+            ServerUnavailable: сервер отключён выключателем, запрос не отправлялся
         """
         if not referrer_code or amount <= 0:
             return False
         
         try:
-            async with aiohttp.ClientSession() as session:
-                async with session.post(
-                    f"{SERVER_API_URL}/api/referral/update-deposit",
-                    json={
-                        "referralCode": referrer_code,
-                        "referralUserId": str(user_id),
-                        "depositAmount": amount
-                    },
-                    headers={'X-API-Secret': PARTNER_API_SECRET},
-                    timeout=aiohttp.ClientTimeout(total=10)
-                ) as resp:
-                    if resp.status == 200:
-                        print(f"✅ Deposit updated: {user_id} → {amount}₽")
-                        return True
-                    else:
-                        result = await resp.json()
-                        print(f"⚠️ Deposit update failed: {result.get('message')}")
-                        return False
-                        
+            status, result = await SERVER_API.send(
+                "referral",
+                "/api/referral/update-deposit",
+                {
+                    "referralCode": referrer_code,
+                    "referralUserId": str(user_id),
+                    "depositAmount": amount
+                },
+                idempotency_key,
+            )
+
+            if status == 200:
+                print(f"✅ Deposit updated: {user_id} → {amount}₽")
+                return True
+            else:
+                print(f"⚠️ Deposit update failed: {(result or {}).get('message')}")
+                return False
+
+        except ServerUnavailable:
+            raise  # Сервер отключён выключателем - outbox повторит без траты попытки
         except Exception as e:
             print(f"❌ Error updating deposit: {e}")
             return False
@@ -160,27 +166,25 @@ class ReferralService:
             return False
         
         try:
-            async with aiohttp.ClientSession() as session:
-                async with session.post(
-                    f"{SERVER_API_URL}/api/referral/add-earnings",
-                    json={
-                        "referralCode": referrer_code,
-                        "referralUserId": str(user_id),
-                        "lossAmount": loss_amount
-                    },
-                    headers={'X-API-Secret': PARTNER_API_SECRET},
-                    timeout=aiohttp.ClientTimeout(total=10)
-                ) as resp:
-                    result = await resp.json()
-                    
-                    if resp.status == 200:
-                        partner_earnings = result.get('earnings', 0)
-                        print(f"✅ Earnings added [{game_name}]: loss={loss_amount}₽, partner_gets={partner_earnings}₽ (60%)")
-                        return True
-                    else:
-                        print(f"⚠️ Earnings failed [{game_name}]: {result.get('message')}")
-                        return False
-                        
+            status, result = await SERVER_API.send(
+                "referral",
+                "/api/referral/add-earnings",
+                {
+                    "referralCode": referrer_code,
+                    "referralUserId": str(user_id),
+                    "lossAmount": loss_amount
+                },
+            )
+            result = result or {}
+
+            if status == 200:
+                partner_earnings = result.get('earnings', 0)
+                print(f"✅ Earnings added [{game_name}]: loss={loss_amount}₽, partner_gets={partner_earnings}₽ (60%)")
+                return True
+            else:
+                print(f"⚠️ Earnings failed [{game_name}]: {result.get('message')}")
+                return False
+
         except Exception as e:
             print(f"❌ Error adding earnings [{game_name}]: {e}")
             return False
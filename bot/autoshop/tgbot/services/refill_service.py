@@ -0,0 +1,210 @@
+# - *- coding: utf- 8 - *-
+import asyncio
+from typing import Optional, Union
+
+from aiogram import Bot
+
+from tgbot.data.config import BILL_POLL_INTERVAL, BILL_POLL_BATCH, BILL_POLL_MAX, BILL_EXPIRE
+from tgbot.database.db_bills import Billx, BillModel
+from tgbot.database.db_refill import Refillx
+from tgbot.database.db_users import UserModel
+from tgbot.services.api_cactuspay import CactusPayAPI
+from tgbot.services.api_qiwi import QiwiAPI
+from tgbot.services.api_yoomoney import YoomoneyAPI
+from tgbot.services.balance_cache import BALANCE_CACHE
+from tgbot.services.outbox import OUTBOX
+from tgbot.utils.const_functions import send_admins, get_unix
+from tgbot.utils.misc.bot_models import ARS
+
+# Идущие проверки оплаты (чек: результат проверки)
+BILL_CHECKS: dict[str, asyncio.Future] = {}
+
+
+# События для сервера Mini App после пополнения (ключ идемпотентности строится из чека)
+# get_user читается в транзакции зачисления, поэтому первый депозит определяется без гонки
+def get_refill_events(get_user: UserModel, pay_amount: float, pay_receipt: Union[str, int], method_description: str):
+    events = [
+        (f"balance:{pay_receipt}", "balance", {'user_id': get_user.user_id}),
+        (
+            f"transaction:{pay_receipt}",
+            "transaction",
+            {
+                'user_id': get_user.user_id,
+                'type': "add",
+                'amount': pay_amount,
+                'source': "bot",
+                'description': f"Пополнение через {method_description}",
+            },
+        ),
+    ]
+
+    # Депозит в реферальную систему (первый, если до пополнения сумма пополнений была 0)
+    if get_user.user_referrer:
+        events.append(
+            (
+                f"referral:{pay_receipt}",
+                "referral_first" if get_user.user_refill == 0 else "referral_repeated",
+                {'user_id': get_user.user_id, 'referrer_code': get_user.user_referrer, 'amount': pay_amount},
+            )
+        )
+
+    return events
+
+
+# Зачисление пополнения по кнопке проверки или уведомлению платёжки (статус Refillx.credit, юзер до зачисления)
+# Пополнение, баланс и события для сервера пишутся одной транзакцией, сервер получает их в фоне через OUTBOX
+async def refill_credit(
+        bot: Bot,
+        user_id: int,
+        pay_way: str,
+        pay_amount: float,
+        pay_receipt: Union[str, int],
+        pay_comment: str = "",
+        payment_method: str = None,
+        message_id: int = None,
+) -> tuple[int, Optional[UserModel]]:
+    if payment_method:
+        method_description = f"{pay_way} ({payment_method})"
+    else:
+        method_description = pay_way
+
+    refill_status, get_user = await Refillx.acredit(
+        user_id=user_id,
+        refill_comment=pay_comment,
+        refill_amount=pay_amount,
+        refill_receipt=pay_receipt,
+        refill_method=pay_way,
+        get_events=lambda get_user: get_refill_events(get_user, pay_amount, pay_receipt, method_description),
+    )
+
+    if refill_status != 0:
+        return refill_status, get_user
+
+    OUTBOX.wake()
+    BALANCE_CACHE.set(user_id, round(get_user.user_balance + pay_amount, 2))
+
+    await Billx.aupdate(pay_receipt, bill_status="paid")
+
+    send_text = (
+        f"<b>💰 Вы пополнили баланс на сумму <code>{pay_amount}₽</code>. Удачи ❤️\n"
+        f"🧾 Чек: <code>#{pay_receipt}</code></b>"
+    )
+
+    # Сообщение со счётом заменяется на сообщение о зачислении, если его нет - отправляется новое
+    is_edited = False
+
+    if message_id is not None:
+        try:
+            await bot.edit_message_text(send_text, chat_id=user_id, message_id=message_id)
+            is_edited = True
+        except:
+            ...
+
+    if not is_edited:
+        try:
+            await bot.send_message(user_id, send_text)
+        except:
+            ...
+
+    await send_admins(
+        bot,
+        f"👤 Пользователь: <b>@{get_user.user_login}</b> | <a href='tg://user?id={get_user.user_id}'>{get_user.user_name}</a> | <code>{get_user.user_id}</code>\n"
+        f"💰 Сумма пополнения: <code>{pay_amount}₽</code>\n"
+        f"🧾 Чек: <code>#{pay_receipt}</code>"
+    )
+
+    return 0, get_user
+
+
+# Проверка оплаты счёта у платёжки (статус, сумма, способ оплаты)
+# Статусы как у bill_check платёжек: 0 - оплачен, 1 - ошибка, 2 - не оплачен, 3 - не рубли, 4 - отменён
+# Одновременные проверки одного чека (повторные нажатия, фоновая проверка) ждут один запрос к платёжке
+async def bill_check(
+        bot: Bot,
+        arSession: ARS,
+        pay_way: str,
+        pay_receipt: Union[str, int],
+        skipping_error: bool = False,
+) -> tuple[int, Optional[float], Optional[str]]:
+    pay_receipt = str(pay_receipt)
+
+    if pay_receipt in BILL_CHECKS:
+        return await asyncio.shield(BILL_CHECKS[pay_receipt])
+
+    future = asyncio.get_running_loop().create_future()
+    BILL_CHECKS[pay_receipt] = future
+
+    try:
+        if pay_way == "CactusPay":
+            pay_status, pay_amount, payment_method = await (
+                CactusPayAPI(bot=bot, arSession=arSession, skipping_error=skipping_error)
+            ).bill_check(pay_receipt)
+        elif pay_way == "Yoomoney":
+            pay_status, pay_amount = await (
+                YoomoneyAPI(bot=bot, arSession=arSession, skipping_error=skipping_error)
+            ).bill_check(pay_receipt)
+            payment_method = None
+        elif pay_way == "QIWI":
+            pay_status, pay_amount = await (
+                QiwiAPI(bot=bot, arSession=arSession, skipping_error=skipping_error)
+            ).bill_check(pay_receipt)
+            payment_method = None
+        else:
+            pay_status, pay_amount, payment_method = 1, None, None
+    except Exception as ex:
+        future.set_exception(ex)
+        future.exception()  # Ошибка передаётся ожидающим, без предупреждения о непрочитанном исключении
+        raise
+    else:
+        future.set_result((pay_status, pay_amount, payment_method))
+    finally:
+        if not future.done():
+            future.cancel()
+
+        BILL_CHECKS.pop(pay_receipt, None)
+
+    return pay_status, pay_amount, payment_method
+
+
+# Фоновая проверка одного счёта
+async def check_bill(bot: Bot, arSession: ARS, get_bill: BillModel):
+    try:
+        pay_status, pay_amount, payment_method = await bill_check(
+            bot, arSession, get_bill.bill_way, get_bill.bill_receipt, skipping_error=True,
+        )
+    except Exception as ex:
+        print(f"myError bill check {get_bill.bill_receipt}: {ex}")
+        pay_status, pay_amount, payment_method = 1, None, None
+
+    if pay_status == 0:
+        refill_status, _ = await refill_credit(
+            bot=bot,
+            user_id=get_bill.user_id,
+            pay_way=get_bill.bill_way,
+            pay_amount=pay_amount,
+            pay_receipt=get_bill.bill_receipt,
+            pay_comment=get_bill.bill_receipt,
+            payment_method=payment_method,
+            message_id=get_bill.bill_message_id,
+        )
+
+        # Уже зачислен по кнопке или юзера нет - счёт больше не проверяется
+        if refill_status != 0:
+            await Billx.aupdate(get_bill.bill_receipt, bill_status="paid" if refill_status == 1 else "expired")
+    elif pay_status == 4:
+        await Billx.aupdate(get_bill.bill_receipt, bill_status="cancelled")
+    else:
+        await Billx.apostpone(
+            get_bill.bill_receipt,
+            min(BILL_POLL_INTERVAL * 2 ** get_bill.bill_checks, BILL_POLL_MAX),
+        )
+
+
+# Проверка неоплаченных счетов пачками (запускается шедулером каждые BILL_POLL_INTERVAL секунд)
+# Пауза между проверками одного счёта растёт вдвое до BILL_POLL_MAX, через BILL_EXPIRE счёт истекает
+async def check_bills(bot: Bot, arSession: ARS):
+    await Billx.aexpire(get_unix() - BILL_EXPIRE)
+
+    get_bills = await Billx.agets_due(BILL_POLL_BATCH)
+
+    await asyncio.gather(*[check_bill(bot, arSession, get_bill) for get_bill in get_bills])
@@ -0,0 +1,166 @@
+# - *- coding: utf- 8 - *-
+import hashlib
+import hmac
+from typing import Optional
+
+from aiogram import Bot
+from aiohttp import web
+
+from tgbot.data.config import BOT_WEB_HOST, BOT_WEB_PORT, PARTNER_API_SECRET, YOOMONEY_NOTIFY_SECRET
+from tgbot.database.db_bills import Billx
+from tgbot.services.balance_cache import BALANCE_CACHE
+from tgbot.services.refill_service import refill_credit, bill_check
+from tgbot.utils.misc.bot_models import ARS
+
+BOT_KEY = web.AppKey("bot", Bot)  # Бот для сообщений о зачислении
+SESSION_KEY = web.AppKey("arSession", ARS)  # Сессия для запросов к платёжкам
+
+
+# Проверка секрета сервера Mini App
+def check_secret(request: web.Request) -> bool:
+    return hmac.compare_digest(request.headers.get('X-API-Secret', ""), PARTNER_API_SECRET)
+
+
+# Уведомление об изменении баланса на сервере Mini App
+# {"userId": ..., "rubles": ..., "chips": ...} - новый баланс, без rubles - баланс удаляется из кэша
+async def balance_push(request: web.Request) -> web.Response:
+    if not check_secret(request):
+        return web.json_response({'success': False, 'message': "Forbidden"}, status=403)
+
+    try:
+        data = await request.json()
+        user_id = int(data['userId'])
+
+        if data.get('rubles') is None:
+            BALANCE_CACHE.forget(user_id)
+        else:
+            BALANCE_CACHE.set(user_id, float(data['rubles']), data.get('chips'))
+    except (ValueError, KeyError, TypeError):
+        return web.json_response({'success': False, 'message': "Bad request"}, status=400)
+
+    return web.json_response({'success': True})
+
+
+# Подпись HTTP-уведомления ЮMoney (sha1 от полей уведомления и секрета)
+def get_yoomoney_hash(data, secret: str) -> str:
+    sign_text = "&".join([
+        data.get('notification_type', ""),
+        data.get('operation_id', ""),
+        data.get('amount', ""),
+        data.get('currency', ""),
+        data.get('datetime', ""),
+        data.get('sender', ""),
+        data.get('codepro', ""),
+        secret,
+        data.get('label', ""),
+    ])
+
+    return hashlib.sha1(sign_text.encode("utf-8")).hexdigest()
+
+
+# Уведомление ЮMoney о входящем переводе (label - чек счёта)
+# Ответ 200 означает, что уведомление принято, иначе ЮMoney отправит его повторно
+async def yoomoney_notify(request: web.Request) -> web.Response:
+    if YOOMONEY_NOTIFY_SECRET == "":
+        return web.Response(status=404)
+
+    data = await request.post()
+
+    if not hmac.compare_digest(get_yoomoney_hash(data, YOOMONEY_NOTIFY_SECRET), data.get('sha1_hash', "")):
+        return web.Response(status=403, text="Bad signature")
+
+    # Перевод с протекцией или ещё не зачисленный на кошелёк не учитывается
+    if data.get('codepro') == "true" or data.get('unaccepted') == "true" or data.get('currency') != "643":
+        return web.Response(text="OK")
+
+    get_bill = await Billx.aget(bill_receipt=data.get('label', ""))
+
+    if get_bill is None or get_bill.bill_way != "Yoomoney":
+        return web.Response(text="OK")
+
+    await refill_credit(
+        bot=request.app[BOT_KEY],
+        user_id=get_bill.user_id,
+        pay_way=get_bill.bill_way,
+        pay_amount=float(data['amount']),
+        pay_receipt=get_bill.bill_receipt,
+        pay_comment=get_bill.bill_receipt,
+        message_id=get_bill.bill_message_id,
+    )
+
+    return web.Response(text="OK")
+
+
+# Уведомление CactusPay об оплате (order_id - чек счёта)
+# Уведомлению не доверяется: статус и сумма берутся из одного запроса к API CactusPay
+# Проверяется и истёкший счёт (оплата могла прийти позже), повторно не зачисляется из-за уникального чека пополнения
+async def cactuspay_notify(request: web.Request) -> web.Response:
+    try:
+        if request.content_type == "application/json":
+            data = await request.json()
+        else:
+            data = await request.post()
+
+        bill_receipt = str(data['order_id'])
+    except (ValueError, KeyError, TypeError):
+        return web.Response(status=400, text="Bad request")
+
+    get_bill = await Billx.aget(bill_receipt=bill_receipt)
+
+    if get_bill is None or get_bill.bill_way != "CactusPay":
+        return web.Response(text="OK")
+
+    pay_status, pay_amount, payment_method = await bill_check(
+        request.app[BOT_KEY], request.app[SESSION_KEY], get_bill.bill_way, get_bill.bill_receipt, skipping_error=True,
+    )
+
+    if pay_status == 0:
+        await refill_credit(
+            bot=request.app[BOT_KEY],
+            user_id=get_bill.user_id,
+            pay_way=get_bill.bill_way,
+            pay_amount=pay_amount,
+            pay_receipt=get_bill.bill_receipt,
+            pay_comment=get_bill.bill_receipt,
+            payment_method=payment_method,
+            message_id=get_bill.bill_message_id,
+        )
+
+    return web.Response(text="OK")
+
+
+# HTTP сервер бота для уведомлений сервера Mini App и платёжек (выключен, если BOT_WEB_PORT не задан)
+class BotWebServer:
+    def __init__(self, host: str = BOT_WEB_HOST, port: int = BOT_WEB_PORT):
+        self.host = host
+        self.port = port
+
+        self.app = web.Application()
+        self.app.router.add_post("/api/bot/balance", balance_push)
+        self.app.router.add_post("/webhook/yoomoney", yoomoney_notify)
+        self.app.router.add_post("/webhook/cactuspay", cactuspay_notify)
+
+        self._runner: Optional[web.AppRunner] = None
+
+    # Запуск сервера
+    async def start(self, bot: Bot, arSession: ARS):
+        if self.port == 0 or self._runner is not None:
+            return
+
+        self.app[BOT_KEY] = bot
+        self.app[SESSION_KEY] = arSession
+
+        self._runner = web.AppRunner(self.app, access_log=None)
+        await self._runner.setup()
+        await web.TCPSite(self._runner, self.host, self.port).start()
+
+        print(f"🌐 HTTP сервер бота запущен на {self.host}:{self.port}")
+
+    # Остановка сервера
+    async def stop(self):
+        if self._runner is not None:
+            await self._runner.cleanup()
+            self._runner = None
+
+
+WEB_SERVER = BotWebServer()
@@ -1,19 +1,24 @@
 # - *- coding: utf- 8 - *-
-import asyncio
+import csv
+import io
 import json
 from datetime import datetime
-from typing import Union
+from typing import Union, BinaryIO, Iterator, Optional
 
 from aiogram import Bot
-from aiogram.types import FSInputFile
+from aiogram.types import FSInputFile, BufferedInputFile
 
 from tgbot.data.config import get_admins, BOT_VERSION, PATH_DATABASE, get_desc
 from tgbot.database.db_category import Categoryx
+from tgbot.database.db_helper import checkpoint_dbx, run_dbx
 from tgbot.database.db_item import Itemx
 from tgbot.database.db_position import Positionx, PositionModel
+from tgbot.database.db_purchases import PurchasesModel
 from tgbot.database.db_settings import Settingsx
 from tgbot.database.db_users import Userx
-from tgbot.utils.const_functions import get_unix, get_date, ded, send_admins
+from tgbot.services.api_server import SERVER_API, ServerUnavailable
+from tgbot.services.balance_cache import BALANCE_CACHE
+from tgbot.utils.const_functions import get_unix, get_date, ded, send_admins, convert_date
 from tgbot.utils.misc.bot_models import ARS
 from tgbot.utils.text_functions import get_statistics
 
@@ -38,32 +43,34 @@ async def startup_notify(bot: Bot, arSession: ARS):
 
 # Автоматическая очистка ежедневной статистики после 00:00:15
 async def update_profit_day(bot: Bot):
-    await send_admins(bot, get_statistics())
+    await send_admins(bot, await run_dbx(get_statistics))
 
-    Settingsx.update(misc_profit_day=get_unix())
+    await Settingsx.aupdate(misc_profit_day=get_unix())
 
 
 # Автоматическая очистка еженедельной статистики в понедельник 00:00:10
 async def update_profit_week():
-    Settingsx.update(misc_profit_week=get_unix())
+    await Settingsx.aupdate(misc_profit_week=get_unix())
 
 
 # Автоматическое обновление счётчика каждый месяц первого числа в 00:00:05
 async def update_profit_month():
-    Settingsx.update(misc_profit_month=get_unix())
+    await Settingsx.aupdate(misc_profit_month=get_unix())
 
 
 # Проверка на перенесение БД из старого бота в нового или указание токена нового бота
 async def check_bot_username(bot: Bot):
-    get_login = Settingsx.get()
+    get_login = await Settingsx.aget()
     get_bot = await bot.get_me()
 
     if get_bot.username != get_login.misc_bot:
-        Settingsx.update(misc_bot=get_bot.username)
+        await Settingsx.aupdate(misc_bot=get_bot.username)
 
 
 # Автобэкапы БД для админов
 async def autobackup_admin(bot: Bot):
+    await run_dbx(checkpoint_dbx)
+
     for admin in get_admins():
         try:
             await bot.send_document(
@@ -121,8 +128,8 @@ async def check_mail(bot: Bot, arSession: ARS):
 
 
 # Вставка тэгов юзера в текст
-def insert_tags(user_id: Union[int, str], text: str) -> str:
-    get_user = Userx.get(user_id=user_id)
+async def insert_tags(user_id: Union[int, str], text: str) -> str:
+    get_user = await Userx.aget(user_id=user_id)
 
     if "{user_id}" in text:
         text = text.replace("{user_id}", f"<b>{get_user.user_id}</b>")
@@ -134,33 +141,78 @@ def insert_tags(user_id: Union[int, str], text: str) -> str:
     return text
 
 
-# Загрузка текста на текстовый хостинг
-async def upload_text(arSession: ARS, text: str) -> str:
-    session = await arSession.get_session()
+# Разделитель товаров из подписи к файлу (\n и \t можно указать текстом)
+def get_items_delimiter(caption: Optional[str]) -> Optional[str]:
+    if caption is None or caption == "":
+        return None
 
-    spare_pass = False
-    await asyncio.sleep(0.5)
+    return caption.replace("\\n", "\n").replace("\\t", "\t")
 
-    try:
-        response = await session.post(
-            "http://pastie.org/pastes/create",
-            data={'language': 'plaintext', 'content': text},
-        )
 
-        get_link = response.url
-        if "create" in str(get_link): spare_pass = True
-    except:
-        spare_pass = True
+# Потоковый разбор файла с товарами
+# txt - товары через пустую строку или через указанный разделитель
+# csv - одна строка таблицы = один товар, колонки склеиваются обратно через разделитель (кавычки csv снимаются)
+# Генератор читает файл синхронно, вызывающий код перебирает его в отдельном потоке
+def parse_items_file(file: BinaryIO, file_type: str, delimiter: Optional[str] = None) -> Iterator[str]:
+    if file_type == "csv":
+        delimiter = delimiter or ","
+        text_file = io.TextIOWrapper(file, encoding="utf-8-sig", errors="replace", newline="")
 
-    if spare_pass:
-        response = await session.post(
-            "https://www.friendpaste.com",
-            json={'language': 'text', 'title': '', 'snippet': text},
-        )
+        for row in csv.reader(text_file, delimiter=delimiter):
+            yield delimiter.join(row)
+
+        return
+
+    text_file = io.TextIOWrapper(file, encoding="utf-8-sig", errors="replace")
+
+    if delimiter is None:
+        item_lines = []
+
+        for line in text_file:
+            if line.strip() == "":
+                if len(item_lines) >= 1:
+                    yield "\n".join(item_lines)
+                    item_lines = []
+            else:
+                item_lines.append(line.rstrip("\n"))
+
+        if len(item_lines) >= 1:
+            yield "\n".join(item_lines)
+    elif delimiter == "\n":
+        for line in text_file:
+            yield line.rstrip("\n")
+    else:
+        item_buffer = ""
+
+        for line in text_file:
+            item_buffer += line
+            *get_items, item_buffer = item_buffer.split(delimiter)
+
+            yield from get_items
 
-        get_link = json.loads((await response.read()).decode())['url']
+        yield item_buffer
 
-    return get_link
+
+# Текстовый документ в памяти для отправки в телеграм
+def get_text_file(text: str, file_name: str) -> BufferedInputFile:
+    return BufferedInputFile(text.encode("utf-8"), filename=file_name)
+
+
+# Чеки покупок одним текстовым документом
+def get_purchases_file(get_purchases: list[PurchasesModel], file_name: str) -> BufferedInputFile:
+    save_purchases = []
+
+    for purchase in get_purchases:
+        save_purchases.append(
+            ded(f"""
+                Чек: #{purchase.purchase_receipt}
+                Товар: {purchase.purchase_position_name} | {purchase.purchase_count}шт | {purchase.purchase_price}₽
+                Дата покупки: {convert_date(purchase.purchase_unix)}
+                ------------------------------
+            """) + purchase.purchase_data
+        )
+
+    return get_text_file("\n\n\n".join(save_purchases), file_name)
 
 
 # Загрузка изображения на хостинг телеграфа
@@ -181,6 +233,7 @@ async def upload_photo(arSession: ARS, this_photo) -> str:
 # Наличие товаров
 def get_items_available() -> list[str]:
     get_categories = Categoryx.get_all()
+    get_counts = Itemx.counts_by_position()
     save_items = []
 
     for category in get_categories:
@@ -191,11 +244,11 @@ def get_items_available() -> list[str]:
 
             for position in get_positions:
                 if len(cache_items) < 30:
-                    get_items = Itemx.gets(position_id=position.position_id)
+                    get_items = get_counts.get(position.position_id, 0)
 
-                    if len(get_items) >= 1:
+                    if get_items >= 1:
                         cache_items.append(
-                            f"{position.position_name} | {position.position_price}₽ | В наличии {len(get_items)} шт",
+                            f"{position.position_name} | {position.position_price}₽ | В наличии {get_items} шт",
                         )
                 else:
                     save_items.append("\n".join(cache_items))
@@ -216,10 +269,10 @@ def get_positions_items(category_id: Union[str, int]) -> list[PositionModel]:
     save_positions = []
 
     if get_settings.misc_item_hide == "True":
-        for position in get_positions:
-            get_items = Itemx.gets(position_id=position.position_id)
+        get_counts = Itemx.counts_by_position()
 
-            if len(get_items) >= 1:
+        for position in get_positions:
+            if get_counts.get(position.position_id, 0) >= 1:
                 save_positions.append(position)
     else:
         save_positions = get_positions
@@ -238,7 +291,7 @@ async def autosettings_unix():
     unix_week = unix_day - (now_week * 86400)
     unix_month = int(datetime.strptime(f"1.{now_month}.{now_year} 0:0:0", "%d.%m.%Y %H:%M:%S").timestamp())
 
-    Settingsx.update(
+    await Settingsx.aupdate(
         misc_profit_day=unix_day,
         misc_profit_week=unix_week,
         misc_profit_month=unix_month,
@@ -252,27 +305,31 @@ async def get_balance_from_server(user_id: int, arSession: ARS) -> dict:
     
     Args:
         user_id: Telegram ID пользователя
-        arSession: Асинхронная сессия для запросов
+        arSession: Асинхронная сессия для запросов (сервер вызывается через общий SERVER_API)
         
     Returns:
         dict: {'rubles': float, 'chips': int} или None при ошибке
+
+    Баланс кэшируется на BALANCE_CACHE_TTL секунд, одновременные запросы одного юзера ждут один ответ сервера.
     """
-    from tgbot.data.config import SERVER_API_URL
-    
+    return await BALANCE_CACHE.get(int(user_id), lambda: load_balance_from_server(user_id))
+
+
+# Запрос баланса у сервера без кэша
+async def load_balance_from_server(user_id: int) -> dict:
     try:
-        session = await arSession.get_session()
-        url = f"{SERVER_API_URL}/api/balance/{user_id}"
-        
-        async with session.get(url, timeout=10) as response:
-            if response.status == 200:
-                data = await response.json()
-                return {
-                    'rubles': float(data.get('rubles', 0)),
-                    'chips': int(data.get('chips', 0))
-                }
-            else:
-                print(f"❌ Ошибка получения баланса с сервера: HTTP {response.status}")
-                return None
+        status, data = await SERVER_API.get("balance", f"/api/balance/{user_id}")
+
+        if status == 200 and data is not None:
+            return {
+                'rubles': float(data.get('rubles', 0)),
+                'chips': int(data.get('chips', 0))
+            }
+        else:
+            print(f"❌ Ошибка получения баланса с сервера: HTTP {status}")
+            return None
+    except ServerUnavailable:
+        return None  # Сервер отключён выключателем, используется баланс из БД
     except Exception as e:
         print(f"❌ Ошибка при запросе баланса с сервера: {e}")
         return None
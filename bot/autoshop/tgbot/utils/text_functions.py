@@ -8,14 +8,20 @@ from aiogram import Bot
 from tgbot.data.config import BOT_TIMEZONE
 from tgbot.database.db_category import Categoryx
 from tgbot.database.db_item import Itemx
+from tgbot.database.db_outbox import Outboxx
 from tgbot.database.db_position import Positionx
 from tgbot.database.db_purchases import Purchasesx, PurchasesModel
-from tgbot.database.db_refill import Refillx, RefillModel
+from tgbot.database.db_refill import RefillModel
 from tgbot.database.db_settings import Settingsx
+from tgbot.database.db_stats import Statsx
 from tgbot.database.db_users import Userx, UserModel
 from tgbot.keyboards.inline_admin import profile_search_finl
 from tgbot.keyboards.inline_admin_prod import position_edit_open_finl, category_edit_open_finl, item_delete_finl
 from tgbot.keyboards.inline_user import products_open_finl, user_profile_finl
+from tgbot.middlewares import USERS_MIDDLEWARE
+from tgbot.services.api_payments import PAYMENT_CLIENTS
+from tgbot.services.api_server import SERVER_API
+from tgbot.services.balance_cache import BALANCE_CACHE
 from tgbot.utils.const_functions import ded, get_unix, convert_day, convert_date
 from tgbot.utils.misc.bot_logging import bot_logger
 from tgbot.utils.misc.bot_models import ARS
@@ -25,8 +31,8 @@ from tgbot.utils.misc.bot_models import ARS
 ################################# ПОЛЬЗОВАТЕЛЬ #################################
 # Открытие профиля пользователем
 async def open_profile_user(bot: Bot, user_id: Union[int, str], arSession: ARS = None):
-    get_purchases = Purchasesx.gets(user_id=user_id)
-    get_user = Userx.get(user_id=user_id)
+    get_purchases = await Purchasesx.agets(user_id=user_id)
+    get_user = await Userx.aget(user_id=user_id)
 
     how_days = int(get_unix() - get_user.user_unix) // 60 // 60 // 24
     count_items = sum([purchase.purchase_count for purchase in get_purchases])
@@ -61,9 +67,9 @@ async def open_profile_user(bot: Bot, user_id: Union[int, str], arSession: ARS =
 
 # Открытие позиции пользователем
 async def position_open_user(bot: Bot, user_id: int, position_id: Union[str, int], remover: Union[str, int]):
-    get_items = Itemx.gets(position_id=position_id)
-    get_position = Positionx.get(position_id=position_id)
-    get_category = Categoryx.get(category_id=get_position.category_id)
+    get_items = await Itemx.acount(position_id=position_id)
+    get_position = await Positionx.aget(position_id=position_id)
+    get_category = await Categoryx.aget(category_id=get_position.category_id)
 
     if get_position.position_desc != "None":
         text_desc = f"\n▪️ Описание: {get_position.position_desc}"
@@ -76,7 +82,7 @@ async def position_open_user(bot: Bot, user_id: int, position_id: Union[str, int
         ▪️ Название: <code>{get_position.position_name}</code>
         ▪️ Категория: <code>{get_category.category_name}</code>
         ▪️ Стоимость: <code>{get_position.position_price}₽</code>
-        ▪️ Количество: <code>{len(get_items)}шт</code>
+        ▪️ Количество: <code>{get_items}шт</code>
         {text_desc}
     """)
 
@@ -108,7 +114,7 @@ async def position_open_user(bot: Bot, user_id: int, position_id: Union[str, int
 #################################### АДМИН #####################################
 # Открытие профиля админом
 async def open_profile_admin(bot: Bot, user_id: int, get_user: UserModel):
-    get_purchases = Purchasesx.gets(user_id=get_user.user_id)
+    get_purchases = await Purchasesx.agets(user_id=get_user.user_id)
 
     how_days = int(get_unix() - get_user.user_unix) // 60 // 60 // 24
     count_items = sum([purchase.purchase_count for purchase in get_purchases])
@@ -136,7 +142,7 @@ async def open_profile_admin(bot: Bot, user_id: int, get_user: UserModel):
 
 # Открытие пополнения админом
 async def refill_open_admin(bot: Bot, user_id: int, get_refill: RefillModel):
-    get_user = Userx.get(user_id=get_refill.user_id)
+    get_user = await Userx.aget(user_id=get_refill.user_id)
 
     if get_refill.refill_method == "Form":
         pay_way = "QIWI - по форме 🥝"
@@ -168,12 +174,10 @@ async def refill_open_admin(bot: Bot, user_id: int, get_refill: RefillModel):
 
 
 # Открытие покупки админом
-async def purchase_open_admin(bot: Bot, arSession: ARS, user_id: int, get_purchase: PurchasesModel):
-    from tgbot.utils.misc_functions import upload_text
+async def purchase_open_admin(bot: Bot, user_id: int, get_purchase: PurchasesModel):
+    from tgbot.utils.misc_functions import get_purchases_file
 
-    get_user = Userx.get(user_id=get_purchase.user_id)
-
-    link_items = await upload_text(arSession, get_purchase.purchase_data)
+    get_user = await Userx.aget(user_id=get_purchase.user_id)
 
     send_text = ded(f"""
         <b>🧾 Чек: <code>#{get_purchase.purchase_receipt}</code></b>
@@ -183,22 +187,27 @@ async def purchase_open_admin(bot: Bot, arSession: ARS, user_id: int, get_purcha
         ▪️ Куплено товаров: <code>{get_purchase.purchase_count}шт</code>
         ▪️ Цена одного товара: <code>{get_purchase.purchase_price_one}₽</code>
         ▪️ Сумма покупки: <code>{get_purchase.purchase_price}₽</code>
-        ▪️ Товары: <a href='{link_items}'>кликабельно</a>
         ▪️ Баланс до покупки: <code>{get_purchase.user_balance_before}₽</code>
         ▪️ Баланс после покупки: <code>{get_purchase.user_balance_after}₽</code>
         ▪️ Дата покупки: <code>{convert_date(get_purchase.purchase_unix)}</code>
     """)
 
+    # Карточка отдельным сообщением - подпись к файлу ограничена 1024 символами
     await bot.send_message(
         chat_id=user_id,
         text=send_text,
     )
 
+    await bot.send_document(
+        chat_id=user_id,
+        document=get_purchases_file([get_purchase], f"purchase_{get_purchase.purchase_receipt}.txt"),
+    )
+
 
 # Открытие категории админом
 async def category_open_admin(bot: Bot, user_id: int, category_id: Union[str, int], remover: int):
-    get_category = Categoryx.get(category_id=category_id)
-    get_positions = Positionx.gets(category_id=category_id)
+    get_category = await Categoryx.aget(category_id=category_id)
+    get_positions = await Positionx.agets(category_id=category_id)
 
     send_text = ded(f"""
         <b>🗃️ Редактирование категории</b>
@@ -217,12 +226,12 @@ async def category_open_admin(bot: Bot, user_id: int, category_id: Union[str, in
 
 # Открытие позиции админом
 async def position_open_admin(bot: Bot, user_id: int, position_id: Union[str, int]):
-    get_items = Itemx.gets(position_id=position_id)
-    get_position = Positionx.get(position_id=position_id)
-    get_category = Categoryx.get(category_id=get_position.category_id)
+    get_items = await Itemx.acount(position_id=position_id)
+    get_position = await Positionx.aget(position_id=position_id)
+    get_category = await Categoryx.aget(category_id=get_position.category_id)
 
-    get_purchases = Purchasesx.gets(purchase_position_id=position_id)
-    get_settings = Settingsx.get()
+    get_purchases = await Purchasesx.agets(purchase_position_id=position_id)
+    get_settings = await Settingsx.aget()
 
     profit_amount_all, profit_amount_day, profit_amount_week, profit_amount_month = 0, 0, 0, 0
     profit_count_all, profit_count_day, profit_count_week, profit_count_month = 0, 0, 0, 0
@@ -258,7 +267,7 @@ async def position_open_admin(bot: Bot, user_id: int, position_id: Union[str, in
         ▪️ Позиция: <code>{get_position.position_name}</code>
         ▪️ Категория: <code>{get_category.category_name}</code>
         ▪️ Стоимость: <code>{get_position.position_price}₽</code>
-        ▪️ Количество: <code>{len(get_items)}шт</code>
+        ▪️ Количество: <code>{get_items}шт</code>
         ▪️ Дата создания: <code>{convert_date(get_category.category_unix)}</code>
         ▪️ Изображение: {position_photo_text}
         ▪️ Описание: {position_desc}
@@ -295,10 +304,10 @@ async def position_open_admin(bot: Bot, user_id: int, position_id: Union[str, in
 
 # Открытие товара админом
 async def item_open_admin(bot: Bot, user_id: int, item_id: Union[str, int], remover: int):
-    get_item = Itemx.get(item_id=item_id)
+    get_item = await Itemx.aget(item_id=item_id)
 
-    get_position = Positionx.get(position_id=get_item.position_id)
-    get_category = Categoryx.get(category_id=get_item.category_id)
+    get_position = await Positionx.aget(position_id=get_item.position_id)
+    get_category = await Categoryx.aget(category_id=get_item.category_id)
 
     send_text = ded(f"""
         <b>🎁️ Редактирование товара</b>
@@ -318,62 +327,30 @@ async def item_open_admin(bot: Bot, user_id: int, item_id: Union[str, int], remo
 
 # Статистика бота
 def get_statistics() -> str:
-    refill_amount_all, refill_amount_day, refill_amount_week, refill_amount_month = 0, 0, 0, 0
-    refill_count_all, refill_count_day, refill_count_week, refill_count_month = 0, 0, 0, 0
-    profit_amount_all, profit_amount_day, profit_amount_week, profit_amount_month = 0, 0, 0, 0
-    profit_count_all, profit_count_day, profit_count_week, profit_count_month = 0, 0, 0, 0
-    users_all, users_day, users_week, users_month, users_money_have, users_money_give = 0, 0, 0, 0, 0, 0
-
-    get_categories = Categoryx.get_all()
-    get_positions = Positionx.get_all()
-    get_purchases = Purchasesx.get_all()
-    get_refill = Refillx.get_all()
-    get_items = Itemx.get_all()
-    get_users = Userx.get_all()
     get_settings = Settingsx.get()
 
     # Покупки
-    for purchase in get_purchases:
-        profit_amount_all += purchase.purchase_price
-        profit_count_all += purchase.purchase_count
-
-        if purchase.purchase_unix - get_settings.misc_profit_day >= 0:
-            profit_amount_day += purchase.purchase_price
-            profit_count_day += purchase.purchase_count
-        if purchase.purchase_unix - get_settings.misc_profit_week >= 0:
-            profit_amount_week += purchase.purchase_price
-            profit_count_week += purchase.purchase_count
-        if purchase.purchase_unix - get_settings.misc_profit_month >= 0:
-            profit_amount_month += purchase.purchase_price
-            profit_count_month += purchase.purchase_count
+    profit_count_all, profit_amount_all = Statsx.get_total("purchase")
+    profit_count_day, profit_amount_day = Statsx.get_total("purchase", get_settings.misc_profit_day)
+    profit_count_week, profit_amount_week = Statsx.get_total("purchase", get_settings.misc_profit_week)
+    profit_count_month, profit_amount_month = Statsx.get_total("purchase", get_settings.misc_profit_month)
 
     # Пополнения
-    for refill in get_refill:
-        refill_amount_all += refill.refill_amount
-        refill_count_all += 1
-
-        if refill.refill_unix - get_settings.misc_profit_day >= 0:
-            refill_amount_day += refill.refill_amount
-            refill_count_day += 1
-        if refill.refill_unix - get_settings.misc_profit_week >= 0:
-            refill_amount_week += refill.refill_amount
-            refill_count_week += 1
-        if refill.refill_unix - get_settings.misc_profit_month >= 0:
-            refill_amount_month += refill.refill_amount
-            refill_count_month += 1
+    refill_count_all, refill_amount_all = Statsx.get_total("refill")
+    refill_count_day, refill_amount_day = Statsx.get_total("refill", get_settings.misc_profit_day)
+    refill_count_week, refill_amount_week = Statsx.get_total("refill", get_settings.misc_profit_week)
+    refill_count_month, refill_amount_month = Statsx.get_total("refill", get_settings.misc_profit_month)
 
     # Пользователи и средства
-    for user in get_users:
-        users_money_have += user.user_balance
-        users_money_give += user.user_give
-        users_all += 1
-
-        if user.user_unix - get_settings.misc_profit_day >= 0:
-            users_day += 1
-        if user.user_unix - get_settings.misc_profit_week >= 0:
-            users_week += 1
-        if user.user_unix - get_settings.misc_profit_month >= 0:
-            users_month += 1
+    users_all = Statsx.get_total("user")[0]
+    users_day = Statsx.get_total("user", get_settings.misc_profit_day)[0]
+    users_week = Statsx.get_total("user", get_settings.misc_profit_week)[0]
+    users_month = Statsx.get_total("user", get_settings.misc_profit_month)[0]
+    users_money_have, users_money_give = Statsx.get_money()
+
+    get_items = Itemx.count()
+    get_positions = Positionx.count()
+    get_categories = Categoryx.count()
 
     # Даты обновления статистики
     all_days = [
@@ -424,12 +401,60 @@ def get_statistics() -> str:
         ┗ Средств в системе: <code>{users_money_have}₽</code>
 
         <b>🎁 Товары</b>
-        ┣ Товаров: <code>{len(get_items)}шт</code>
-        ┣ Позиций: <code>{len(get_positions)}шт</code>
-        ┗ Категорий: <code>{len(get_categories)}шт</code>
+        ┣ Товаров: <code>{get_items}шт</code>
+        ┣ Позиций: <code>{get_positions}шт</code>
+        ┗ Категорий: <code>{get_categories}шт</code>
 
         <b>🕰 Даты статистики</b>
         ┣ Дневная: <code>{now_day} {all_months[now_month - 1].title()}</code>
         ┣ Недельная: <code>{week_day} {all_months[week_month - 1].title()}, {all_days[week_week]}</code>
         ┗ Месячная: <code>{now_month} {all_months[now_month - 1].title()}, {now_year}г</code>
    """)
+
+
+# Задержки запросов по эндпоинтам или платёжкам
+def get_latency_text(get_stats: dict[str, dict], empty_text: str) -> str:
+    if len(get_stats) == 0:
+        return empty_text
+
+    return "\n".join(
+        f"▪️ {name}: <code>{stats['count']}</code> запр. | ошибок <code>{stats['errors']}</code> | "
+        f"p50 <code>{stats.get('p50_ms', 0)}мс</code> | p95 <code>{stats.get('p95_ms', 0)}мс</code>"
+        for name, stats in get_stats.items()
+    )
+
+
+# Состояние интеграции с сервером Mini App и платёжками для админа
+async def get_status_admin() -> str:
+    get_endpoints = get_latency_text(SERVER_API.get_stats(), "▪️ Запросов к серверу ещё не было")
+    get_payments = get_latency_text(PAYMENT_CLIENTS.get_stats(), "▪️ Запросов к платёжкам ещё не было")
+
+    get_outbox = await Outboxx.acounts()
+    get_breaker = SERVER_API.breaker.get()
+    get_cache = BALANCE_CACHE.get_stats()
+    get_users = USERS_MIDDLEWARE.get_stats()
+
+    if get_breaker['state'] == "closed":
+        get_state = "🟢 Доступен"
+    elif get_breaker['state'] == "half_open":
+        get_state = "🟡 Пробный запрос"
+    else:
+        get_state = f"🔴 Отключён, пробный запрос через <code>{get_breaker['retry_in']}сек</code>"
+
+    return ded(f"""
+        <b>📡 Сервер Mini App</b>
+        ➖➖➖➖➖➖➖➖➖➖
+        🌐 Адрес: <code>{SERVER_API.base_url}</code>
+        🔌 Состояние: {get_state}
+        ⚠️ Ошибок подряд: <code>{get_breaker['errors']}</code> | отключений: <code>{get_breaker['opened']}</code>
+        💾 Кэш балансов: <code>{get_cache['size']}шт</code> | попаданий <code>{round(get_cache['hit_rate'] * 100, 1)}%</code>
+        👤 Кэш юзеров: <code>{get_users['size']}шт</code> | попаданий <code>{round(get_users['hit_rate'] * 100, 1)}%</code> | записей в БД <code>{get_users['writes']}</code> из <code>{get_users['hits'] + get_users['misses']}</code>
+        📨 Очередь событий: <code>{get_outbox.get('pending', 0)}шт</code>
+        ☠️ Отложено после всех попыток: <code>{get_outbox.get('dead', 0)}шт</code> (/outbox_retry)
+        ➖➖➖➖➖➖➖➖➖➖
+        {get_endpoints}
+
+        <b>💳 Платёжки</b>
+        ➖➖➖➖➖➖➖➖➖➖
+        {get_payments}
+    """)
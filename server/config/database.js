@@ -87,6 +87,22 @@ function initDatabase() {
                 }
             });
             
+            // Table: idempotency_keys (processed webhooks from Python bot)
+            db.run(`CREATE TABLE IF NOT EXISTS idempotency_keys (
+                key TEXT NOT NULL,
+                scope TEXT NOT NULL,
+                status INTEGER,
+                response TEXT,
+                created_at DATETIME DEFAULT CURRENT_TIMESTAMP,
+                PRIMARY KEY (key, scope)
+            )`, (err) => {
+                if (err) {
+                    console.error('❌ Error creating idempotency_keys table:', err);
+                } else {
+                    console.log('✅ Table [idempotency_keys] ready');
+                }
+            });
+            
             // Table: referral_events (timeline events for charts)
             db.run(`CREATE TABLE IF NOT EXISTS referral_events (
                 id INTEGER PRIMARY KEY AUTOINCREMENT,
@@ -0,0 +1,90 @@
+// ============================================
+// IDEMPOTENCY MIDDLEWARE
+// Deduplicates Python bot webhooks by Idempotency-Key header
+// ============================================
+
+const { db } = require('../config/database');
+
+const IDEMPOTENCY_TTL_HOURS = 72; // Keys are kept longer than the bot retries an event
+
+/**
+ * Middleware for money-changing webhooks from Python bot
+ * The first request with a key is processed and its response is stored,
+ * repeats with the same key get the stored response without running the handler again.
+ * Requests without the header are processed as before.
+ */
+const idempotency = async (req, res, next) => {
+    const key = req.headers['idempotency-key'];
+
+    if (!key) {
+        return next();
+    }
+
+    const scope = `${req.method} ${req.baseUrl}${req.path}`;
+
+    try {
+        // Claim the key, only one request can insert it
+        const claim = await db.runAsync(
+            `INSERT OR IGNORE INTO idempotency_keys (key, scope) VALUES (?, ?)`,
+            [key, scope]
+        );
+
+        if (claim.changes === 0) {
+            const saved = await db.getAsync(
+                `SELECT status, response FROM idempotency_keys WHERE key = ? AND scope = ?`,
+                [key, scope]
+            );
+
+            if (saved && saved.status !== null) {
+                console.log(`♻️ Idempotent replay: ${scope} key=${key}`);
+                return res.status(saved.status).json(JSON.parse(saved.response));
+            }
+
+            // Same key is being processed right now (or was claimed by another route)
+            return res.status(409).json({
+                success: false,
+                message: 'Request with this Idempotency-Key is in progress'
+            });
+        }
+    } catch (error) {
+        console.error('❌ Idempotency check error:', error);
+        return res.status(500).json({
+            success: false,
+            message: 'Server error'
+        });
+    }
+
+    // Store the response, failed requests release the key so the bot can retry them
+    const sendJson = res.json.bind(res);
+
+    res.json = (body) => {
+        const query = res.statusCode >= 500
+            ? db.runAsync(`DELETE FROM idempotency_keys WHERE key = ? AND scope = ?`, [key, scope])
+            : db.runAsync(
+                `UPDATE idempotency_keys SET status = ?, response = ? WHERE key = ? AND scope = ?`,
+                [res.statusCode, JSON.stringify(body), key, scope]
+            );
+
+        query
+            .catch((error) => console.error('❌ Idempotency save error:', error))
+            .finally(() => sendJson(body));
+
+        return res;
+    };
+
+    next();
+};
+
+/**
+ * Remove old keys and keys left in progress by a crashed request
+ */
+const clearIdempotencyKeys = () => {
+    return db.runAsync(
+        `DELETE FROM idempotency_keys
+         WHERE created_at < datetime('now', ?)
+            OR (status IS NULL AND created_at < datetime('now', '-10 minutes'))`,
+        [`-${IDEMPOTENCY_TTL_HOURS} hours`]
+    );
+};
+
+module.exports = { idempotency, clearIdempotencyKeys };
@@ -6,6 +6,7 @@
 const express = require('express');
 const router = express.Router();
 const { db } = require('../config/database');
+const { notifyBotBalance } = require('../services/bot.service');
 const sqlite3 = require('sqlite3').verbose();
 const path = require('path');
 
@@ -110,6 +111,7 @@ router.post('/:telegramId', async (req, res) => {
         
         // Сохранить
         balances.set(telegramId, newBalance);
+        notifyBotBalance(telegramId, newBalance);
         
         console.log(`✅ Balance SET: ${telegramId} -> ${newBalance.rubles}₽ / ${newBalance.chips} chips`);
         
@@ -155,6 +157,7 @@ router.post('/:telegramId/add', async (req, res) => {
         currentBalance.chips = (currentBalance.chips || 0) + addChips;
         
         balances.set(telegramId, currentBalance);
+        notifyBotBalance(telegramId, currentBalance);
         
         console.log(`✅ Balance added: ${telegramId} +${addAmount}₽ +${addChips} chips`);
         
@@ -203,6 +206,7 @@ router.post('/:telegramId/subtract', async (req, res) => {
         currentBalance.chips = (currentBalance.chips || 0) - subtractChips;
         
         balances.set(telegramId, currentBalance);
+        notifyBotBalance(telegramId, currentBalance);
         
         console.log(`✅ Balance subtracted: ${telegramId} -${subtractAmount}₽ -${subtractChips} chips`);
         
@@ -7,6 +7,7 @@ const express = require('express');
 const router = express.Router();
 const ReferralService = require('../services/referral.service');
 const { webhookAuth } = require('../middleware/webhook');
+const { idempotency } = require('../middleware/idempotency');
 const { jwtAuth } = require('../middleware/auth');
 
 // ============================================
@@ -18,7 +19,7 @@ const { jwtAuth } = require('../middleware/auth');
  * Register click on referral link
  * Called when user opens bot via t.me/bot?start=ref_CODE
  */
-router.post('/register', webhookAuth, async (req, res) => {
+router.post('/register', webhookAuth, idempotency, async (req, res) => {
     try {
         const { userId, referrerId, nickname, photoUrl } = req.body;
         
@@ -47,7 +48,7 @@ router.post('/register', webhookAuth, async (req, res) => {
  * Register first deposit
  * Called when referred user makes their first deposit
  */
-router.post('/register-referral', webhookAuth, async (req, res) => {
+router.post('/register-referral', webhookAuth, idempotency, async (req, res) => {
     try {
         const { referralCode, referralUserId, depositAmount } = req.body;
         
@@ -76,7 +77,7 @@ router.post('/register-referral', webhookAuth, async (req, res) => {
  * Update deposit (repeated deposit)
  * Called when referred user makes another deposit
  */
-router.post('/update-deposit', webhookAuth, async (req, res) => {
+router.post('/update-deposit', webhookAuth, idempotency, async (req, res) => {
     try {
         const { referralCode, referralUserId, depositAmount } = req.body;
         
@@ -5,6 +5,7 @@
 
 const express = require('express');
 const router = express.Router();
+const { idempotency } = require('../middleware/idempotency');
 
 // In-memory transactions storage
 const transactions = new Map();
@@ -48,7 +49,7 @@ router.get('/:telegramId', async (req, res) => {
  * POST /api/transactions/:telegramId
  * Add transaction
  */
-router.post('/:telegramId', async (req, res) => {
+router.post('/:telegramId', idempotency, async (req, res) => {
     try {
         const { telegramId } = req.params;
         const { type, amount, source, description } = req.body;
@@ -13,6 +13,7 @@ const helmet = require('helmet');
 const rateLimit = require('express-rate-limit');
 const path = require('path');
 const { db, initDatabase } = require('./config/database');
+const { clearIdempotencyKeys } = require('./middleware/idempotency');
 
 // ============================================
 // GAMES
@@ -242,6 +243,12 @@ async function startServer() {
         await initDatabase();
         console.log('✅ Database ready');
         
+        // Clear old idempotency keys on start and every hour
+        await clearIdempotencyKeys();
+        setInterval(() => {
+            clearIdempotencyKeys().catch((error) => console.error('❌ Idempotency cleanup error:', error));
+        }, 60 * 60 * 1000);
+        
         // Socket.IO connection handling
         io.on('connection', (socket) => {
             console.log('🔌 Socket.IO client connected:', socket.id);
@@ -0,0 +1,40 @@
+// ============================================
+// BOT SERVICE
+// Notifications from server to Python bot HTTP server
+// ============================================
+
+const BOT_WEB_URL = process.env.BOT_WEB_URL || ''; // Bot HTTP server (BOT_WEB_PORT in bot), empty - notifications are off
+const PARTNER_API_SECRET = process.env.PARTNER_API_SECRET || 'default-secret-key';
+const BOT_NOTIFY_TIMEOUT = 2000; // ms, balance push must not slow down game requests
+
+/**
+ * Push new balance to the bot so its balance cache does not wait for TTL
+ * Errors are only logged: the bot falls back to reading balance after TTL
+ */
+function notifyBotBalance(telegramId, balance) {
+    if (!BOT_WEB_URL) {
+        return;
+    }
+
+    fetch(`${BOT_WEB_URL}/api/bot/balance`, {
+        method: 'POST',
+        headers: {
+            'X-API-Secret': PARTNER_API_SECRET,
+            'Content-Type': 'application/json'
+        },
+        body: JSON.stringify({
+            userId: parseInt(telegramId),
+            rubles: balance.rubles,
+            chips: balance.chips
+        }),
+        signal: AbortSignal.timeout(BOT_NOTIFY_TIMEOUT)
+    }).then((response) => {
+        if (!response.ok) {
+            console.warn(`⚠️ Bot balance push for ${telegramId}: HTTP ${response.status}`);
+        }
+    }).catch((error) => {
+        console.warn(`⚠️ Bot balance push failed for ${telegramId}: ${error.message}`);
+    });
+}
+
+module.exports = { notifyBotBalance };